@@ -0,0 +1,275 @@
+import bisect
+import heapq
+import json
+import os
+import struct
+from datetime import datetime
+
+from utils import file_lock
+
+# 禁用历史：每次禁用/解禁追加一条事件到 history.jsonl（删除的记录以墓碑形式保留），
+# 同时增量更新按忍者、等级、周汇总的统计表，统计界面只读汇总表，不重新扫描事件。
+# 汇总表定期落盘到 history_rollup.json，并记下当时日志的长度，
+# 启动时只需回放这之后追加的事件。
+# history.idx 是与日志同步追加的时间索引，每条事件一项：时间戳(f64) 日志偏移(u64)；
+# 界面和命令行工具可能同时写入，追加日志和索引都在 history.lock 下进行，索引项以日志偏移为键，
+# 回放别人追加的事件时不再重复写入它们的索引项
+ROLLUP_FORMAT = 1
+INDEX_ENTRY = struct.Struct("<dQ")
+# 每记录多少条事件保存一次汇总表
+CHECKPOINT_EVERY = 50
+
+
+def week_key(moment):
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class BanHistory:
+
+    def __init__(self, history_dir="data"):
+        self.log_file = os.path.join(history_dir, "history.jsonl")
+        self.rollup_file = os.path.join(history_dir, "history_rollup.json")
+        self.index_file = os.path.join(history_dir, "history.idx")
+        self.lock_file = os.path.join(history_dir, "history.lock")
+        self.ninja_data = None
+        self._dirty = 0
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.log_size = 0
+        # name -> {"rank", "bans", "unbans", "last_ban"}
+        self.ninjas = {}
+        # rank -> {"bans", "unbans"}
+        self.ranks = {}
+        # "2026-W42" -> {rank: 禁用次数}
+        self.weeks = {}
+        # 按时间排序的索引：时间戳和事件在日志中的字节偏移一一对应
+        self.times = []
+        self.offsets = []
+        self.indexed = set()
+        # 已读入的索引文件长度，之后的部分是其他实例追加的
+        self.index_size = 0
+
+    def load(self):
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+        try:
+            with open(self.rollup_file, 'r', encoding='utf-8') as f:
+                rollup = json.load(f)
+            if rollup.get("format") != ROLLUP_FORMAT:
+                raise ValueError(rollup.get("format"))
+            self.log_size = rollup["log_size"]
+            self.ninjas = rollup["ninjas"]
+            self.ranks = rollup["ranks"]
+            self.weeks = rollup["weeks"]
+        except (OSError, ValueError, KeyError):
+            self._reset()
+
+        with file_lock(self.lock_file):
+            log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+            if log_size < self.log_size:
+                # 日志被截断或替换过，汇总表作废，从头回放
+                self._reset()
+            self._load_index()
+            if log_size > self.log_size:
+                self._replay_tail()
+
+    def _read_index(self, start=0):
+        if not os.path.exists(self.index_file):
+            return b""
+        with open(self.index_file, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        # 丢掉写到一半的项
+        return data[:len(data) - len(data) % INDEX_ENTRY.size]
+
+    def _load_index(self):
+        # 只保留汇总表已覆盖的那部分索引，按日志偏移去重，之后的事件由回放补上索引；
+        # 内容有变化时整体替换索引文件（调用方已持有 history.lock）
+        data = self._read_index()
+        entries = {offset: timestamp for timestamp, offset in INDEX_ENTRY.iter_unpack(data) if offset < self.log_size}
+        entries = sorted((timestamp, offset) for offset, timestamp in entries.items())
+        kept = b"".join(INDEX_ENTRY.pack(*entry) for entry in entries)
+        file_size = os.path.getsize(self.index_file) if os.path.exists(self.index_file) else 0
+        if kept != data or file_size != len(data):
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(kept)
+            os.replace(tmp_file, self.index_file)
+        self.times = [entry[0] for entry in entries]
+        self.offsets = [entry[1] for entry in entries]
+        self.indexed = set(self.offsets)
+        self.index_size = len(kept)
+
+    def _sync_index(self):
+        # 读入其他实例追加的索引项
+        data = self._read_index(self.index_size)
+        for timestamp, offset in INDEX_ENTRY.iter_unpack(data):
+            self._index(timestamp, offset)
+        self.index_size += len(data)
+
+    def _replay_tail(self):
+        # 调用方已持有 history.lock；别人写入的事件它自己已经写过索引，只补上缺少的项
+        # （例如写完日志还没写索引就退出的实例）
+        self._sync_index()
+        missing = bytearray()
+        with open(self.log_file, 'rb') as f:
+            f.seek(self.log_size)
+            offset = self.log_size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 上次写到一半的行，丢弃
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    event = None
+                if event:
+                    self._apply(event)
+                    if offset not in self.indexed:
+                        missing.extend(self._index(datetime.fromisoformat(event["time"]).timestamp(), offset))
+                offset += len(line)
+                self._dirty += 1
+        if missing:
+            with open(self.index_file, 'ab') as index:
+                index.write(missing)
+            self.index_size += len(missing)
+        self.log_size = offset
+
+    def _apply(self, event):
+        moment = datetime.fromisoformat(event["time"])
+        name, rank = event["name"], event["rank"]
+        ninja = self.ninjas.setdefault(name, {"rank": rank, "bans": 0, "unbans": 0, "last_ban": None})
+        rank_totals = self.ranks.setdefault(rank, {"bans": 0, "unbans": 0})
+
+        if event["event"] == "ban":
+            ninja["rank"] = rank
+            ninja["bans"] += 1
+            ninja["last_ban"] = event["time"]
+            rank_totals["bans"] += 1
+            week = self.weeks.setdefault(week_key(moment), {})
+            week[rank] = week.get(rank, 0) + 1
+        elif event["event"] == "unban":
+            ninja["unbans"] += 1
+            rank_totals["unbans"] += 1
+        else:
+            # move：只更新当前等级，不计入禁用次数
+            ninja["rank"] = rank
+
+    def _index(self, timestamp, offset):
+        # 事件基本按时间顺序追加，系统时间被调回时才需要插到中间；已有的偏移不重复加入
+        if offset in self.indexed:
+            return b""
+        index = bisect.bisect_right(self.times, timestamp)
+        self.times.insert(index, timestamp)
+        self.offsets.insert(index, offset)
+        self.indexed.add(offset)
+        return INDEX_ENTRY.pack(timestamp, offset)
+
+    def record(self, event, ninjas, moment=None):
+        # 同一次操作的所有事件一次追加写入
+        moment = moment or datetime.now()
+        entries = []
+        for ninja in ninjas:
+            entry = {"time": moment.isoformat(), "event": event, "name": ninja["name"], "rank": ninja["rank"]}
+            if event == "unban":
+                # 墓碑：保留被删除记录原来的禁用时间
+                entry["banned_at"] = ninja.get("created_at")
+            entries.append(entry)
+        if not entries:
+            return
+
+        with file_lock(self.lock_file):
+            # 命令行工具可能同时在追加，先把别人写入的事件补进汇总表
+            if os.path.exists(self.log_file) and os.path.getsize(self.log_file) > self.log_size:
+                self._replay_tail()
+            index_entries = bytearray()
+            with open(self.log_file, 'ab') as f:
+                offset = f.tell()
+                for entry in entries:
+                    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+                    f.write(line)
+                    self._apply(entry)
+                    index_entries.extend(self._index(moment.timestamp(), offset))
+                    offset += len(line)
+            with open(self.index_file, 'ab') as f:
+                f.write(index_entries)
+            self.index_size += len(index_entries)
+            self.log_size = offset
+
+        self._dirty += len(entries)
+        if self._dirty >= CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if not self._dirty:
+            return
+        rollup = {
+            "format": ROLLUP_FORMAT,
+            "log_size": self.log_size,
+            "ninjas": self.ninjas,
+            "ranks": self.ranks,
+            "weeks": self.weeks,
+        }
+        tmp_file = self.rollup_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(rollup, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_file, self.rollup_file)
+        self._dirty = 0
+
+    def attach(self, ninja_data):
+        self.ninja_data = ninja_data
+        ninja_data.add_listener(self.on_data_changed)
+
+    def on_data_changed(self, event, payload):
+        if self.ninja_data.external_change:
+            # 其他实例写入的事件由它自己记录，这里回放日志时会读到
+            return
+        if event == "add":
+            self.record("ban", payload)
+        elif event == "delete":
+            self.record("unban", payload)
+        elif event == "move":
+            self.record("move", [ninja for ninja, _ in payload])
+
+    def close(self):
+        if self.ninja_data is not None:
+            self.ninja_data.remove_listener(self.on_data_changed)
+            self.ninja_data = None
+        self.checkpoint()
+
+    # 以下查询都只读汇总表或索引
+
+    def event_count(self):
+        return len(self.times)
+
+    def top_ninjas(self, limit=20, rank=None):
+        # [(名称, 当前等级, 禁用次数, 解禁次数)]，按禁用次数从多到少
+        items = ((name, stats) for name, stats in self.ninjas.items()
+                 if rank is None or stats["rank"] == rank)
+        top = heapq.nlargest(limit, items, key=lambda item: (item[1]["bans"], item[1]["last_ban"] or ""))
+        return [(name, stats["rank"], stats["bans"], stats["unbans"]) for name, stats in top]
+
+    def rank_totals(self):
+        return {rank: dict(totals) for rank, totals in self.ranks.items()}
+
+    def weekly(self, limit=None):
+        # [(周, {等级: 禁用次数})]，最近的周在前
+        weeks = sorted(self.weeks, reverse=True)
+        if limit is not None:
+            weeks = weeks[:limit]
+        return [(week, dict(self.weeks[week])) for week in weeks]
+
+    def events_between(self, start, end):
+        # 时间范围 [start, end) 内的原始事件，先二分索引再按偏移读取
+        lo = bisect.bisect_left(self.times, start.timestamp())
+        hi = bisect.bisect_left(self.times, end.timestamp())
+        events = []
+        if lo >= hi:
+            return events
+        with open(self.log_file, 'rb') as f:
+            for offset in self.offsets[lo:hi]:
+                f.seek(offset)
+                events.append(json.loads(f.readline()))
+        return events
@@ -0,0 +1,238 @@
+import bisect
+
+from PySide6.QtCore import *
+from PySide6.QtGui import *
+
+# 禁用名单导出成图片：直接根据数据排版并绘制到 QImage，不截取界面控件，
+# 因此可以放在后台线程执行；超长的名单按高度切成多张图片，切口落在两行名称之间
+BOARD_WIDTH = 1080
+PADDING = 32
+CHIP_PADDING = 10
+CHIP_SPACING = 8
+SECTION_SPACING = 24
+# 单张图片的像素上限，超过后分块绘制
+MAX_TILE_PIXELS = 4096 * 4096
+
+FONT_FAMILIES = ["Microsoft YaHei", "Segoe UI", "sans-serif"]
+
+
+def board_snapshot(ninja_data):
+    # 在界面线程取一份数据快照，渲染线程只读这份快照
+    return {
+        "version": ninja_data.version,
+        "rules": ninja_data.load_rules(),
+        "ranks": [(rank, ninja_data.tier_color(rank), [ninja["name"] for ninja in ninja_data.get_ninjas(rank)])
+                  for rank in ninja_data.ranks()],
+    }
+
+
+def make_font(pixel_size, bold=False):
+    font = QFont()
+    font.setFamilies(FONT_FAMILIES)
+    font.setPixelSize(max(1, round(pixel_size)))
+    font.setBold(bold)
+    return font
+
+
+def layout_board(snapshot, scale):
+    # 计算所有绘制指令，返回 (宽, 高, 指令列表)
+    width = BOARD_WIDTH * scale
+    padding = PADDING * scale
+    content_width = width - padding * 2
+    ops = []
+
+    title_font = (28 * scale, True)
+    rules_font = (16 * scale, False)
+
+    y = padding
+    title_metrics = QFontMetricsF(make_font(*title_font))
+    ops.append(("text", QRectF(padding, y, content_width, title_metrics.height()),
+                title_font, "#1976D2", Qt.AlignLeft, "火影忍者段位赛 禁用名单"))
+    y += title_metrics.height() + SECTION_SPACING * scale
+
+    rules = snapshot["rules"].strip()
+    if rules:
+        rules_rect = QFontMetricsF(make_font(*rules_font)).boundingRect(
+            QRectF(0, 0, content_width, 1e6), Qt.TextWordWrap, rules)
+        ops.append(("text", QRectF(padding, y, content_width, rules_rect.height()),
+                    rules_font, "#333333", Qt.AlignLeft | Qt.TextWordWrap, rules))
+        y += rules_rect.height() + SECTION_SPACING * scale
+
+    for rank, color, names in snapshot["ranks"]:
+        section_ops, y = layout_section(rank, color, names, scale, padding, y, content_width)
+        ops.extend(section_ops)
+        y += SECTION_SPACING * scale
+
+    return int(width), int(y + padding), ops
+
+
+def layout_section(rank, color, names, scale, left, top, content_width):
+    # 一个等级区域（标题和名称）的绘制指令，返回 (指令列表, 区域底部的 y)；
+    # 演示窗口每个等级单独排版和缓存，也用这个函数
+    header_font = (20 * scale, True)
+    chip_font = (14 * scale, False)
+    header_metrics = QFontMetricsF(make_font(*header_font))
+    chip_metrics = QFontMetricsF(make_font(*chip_font))
+    chip_height = chip_metrics.height() + CHIP_PADDING * scale
+    chip_padding = CHIP_PADDING * scale
+    chip_spacing = CHIP_SPACING * scale
+
+    ops = []
+    y = top
+    ops.append(("text", QRectF(left, y, content_width, header_metrics.height()),
+                header_font, color, Qt.AlignLeft, f"{rank}级忍者（{len(names)}）"))
+    y += header_metrics.height() + chip_spacing
+
+    # 名称按流式布局排列
+    x = left
+    for name in names:
+        chip_width = chip_metrics.horizontalAdvance(name) + chip_padding * 2
+        if x > left and x + chip_width > left + content_width:
+            x = left
+            y += chip_height + chip_spacing
+        rect = QRectF(x, y, chip_width, chip_height)
+        ops.append(("chip", rect, color))
+        ops.append(("text", rect, chip_font, "#333333", Qt.AlignCenter, name))
+        x += chip_width + chip_spacing
+    if names:
+        y += chip_height
+    return ops, y
+
+
+def paint_ops(painter, ops, clip):
+    fonts = {}
+    for op in ops:
+        rect = op[1]
+        if not rect.intersects(clip):
+            continue
+        if op[0] == "chip":
+            color = QColor(op[2])
+            painter.setPen(QPen(color, 1))
+            color.setAlpha(30)
+            painter.setBrush(color)
+            painter.drawRoundedRect(rect, rect.height() / 4, rect.height() / 4)
+        else:
+            _, _, font_spec, color, flags, text = op
+            if font_spec not in fonts:
+                fonts[font_spec] = make_font(*font_spec)
+            painter.setFont(fonts[font_spec])
+            painter.setPen(QColor(color))
+            painter.drawText(rect, flags, text)
+
+
+def blocked_ranges(ops):
+    # 切块时不能穿过的 y 范围，按起点排序并合并重叠部分；
+    # 自动换行的长文本（规则）可以在行与行之间切开
+    ranges = []
+    for op in ops:
+        rect = op[1]
+        if op[0] == "text" and op[4] & Qt.TextWordWrap:
+            line = QFontMetricsF(make_font(*op[2])).lineSpacing()
+            y = rect.top()
+            while y < rect.bottom():
+                ranges.append((y, min(y + line, rect.bottom())))
+                y += line
+        else:
+            ranges.append((rect.top(), rect.bottom()))
+    ranges.sort()
+    merged = []
+    for top, bottom in ranges:
+        if merged and top < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], bottom))
+        else:
+            merged.append((top, bottom))
+    return merged
+
+
+def tile_bounds(ops, width, height, max_tile_pixels=MAX_TILE_PIXELS):
+    # 每张图片的 (上, 下)：尽量切在两行名称或两个区域之间，单个元素比一张图片还高时才从中间切开
+    tile_height = max(1, min(height, max_tile_pixels // max(1, width)))
+    blocked = blocked_ranges(ops)
+    starts = [top for top, _ in blocked]
+    bounds = []
+    top = 0
+    while top < height:
+        cut = min(height, top + tile_height)
+        if cut < height:
+            # 切口落在某一行中间时，改在这一行的上方切开
+            i = bisect.bisect_left(starts, cut) - 1
+            if i >= 0 and blocked[i][1] > cut and int(blocked[i][0]) > top:
+                cut = int(blocked[i][0])
+        bounds.append((top, cut))
+        top = cut
+    return bounds
+
+
+def render_tile(ops, width, top, bottom):
+    image = QImage(width, bottom - top, QImage.Format_ARGB32_Premultiplied)
+    image.fill(QColor("#FFFFFF"))
+
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    painter.translate(0, -top)
+    paint_ops(painter, ops, QRectF(0, top, width, bottom - top))
+    painter.end()
+    return image
+
+
+def render_board(snapshot, scale=1.0, max_tile_pixels=MAX_TILE_PIXELS, cancelled=None):
+    # 返回 QImage 列表，名单不长时只有一张
+    width, height, ops = layout_board(snapshot, scale)
+    tiles = []
+    for top, bottom in tile_bounds(ops, width, height, max_tile_pixels):
+        if cancelled and cancelled():
+            return []
+        tiles.append(render_tile(ops, width, top, bottom))
+    return tiles
+
+
+def encode_png(image):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+def tile_paths(path, count):
+    if count == 1:
+        return [path]
+    base, ext = path.rsplit(".", 1) if "." in path else (path, "png")
+    return [f"{base}_{i}.{ext}" for i in range(1, count + 1)]
+
+
+class BoardExporter:
+    # 缓存上一次编码好的 PNG，名单和规则没有变化时直接复用；
+    # 每张图片编码后就释放，大倍数导出时不会同时占着所有解码后的图片
+
+    def __init__(self):
+        self._key = None
+        self._encoded = []
+
+    def encode(self, snapshot, scale, progress=None, cancelled=None):
+        key = (snapshot["version"], scale)
+        if key != self._key:
+            width, height, ops = layout_board(snapshot, scale)
+            bounds = tile_bounds(ops, width, height)
+            encoded = []
+            for i, (top, bottom) in enumerate(bounds, 1):
+                if cancelled and cancelled():
+                    return []
+                encoded.append(encode_png(render_tile(ops, width, top, bottom)))
+                if progress:
+                    progress(i, len(bounds))
+            self._key = key
+            self._encoded = encoded
+        return self._encoded
+
+    def export(self, snapshot, scale, path, progress=None, cancelled=None):
+        # 取消时返回 None
+        encoded = self.encode(snapshot, scale, progress, cancelled)
+        if not encoded:
+            return None
+        paths = tile_paths(path, len(encoded))
+        for data, tile_path in zip(encoded, paths):
+            with open(tile_path, 'wb') as f:
+                f.write(data)
+        return paths
@@ -1,6 +1,8 @@
 import PyInstaller.__main__
 import os
 
+from ninja_catalog import build_index
+
 # 获取当前目录
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -11,8 +13,12 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 datas = [
     ('data', 'data'),  # (源文件夹, 目标文件夹)
     ('checkmark.svg', '.'),  # 包含 checkmark.svg 文件
+    ('catalog', 'catalog'),  # 忍者目录及其预编译索引
 ]
 
+# 打包前重新生成忍者目录索引
+build_index()
+
 # 定义 PyInstaller 参数
 params = [
     'main.py',  # 你的主程序入口文件
@@ -23,6 +29,7 @@ params = [
     # '--icon=' + icon_path,  # 如果有图标的话
     '--add-data=' + os.pathsep.join(datas[0]),  # 添加 data 文件夹
     '--add-data=' + os.pathsep.join(datas[1]),  # 添加 checkmark.svg
+    '--add-data=' + os.pathsep.join(datas[2]),  # 添加忍者目录
     '--hidden-import=PySide6.QtXml',  # 确保包含所需的 Qt 模块
 ]
 
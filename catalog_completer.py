@@ -0,0 +1,90 @@
+from PySide6.QtWidgets import *
+from PySide6.QtCore import *
+from PySide6.QtGui import *
+from name_tokenizer import NAME_SEPARATORS
+from ninja_catalog import get_catalog
+
+
+class CatalogCompleter(QCompleter):
+    # 每次输入时直接查询忍者目录索引，模型里只放当前前缀的候选项
+
+    def __init__(self, parent=None, limit=20):
+        super().__init__(parent)
+        self.limit = limit
+        self.model = QStringListModel(self)
+        self.setModel(self.model)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+    def show_completions(self, prefix, rect=None):
+        names = get_catalog().complete(prefix, self.limit) if prefix else []
+        # 已经完整输入的名称不再弹出
+        if not names or names == [prefix]:
+            self.popup().hide()
+            return
+        self.model.setStringList(names)
+        self.setCompletionPrefix(prefix)
+        if rect is None:
+            self.complete()
+        else:
+            rect.setWidth(self.popup().sizeHintForColumn(0)
+                          + self.popup().verticalScrollBar().sizeHint().width())
+            self.complete(rect)
+        # 默认选中第一项，回车即可补全
+        self.popup().setCurrentIndex(self.completionModel().index(0, 0))
+
+
+def attach_line_edit_completer(line_edit):
+    completer = CatalogCompleter(line_edit)
+    completer.setWidget(line_edit)
+    line_edit.textEdited.connect(completer.show_completions)
+    completer.activated.connect(line_edit.setText)
+    return completer
+
+
+class CompletingTextEdit(QTextEdit):
+    # 多个名称的输入框，只补全光标前正在输入的那个名称
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.completer = CatalogCompleter(self)
+        self.completer.setWidget(self)
+        self.completer.activated.connect(self.insert_completion)
+
+    def current_word_range(self):
+        cursor = self.textCursor()
+        block_text = cursor.block().text()
+        end = cursor.positionInBlock()
+        start = end
+        while start > 0 and block_text[start - 1] not in NAME_SEPARATORS:
+            start -= 1
+        return cursor.block().position() + start, block_text[start:end]
+
+    def insert_completion(self, name):
+        start, _ = self.current_word_range()
+        cursor = self.textCursor()
+        cursor.setPosition(start, QTextCursor.KeepAnchor)
+        cursor.insertText(name)
+        self.setTextCursor(cursor)
+
+    def keyPressEvent(self, event):
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (Qt.Key_Enter, Qt.Key_Return, Qt.Key_Escape,
+                                                  Qt.Key_Tab, Qt.Key_Backtab):
+            # 交给补全器处理
+            event.ignore()
+            return
+
+        super().keyPressEvent(event)
+
+        if not event.text():
+            return
+        _, word = self.current_word_range()
+        self.completer.show_completions(word, self.cursorRect())
+
+    def inputMethodEvent(self, event):
+        # 中文输入法提交的文字不走 keyPressEvent
+        super().inputMethodEvent(event)
+        if event.commitString():
+            _, word = self.current_word_range()
+            self.completer.show_completions(word, self.cursorRect())
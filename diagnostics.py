@@ -0,0 +1,273 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from PySide6.QtCore import QCoreApplication, QEvent, QObject
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QPlainTextEdit, QPushButton, QVBoxLayout,
+                               QWidget)
+
+# 内存和 Qt 对象诊断：统计存活的 Qt 对象（按类）、每个等级区域的控件数、
+# Python 对象（按类型）、tracemalloc 按源文件统计的内存和进程常驻内存，
+# 两次采样相减就能看出某个操作之后多出了什么。另附上一次转盘转动的帧节奏统计。
+# 主窗口按 Ctrl+Shift+F12 打开；python main.py --diagnostics 从启动起跟踪内存分配，
+# session_replay.py --diagnostics 报告回放前后的差异
+TOP_ITEMS = 20
+
+
+def start_tracing():
+    # 越早开始，tracemalloc 能归到源文件的内存越多；已在跟踪时不重复开始
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def process_rss():
+    # 进程常驻内存（字节），取不到时返回 None
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class Counters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                        "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage",
+                        "PeakPagefileUsage")]
+
+            counters = Counters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def flush_deleted_objects(exclude=None):
+    # 执行所有 deleteLater 排队的删除并回收 Python 垃圾，返回被删掉的 Qt 对象数
+    before = sum(qt_object_counts(exclude).values())
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    gc.collect()
+    return before - sum(qt_object_counts(exclude).values())
+
+
+def qt_object_counts(exclude=None):
+    # 从 QApplication 和所有顶层窗口出发能找到的 Qt 对象，按类名计数；
+    # 没有父对象、也不是窗口的对象（如独立的 QTimer）不在其中。exclude 及其子对象不计
+    app = QApplication.instance()
+    if app is None:
+        return Counter()
+    objects = {}
+    for root in [app] + app.topLevelWidgets():
+        objects[id(root)] = root
+        for child in root.findChildren(QObject):
+            objects[id(child)] = child
+    if exclude is not None:
+        for obj in [exclude] + exclude.findChildren(QObject):
+            objects.pop(id(obj), None)
+    return Counter(obj.metaObject().className() for obj in objects.values())
+
+
+def rank_widget_counts(window):
+    # {等级: (卡片数, 区域内的控件总数)}
+    counts = {}
+    for rank, container in getattr(window, "rank_containers", {}).items():
+        counts[rank] = (window.rank_areas[rank].count(), len(container.findChildren(QWidget)) + 1)
+    return counts
+
+
+def python_type_counts():
+    # 垃圾回收器跟踪的 Python 对象按类型统计 (数量, 字节)；
+    # str、int 等不含引用的对象不在其中，它们的内存算在 tracemalloc 的源文件统计里
+    counts = Counter()
+    sizes = Counter()
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        counts[name] += 1
+        sizes[name] += sys.getsizeof(obj, 0)
+    return counts, sizes
+
+
+def take_snapshot(window=None, exclude=None):
+    app = QApplication.instance()
+    snapshot = {
+        "time": time.time(),
+        "rss": process_rss(),
+        "qt": qt_object_counts(exclude),
+        "ranks": rank_widget_counts(window) if window is not None else {},
+        "stylesheet": len(app.styleSheet()) if app is not None else 0,
+        # 自带样式表的控件：每个都会让 Qt 为它单独解析和匹配一次样式
+        "styled_widgets": sum(1 for w in app.allWidgets() if w.styleSheet()) if app is not None else 0,
+        "tracemalloc": _traced_memory(),
+    }
+    snapshot["types"], snapshot["type_sizes"] = python_type_counts()
+    if window is not None:
+        snapshot["records"] = len(window.ninja_data.get_ninjas())
+        snapshot["scrolls"] = len(window.ninja_data.load_scrolls())
+        snapshot["spin"] = window.last_spin_metrics
+    return snapshot
+
+
+def _traced_memory():
+    if not tracemalloc.is_tracing():
+        return None
+    # 去掉 tracemalloc 自己保存采样结果用的内存
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def _size(value):
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{sign}{value:.0f} {unit}" if unit == "B" else f"{sign}{value:.1f} {unit}"
+        value /= 1024
+    return f"{sign}{value:.1f} GB"
+
+
+def _counter_rows(after, before=None, sizes=None, before_sizes=None, limit=TOP_ITEMS):
+    if before is None:
+        rows = after.most_common(limit)
+        return [f"  {name:<32}{count:>8}" + (f"{_size(sizes[name]):>12}" if sizes else "") for name, count in rows]
+    changed = [(name, after[name] - before[name]) for name in set(after) | set(before)
+               if after[name] != before[name] or (sizes and sizes[name] != before_sizes[name])]
+    changed.sort(key=lambda item: (-abs(item[1]), item[0]))
+    return [f"  {name:<32}{after[name]:>8}{delta:>+8}" +
+            (f"{_size(sizes[name] - before_sizes[name]):>12}" if sizes else "")
+            for name, delta in changed[:limit]] or ["  （无变化）"]
+
+
+def format_report(after, before=None):
+    # 文字报告；给出 before 时只列出有变化的项
+    lines = []
+    rss = after["rss"]
+    if rss is not None:
+        line = f"进程常驻内存：{_size(rss)}"
+        if before is not None and before["rss"] is not None:
+            line += f"（{'+' if rss >= before['rss'] else ''}{_size(rss - before['rss'])}）"
+        lines.append(line)
+    if "records" in after:
+        lines.append(f"名单记录：{after['records']}，秘卷：{after['scrolls']}")
+    lines.append(f"全局样式表：{after['stylesheet']} 字符，自带样式表的控件：{after['styled_widgets']}")
+    spin = after.get("spin")
+    if spin:
+        lines.append(f"上一次转盘转动：{spin['frames']} 帧，{spin['fps']:.1f} fps，"
+                     f"帧间隔平均 {spin['avg_interval_ms']:.1f} ms / 最长 {spin['max_interval_ms']:.1f} ms，"
+                     f"掉帧 {spin['slow_frames']}，绘制平均 {spin['avg_paint_ms']:.2f} ms / "
+                     f"最长 {spin['max_paint_ms']:.2f} ms，低画质帧 {spin['fast_quality_frames']}")
+    if before is not None:
+        lines.append(f"与 {time.strftime('%H:%M:%S', time.localtime(before['time']))} 的基准相比：")
+
+    lines.append("")
+    lines.append(f"Qt 对象（共 {sum(after['qt'].values())}" +
+                 (f"，{sum(after['qt'].values()) - sum(before['qt'].values()):+}）" if before else "）"))
+    lines.extend(_counter_rows(after["qt"], before and before["qt"]))
+
+    if after["ranks"]:
+        lines.append("")
+        lines.append("各等级区域（卡片 / 控件）")
+        for rank, (cards, widgets) in after["ranks"].items():
+            line = f"  {rank:<8}{cards:>8}{widgets:>8}"
+            if before is not None and rank in before["ranks"]:
+                old_cards, old_widgets = before["ranks"][rank]
+                line += f"{cards - old_cards:>+8}{widgets - old_widgets:>+8}"
+            lines.append(line)
+
+    lines.append("")
+    lines.append("Python 对象（按类型，数量 / 字节）")
+    lines.extend(_counter_rows(after["types"], before and before["types"],
+                               after["type_sizes"], before and before["type_sizes"]))
+
+    lines.append("")
+    current = after["tracemalloc"]
+    if current is None:
+        lines.append("Python 内存（按源文件）：未开启 tracemalloc，用 python main.py --diagnostics 启动或点击“开始跟踪”")
+    else:
+        traced = sum(stat.size for stat in current.statistics("filename"))
+        lines.append(f"Python 内存（按源文件，共 {_size(traced)}）")
+        if before is not None and before["tracemalloc"] is not None:
+            stats = [stat for stat in current.compare_to(before["tracemalloc"], "filename") if stat.size_diff]
+            stats.sort(key=lambda stat: -abs(stat.size_diff))
+            lines.extend(f"  {_short_path(stat.traceback[0].filename):<40}{_size(stat.size):>12}"
+                         f"{_size(stat.size_diff):>12}" for stat in stats[:TOP_ITEMS])
+        else:
+            lines.extend(f"  {_short_path(stat.traceback[0].filename):<40}{_size(stat.size):>12}"
+                         for stat in current.statistics("filename")[:TOP_ITEMS])
+    return "\n".join(lines)
+
+
+def _short_path(path):
+    # 本程序的文件只显示文件名，库文件保留最后两级目录
+    if os.path.dirname(os.path.abspath(path)) == os.path.dirname(os.path.abspath(__file__)):
+        return os.path.basename(path)
+    return os.path.join(*path.replace("\\", "/").split("/")[-2:])
+
+
+class DiagnosticsDialog(QDialog):
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.main_window = window
+        self.baseline = None
+        self.setWindowTitle("内存与对象诊断")
+        self.resize(640, 720)
+        layout = QVBoxLayout(self)
+
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.report.setFont(QFont("Consolas, Courier New, monospace"))
+        layout.addWidget(self.report)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        baseline_btn = QPushButton("设为基准")
+        baseline_btn.clicked.connect(self.set_baseline)
+        self.compare_btn = QPushButton("与基准比较")
+        self.compare_btn.setEnabled(False)
+        self.compare_btn.clicked.connect(self.compare)
+        flush_btn = QPushButton("执行待删除")
+        flush_btn.setToolTip("处理 deleteLater 排队的对象并回收垃圾，区分真正的泄漏和尚未执行的删除")
+        flush_btn.clicked.connect(self.flush)
+        self.trace_btn = QPushButton("开始跟踪")
+        self.trace_btn.setToolTip("开启 tracemalloc，之后分配的内存会按源文件统计")
+        self.trace_btn.setEnabled(not tracemalloc.is_tracing())
+        self.trace_btn.clicked.connect(self.start_tracing)
+        for button in (refresh_btn, baseline_btn, self.compare_btn, flush_btn, self.trace_btn):
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def snapshot(self):
+        # 诊断对话框自己的控件不算进统计
+        return take_snapshot(self.main_window, exclude=self)
+
+    def refresh(self):
+        self.report.setPlainText(format_report(self.snapshot()))
+
+    def set_baseline(self):
+        self.baseline = self.snapshot()
+        self.compare_btn.setEnabled(True)
+        self.report.setPlainText("已记录基准，执行要检查的操作后点击“与基准比较”。\n\n" + format_report(self.baseline))
+
+    def compare(self):
+        self.report.setPlainText(format_report(self.snapshot(), self.baseline))
+
+    def flush(self):
+        deleted = flush_deleted_objects(exclude=self)
+        self.report.setPlainText(f"已删除 {deleted} 个排队删除的 Qt 对象。\n\n" + format_report(self.snapshot()))
+
+    def start_tracing(self):
+        start_tracing()
+        self.trace_btn.setEnabled(False)
+        # 之前的基准没有 tracemalloc 数据，重新记录
+        self.set_baseline()
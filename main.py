@@ -1,5 +1,13 @@
 import sys
 import os
+
+# --diagnostics：从启动起跟踪内存分配，退出时打印与启动完成时相比的变化
+DIAGNOSTICS = "--diagnostics" in sys.argv
+if DIAGNOSTICS:
+    import tracemalloc
+    tracemalloc.start()
+    sys.argv.remove("--diagnostics")
+
 from PySide6.QtWidgets import QApplication
 from ninja_manager import NinjaManager
 
@@ -14,4 +22,14 @@ if __name__ == '__main__':
     window = NinjaManager()
     window.show()
 
-    sys.exit(app.exec())
\ No newline at end of file
+    if DIAGNOSTICS:
+        import diagnostics
+        app.processEvents()
+        baseline = diagnostics.take_snapshot(window)
+        print(diagnostics.format_report(baseline), end="\n\n")
+
+    code = app.exec()
+    if DIAGNOSTICS:
+        diagnostics.flush_deleted_objects()
+        print(diagnostics.format_report(diagnostics.take_snapshot(window), baseline))
+    sys.exit(code)
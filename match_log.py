@@ -0,0 +1,228 @@
+import json
+import os
+import time
+from array import array
+
+from utils import file_lock
+
+# 比赛记录：每场段位赛挑战（胜负、使用的忍者、对手等级、转盘抽到的秘卷）只追加地写入列式分段。
+# matches/<分段编号>/ 下每列一个文件，定长二进制，追加一场只是在每个列文件末尾各写几个字节；
+# 文字列存的是 strings.jsonl（只追加的字符串表，第 n 行是编号 n）里的编号。
+# 一个分段写满 SEGMENT_ROWS 场后不再改动，之后的比赛写入下一个分段。
+# 按忍者、对手等级、秘卷汇总的胜负数随记录增量更新，定期存到 totals.json 并记下当时的场数，
+# 启动时只读取之后追加的行，统计界面只读汇总表。
+# 界面和命令行工具可能同时记录，读取、截断和追加字符串表与列文件都在 matches.lock 下进行
+TOTALS_FORMAT = 1
+SEGMENT_ROWS = 4096
+# 每记录多少场保存一次汇总表
+CHECKPOINT_EVERY = 50
+# (列名, array 类型码)：时间戳、胜负、忍者、对手等级、秘卷
+COLUMNS = (("time", "d"), ("result", "B"), ("ninja", "I"), ("opponent", "I"), ("scroll", "I"))
+# 文字列，也是可以汇总的维度
+DIMENSIONS = ("ninja", "opponent", "scroll")
+WIN = 1
+LOSS = 0
+
+
+class MatchLog:
+
+    def __init__(self, match_dir="data/matches"):
+        self.match_dir = match_dir
+        self.strings_file = os.path.join(match_dir, "strings.jsonl")
+        self.totals_file = os.path.join(match_dir, "totals.json")
+        self.lock_file = os.path.join(match_dir, "matches.lock")
+        self._dirty = 0
+        self.strings = []
+        self.string_ids = {}
+        self.strings_size = 0
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        # 汇总表已计入的场数
+        self.rows = 0
+        # [胜, 负]
+        self.overall = [0, 0]
+        # 维度 -> {值: [胜, 负]}
+        self.totals = {dimension: {} for dimension in DIMENSIONS}
+
+    def load(self):
+        os.makedirs(self.match_dir, exist_ok=True)
+        try:
+            with open(self.totals_file, 'r', encoding='utf-8') as f:
+                totals = json.load(f)
+            if totals.get("format") != TOTALS_FORMAT:
+                raise ValueError(totals.get("format"))
+            self.rows = totals["rows"]
+            self.overall = totals["overall"]
+            self.totals = {dimension: totals["totals"][dimension] for dimension in DIMENSIONS}
+        except (OSError, ValueError, KeyError):
+            self._reset()
+        with file_lock(self.lock_file):
+            self._load_strings()
+            stored = self._stored_rows()
+            if stored < self.rows:
+                # 分段被删除或替换过，汇总表作废，从头统计
+                self._reset()
+            if stored > self.rows:
+                self._replay(stored)
+
+    def _load_strings(self):
+        # 从上次读到的位置继续读字符串表（命令行工具可能追加了新的字符串）
+        # 调用方已持有 matches.lock，末尾不完整的行只可能是写到一半退出留下的，可以截掉
+        if not os.path.exists(self.strings_file):
+            return
+        with open(self.strings_file, 'rb') as f:
+            f.seek(self.strings_size)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 上次写到一半的行，它对应的比赛还没写入，丢弃
+                    break
+                value = json.loads(line)
+                self.string_ids[value] = len(self.strings)
+                self.strings.append(value)
+                self.strings_size += len(line)
+        if os.path.getsize(self.strings_file) > self.strings_size:
+            with open(self.strings_file, 'ab') as f:
+                f.truncate(self.strings_size)
+
+    def _segment_dir(self, segment):
+        return os.path.join(self.match_dir, f"{segment:06d}")
+
+    def _column_file(self, segment, column):
+        return os.path.join(self._segment_dir(segment), f"{column}.{dict(COLUMNS)[column]}")
+
+    def _stored_rows(self):
+        # 磁盘上的总场数；最后一个分段的列长度不一致时（写到一半退出）截到最短的列
+        # 调用方已持有 matches.lock，不会截掉别人正在写入的行
+        segments = sorted(int(name) for name in os.listdir(self.match_dir) if name.isdigit())
+        if not segments:
+            return 0
+        last = segments[-1]
+        sizes = {}
+        for column, code in COLUMNS:
+            path = self._column_file(last, column)
+            sizes[column] = os.path.getsize(path) // array(code).itemsize if os.path.exists(path) else 0
+        count = min(sizes.values())
+        for column, code in COLUMNS:
+            if sizes[column] > count:
+                with open(self._column_file(last, column), 'ab') as f:
+                    f.truncate(count * array(code).itemsize)
+        return last * SEGMENT_ROWS + count
+
+    def _replay(self, end):
+        self._load_strings()
+        columns = self.read(self.rows, end)
+        for row in zip(*(columns[column] for column, _ in COLUMNS)):
+            self._apply(*row)
+        self._dirty += end - self.rows
+        self.rows = end
+
+    def _apply(self, moment, result, ninja, opponent, scroll):
+        index = 0 if result == WIN else 1
+        self.overall[index] += 1
+        for dimension, value in (("ninja", ninja), ("opponent", opponent), ("scroll", scroll)):
+            counts = self.totals[dimension].setdefault(self.strings[value], [0, 0])
+            counts[index] += 1
+
+    def sync(self):
+        # 命令行工具或其他实例可能追加了比赛，把它们补进汇总表
+        with file_lock(self.lock_file):
+            self._sync()
+
+    def _sync(self):
+        # 调用方已持有 matches.lock；先读完别人追加的字符串，新字符串的编号才不会和别人的重复
+        self._load_strings()
+        stored = self._stored_rows()
+        if stored > self.rows:
+            self._replay(stored)
+
+    def _intern(self, values):
+        # 字符串换成编号，新字符串先追加到字符串表，保证列里的编号总能查到（调用方已持有 matches.lock）
+        new = [value for value in dict.fromkeys(values) if value not in self.string_ids]
+        if new:
+            data = "".join(json.dumps(value, ensure_ascii=False) + "\n" for value in new).encode('utf-8')
+            with open(self.strings_file, 'ab') as f:
+                f.write(data)
+            for value in new:
+                self.string_ids[value] = len(self.strings)
+                self.strings.append(value)
+            self.strings_size += len(data)
+        return [self.string_ids[value] for value in values]
+
+    def record(self, ninja, result, opponent, scroll="", moment=None):
+        # result 为 WIN 或 LOSS；没有用秘卷时 scroll 为空字符串
+        moment = moment if moment is not None else time.time()
+        with file_lock(self.lock_file):
+            self._sync()
+            ninja_id, opponent_id, scroll_id = self._intern([ninja, opponent, scroll])
+            row = {"time": moment, "result": result, "ninja": ninja_id, "opponent": opponent_id, "scroll": scroll_id}
+            segment = self.rows // SEGMENT_ROWS
+            os.makedirs(self._segment_dir(segment), exist_ok=True)
+            for column, code in COLUMNS:
+                with open(self._column_file(segment, column), 'ab') as f:
+                    array(code, [row[column]]).tofile(f)
+        self._apply(moment, result, ninja_id, opponent_id, scroll_id)
+        self.rows += 1
+
+        self._dirty += 1
+        if self._dirty >= CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if not self._dirty:
+            return
+        totals = {
+            "format": TOTALS_FORMAT,
+            "rows": self.rows,
+            "overall": self.overall,
+            "totals": self.totals,
+        }
+        # 临时文件名是共用的，和其他实例的保存错开
+        tmp_file = self.totals_file + ".tmp"
+        with file_lock(self.lock_file):
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(totals, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, self.totals_file)
+        self._dirty = 0
+
+    def close(self):
+        self.checkpoint()
+
+    # 以下查询只读汇总表，或按需读取少量列
+
+    def read(self, start=0, end=None, columns=None):
+        # 第 [start, end) 场的若干列：{列名: array}，只读取涉及的分段和列
+        end = self.rows if end is None else end
+        codes = dict(COLUMNS)
+        result = {column: array(codes[column]) for column in (columns or codes)}
+        row = start
+        while row < end:
+            segment, offset = divmod(row, SEGMENT_ROWS)
+            count = min(end - row, SEGMENT_ROWS - offset)
+            for column, values in result.items():
+                with open(self._column_file(segment, column), 'rb') as f:
+                    f.seek(offset * values.itemsize)
+                    values.fromfile(f, count)
+            row += count
+        return result
+
+    def recent(self, limit=20):
+        # 最近的比赛，最新的在前：[{"time", "result", "ninja", "opponent", "scroll"}]
+        columns = self.read(max(0, self.rows - limit))
+        matches = []
+        for moment, result, ninja, opponent, scroll in zip(*(columns[column] for column, _ in COLUMNS)):
+            matches.append({"time": moment, "result": result, "ninja": self.strings[ninja],
+                            "opponent": self.strings[opponent], "scroll": self.strings[scroll]})
+        matches.reverse()
+        return matches
+
+    def summary(self, dimension):
+        # [(值, 胜, 负)]，按场数从多到少
+        items = sorted(self.totals[dimension].items(), key=lambda item: (-sum(item[1]), item[0]))
+        return [(value, wins, losses) for value, (wins, losses) in items]
+
+    def win_rate(self, dimension=None, value=None):
+        # 不指定维度时是总胜率；没有比赛时返回 None
+        wins, losses = self.overall if dimension is None else self.totals[dimension].get(value, (0, 0))
+        return wins / (wins + losses) if wins + losses else None
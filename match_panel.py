@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from PySide6.QtWidgets import *
+from PySide6.QtCore import *
+from catalog_completer import attach_line_edit_completer
+from match_log import LOSS, WIN
+from ninja_catalog import canonical_name
+
+# 汇总页：(维度, 标签页标题, 第一列标题)
+SUMMARY_TABS = (("ninja", "按忍者", "忍者"), ("opponent", "按对手等级", "对手等级"), ("scroll", "按秘卷", "秘卷"))
+RECENT_LIMIT = 50
+
+
+def win_rate_text(wins, losses):
+    return f"{wins / (wins + losses) * 100:.1f}%" if wins + losses else "-"
+
+
+class MatchPanel(QDialog):
+    # 比赛记录面板：记下每场挑战的结果，汇总表直接读 MatchLog 增量维护的胜负数
+
+    def __init__(self, match_log, ninja_data, parent=None):
+        super().__init__(parent)
+        self.match_log = match_log
+        self.ninja_data = ninja_data
+        self.setWindowTitle("比赛记录")
+        self.resize(560, 600)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        form = QHBoxLayout()
+        self.ninja_input = QLineEdit()
+        self.ninja_input.setPlaceholderText("使用的忍者")
+        attach_line_edit_completer(self.ninja_input)
+        form.addWidget(self.ninja_input, 2)
+
+        self.opponent_combo = QComboBox()
+        for rank in self.ninja_data.ranks():
+            self.opponent_combo.addItem(f"对手{rank}级", rank)
+        form.addWidget(self.opponent_combo)
+
+        # 可编辑：转盘转出的秘卷会自动填入，也可以手动输入
+        self.scroll_combo = QComboBox()
+        self.scroll_combo.setEditable(True)
+        self.scroll_combo.lineEdit().setPlaceholderText("秘卷（可不填）")
+        form.addWidget(self.scroll_combo, 1)
+
+        win_btn = QPushButton("胜")
+        win_btn.clicked.connect(lambda: self.record_match(WIN))
+        loss_btn = QPushButton("负")
+        loss_btn.setObjectName("deleteButton")
+        loss_btn.clicked.connect(lambda: self.record_match(LOSS))
+        form.addWidget(win_btn)
+        form.addWidget(loss_btn)
+        layout.addLayout(form)
+
+        self.overall_label = QLabel()
+        layout.addWidget(self.overall_label)
+
+        self.tabs = QTabWidget()
+        self.recent_table = self.make_table(["时间", "忍者", "对手", "秘卷", "结果"])
+        self.tabs.addTab(self.recent_table, "最近")
+        self.summary_tables = {}
+        for dimension, title, header in SUMMARY_TABS:
+            table = self.make_table([header, "场次", "胜", "负", "胜率"])
+            self.summary_tables[dimension] = table
+            self.tabs.addTab(table, title)
+        # 只刷新正在看的页
+        self.tabs.currentChanged.connect(self.refresh)
+        layout.addWidget(self.tabs)
+
+    def showEvent(self, event):
+        # 每次打开时补上其他地方记录的比赛和新添加的秘卷
+        self.match_log.sync()
+        self.update_scroll_choices()
+        self.refresh()
+        super().showEvent(event)
+
+    def make_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+
+    def update_scroll_choices(self):
+        current = self.scroll_combo.currentText()
+        self.scroll_combo.clear()
+        self.scroll_combo.addItem("")
+        self.scroll_combo.addItems(self.ninja_data.load_scrolls())
+        self.scroll_combo.setCurrentText(current)
+
+    def set_scroll(self, name):
+        # 转盘停下后由主窗口调用
+        self.scroll_combo.setCurrentText(name)
+
+    def record_match(self, result):
+        name = canonical_name(self.ninja_input.text())
+        if not name:
+            QMessageBox.warning(self, "警告", "请输入使用的忍者")
+            return
+        self.match_log.record(name, result, self.opponent_combo.currentData(),
+                              self.scroll_combo.currentText().strip())
+        self.ninja_input.clear()
+        # 秘卷只用于这一场
+        self.scroll_combo.setCurrentText("")
+        self.refresh()
+
+    def refresh(self):
+        log = self.match_log
+        wins, losses = log.overall
+        self.overall_label.setText(f"共 {wins + losses} 场，胜 {wins} 负 {losses}，胜率 {win_rate_text(wins, losses)}")
+        index = self.tabs.currentIndex()
+        if index == 0:
+            rows = []
+            for match in log.recent(RECENT_LIMIT):
+                rows.append((datetime.fromtimestamp(match["time"]).strftime("%m-%d %H:%M"), match["ninja"],
+                             f"{match['opponent']}级", match["scroll"] or "-",
+                             "胜" if match["result"] == WIN else "负"))
+            self.fill_table(self.recent_table, rows)
+        else:
+            dimension = SUMMARY_TABS[index - 1][0]
+            rows = []
+            for value, wins, losses in log.summary(dimension):
+                if dimension == "opponent":
+                    value = f"{value}级"
+                rows.append((value or "（无）", wins + losses, wins, losses, win_rate_text(wins, losses)))
+            self.fill_table(self.summary_tables[dimension], rows)
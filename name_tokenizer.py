@@ -0,0 +1,153 @@
+import re
+from collections import Counter
+
+from utils import normalize_name
+
+# 批量粘贴的忍者名单切分规则：空白、中英文逗号、顿号、分号、竖线、斜杠都算分隔符
+NAME_SEPARATORS = " \t\r\n　,，、;；|/"
+SEPARATOR_RE = re.compile("[" + re.escape(NAME_SEPARATORS) + "]+")
+# 行首或名称前的序号：1. 1、 1) (1) （1） ① 等
+NUMBERING_RE = re.compile(r"^(?:[(（]\d+[)）]|\d+[)）.．:：]|[①-⑳])")
+MAX_NAME_LENGTH = 20
+
+
+def is_valid_name(name):
+    if len(name) > MAX_NAME_LENGTH:
+        return False
+    # 至少包含一个文字（汉字、字母或数字），纯标点视为无效
+    return any(ch.isalnum() for ch in name)
+
+
+def tokenize_line(line):
+    names = []
+    for token in SEPARATOR_RE.split(line):
+        # 单独的数字是 "1、xxx" 这类写法里的序号
+        if token.isdigit():
+            continue
+        token = NUMBERING_RE.sub("", token, count=1).strip()
+        if token:
+            names.append(token)
+    return names
+
+
+def iter_names(lines):
+    # 逐行切分，适合直接遍历文件或大段文本
+    for line in lines:
+        yield from tokenize_line(line)
+
+
+class IncrementalNameParser:
+    # 输入框每次变化时只重新切分改动过的行，行内再按名称比较，只查询改动过的名称，
+    # 并增量维护 新增/重复/无效 的计数
+    # existing_names 为已禁用忍者的规范化名称集合
+
+    def __init__(self, existing_names, canonicalize=None):
+        self.existing_names = existing_names
+        self.canonicalize = canonicalize or (lambda name: name)
+        self.lines = []
+        self.line_tokens = []  # 每行的 [(原文, 名称, 规范化名称或 None)]
+        self.counts = Counter()
+        self.new_count = 0
+        self.valid_count = 0
+        self.invalid_count = 0
+
+    def _parse_token(self, token):
+        if is_valid_name(token):
+            name = self.canonicalize(token)
+            return token, name, normalize_name(name)
+        return token, token, None
+
+    def _add(self, tokens):
+        for _, _, key in tokens:
+            if key is None:
+                self.invalid_count += 1
+                continue
+            self.valid_count += 1
+            if self.counts[key] == 0 and key not in self.existing_names:
+                self.new_count += 1
+            self.counts[key] += 1
+
+    def _remove(self, tokens):
+        for _, _, key in tokens:
+            if key is None:
+                self.invalid_count -= 1
+                continue
+            self.valid_count -= 1
+            self.counts[key] -= 1
+            if self.counts[key] == 0:
+                del self.counts[key]
+                if key not in self.existing_names:
+                    self.new_count -= 1
+
+    def update(self, text):
+        lines = text.split("\n")
+        old = self.lines
+
+        # 找出新旧文本首尾相同的行，只处理中间改动的部分
+        start = 0
+        limit = min(len(old), len(lines))
+        while start < limit and old[start] == lines[start]:
+            start += 1
+        old_end, new_end = len(old), len(lines)
+        while old_end > start and new_end > start and old[old_end - 1] == lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        # 在这几行里再比较名称原文：粘贴成一行的 "x、y、z" 改了末尾时，前面的名称不再重新查询
+        old_tokens = [token for tokens in self.line_tokens[start:old_end] for token in tokens]
+        new_lines = [tokenize_line(line) for line in lines[start:new_end]]
+        new_tokens = [token for tokens in new_lines for token in tokens]
+        prefix = 0
+        limit = min(len(old_tokens), len(new_tokens))
+        while prefix < limit and old_tokens[prefix][0] == new_tokens[prefix]:
+            prefix += 1
+        old_stop, new_stop = len(old_tokens), len(new_tokens)
+        while old_stop > prefix and new_stop > prefix and old_tokens[old_stop - 1][0] == new_tokens[new_stop - 1]:
+            old_stop -= 1
+            new_stop -= 1
+
+        self._remove(old_tokens[prefix:old_stop])
+        parsed = [self._parse_token(token) for token in new_tokens[prefix:new_stop]]
+        self._add(parsed)
+
+        # 按新的行重新分组
+        tokens = old_tokens[:prefix] + parsed + old_tokens[old_stop:]
+        changed = []
+        position = 0
+        for line_tokens in new_lines:
+            changed.append(tokens[position:position + len(line_tokens)])
+            position += len(line_tokens)
+
+        self.lines = lines
+        self.line_tokens[start:old_end] = changed
+
+    def stats(self):
+        return {
+            "new": self.new_count,
+            "duplicate": self.valid_count - self.new_count,
+            "invalid": self.invalid_count,
+        }
+
+    def new_names(self):
+        # 按出现顺序返回需要添加的名称（去重）
+        seen = set()
+        names = []
+        for tokens in self.line_tokens:
+            for _, name, key in tokens:
+                if key is None or key in seen or key in self.existing_names:
+                    continue
+                seen.add(key)
+                names.append(name)
+        return names
+
+    def duplicate_names(self):
+        names = []
+        seen = set()
+        for tokens in self.line_tokens:
+            for _, name, key in tokens:
+                if key is None:
+                    continue
+                if key in self.existing_names or key in seen:
+                    names.append(name)
+                seen.add(key)
+        return names
@@ -1,42 +1,55 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
+from theme import SELECTED_CARD_COLOR
+from thumbnail_cache import THUMB_SIZE, get_thumbnail_cache
 
 
 class NinjaCard(QWidget):
     deleted = Signal(str)
     checked = Signal(str, bool)  # 新增信号用于复选框状态
+    drag_requested = Signal(str)  # 按住拖动时由主窗口发起拖放
 
-    def __init__(self, name, rank, parent=None):
+    def __init__(self, name, rank, image_path=None, parent=None):
         super().__init__(parent)
         self.name = name
         self.rank = rank
+        self.image_path = image_path
         self.is_checkbox_mode = False
+        self.drag_start = None
+        self.selected = False
         self.setup_ui()
         self.setProperty("class", "NinjaCard")
+        # 让主题里 .NinjaCard 的背景能画出来
+        self.setAttribute(Qt.WA_StyledBackground)
 
     def setup_ui(self):
-        layout = QVBoxLayout(self)
+        outer_layout = QHBoxLayout(self)
+        outer_layout.setSpacing(2)
+        outer_layout.setContentsMargins(0, 0, 0, 0)
+
+        # 头像：先显示占位图，缩略图在后台加载好后再替换
+        self.portrait = None
+        if self.image_path:
+            self.portrait = QLabel()
+            self.portrait.setFixedSize(THUMB_SIZE, THUMB_SIZE)
+            self.portrait.setPixmap(get_thumbnail_cache().request(self.image_path, self))
+            outer_layout.addWidget(self.portrait)
+
+        layout = QVBoxLayout()
         layout.setSpacing(0)
         layout.setContentsMargins(0, 0, 0, 0)
-
-        # 顶部容器用于放置复选框和名称
-        top_container = QWidget()
-        top_layout = QHBoxLayout(top_container)
-        top_layout.setContentsMargins(0, 0, 0, 0)
-        top_layout.setSpacing(0)
+        outer_layout.addLayout(layout)
 
         # 复选框（初始隐藏）
         self.checkbox = QCheckBox()
         self.checkbox.setVisible(False)
         self.checkbox.setFixedSize(13, 13)  # 固定复选框大小
-        self.checkbox.stateChanged.connect(
-            lambda state: self.checked.emit(self.name, state == Qt.Checked)
-        )
+        self.checkbox.toggled.connect(self.on_checked)
 
         # 忍者名称
         name_label = QLabel(self.name)
-        name_label.setStyleSheet("font-size: 13px; font-weight : bold ;padding: 0px; margin: 0px;")
+        name_label.setObjectName("ninjaName")
         name_label.setFixedHeight(13)  # 固定高度
 
         # 创建一个水平布局容器专门用于复选框和名称
@@ -48,18 +61,53 @@ class NinjaCard(QWidget):
         checkbox_name_layout.addWidget(name_label)
         checkbox_name_layout.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
 
-        top_layout.addWidget(checkbox_name_container)
-        top_layout.setAlignment(checkbox_name_container, Qt.AlignLeft | Qt.AlignVCenter)
-
         # 删除按钮
         self.delete_btn = QPushButton("删除")
         self.delete_btn.setObjectName("deleteButton")
         self.delete_btn.setFixedHeight(16)  # 固定高度
-        self.delete_btn.clicked.connect(lambda: self.deleted.emit(self.name))
+        # 连接到方法而不是引用 self 的 lambda，否则删除后的卡片不会被释放
+        self.delete_btn.clicked.connect(self.delete_ninja)
 
-        layout.addWidget(top_container)
+        # 复选框和名称的容器直接放进卡片，不再外包一层只起对齐作用的容器：
+        # 每多一个控件，显示时就要多匹配一遍全局样式表
+        layout.addWidget(checkbox_name_container, 0, Qt.AlignLeft | Qt.AlignVCenter)
         layout.addWidget(self.delete_btn)
 
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_start = event.position().toPoint()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if (self.drag_start is not None and event.buttons() & Qt.LeftButton and
+                (event.position().toPoint() - self.drag_start).manhattanLength()
+                >= QApplication.startDragDistance()):
+            self.drag_start = None
+            self.drag_requested.emit(self.name)
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_start = None
+        super().mouseReleaseEvent(event)
+
+    def on_checked(self, checked):
+        # 勾选状态自己画，不用动态属性：重新 polish 会重设字体和调色板，
+        # 连带整个等级的流式布局重新排版
+        self.selected = checked
+        self.update()
+        self.checked.emit(self.name, checked)
+
+    def paintEvent(self, event):
+        if self.selected:
+            painter = QPainter(self)
+            painter.fillRect(event.rect(), QColor(SELECTED_CARD_COLOR))
+            painter.end()
+
+    def set_portrait(self, pixmap):
+        if self.portrait is not None:
+            self.portrait.setPixmap(pixmap)
+
     def set_checkbox_mode(self, enabled):
         self.is_checkbox_mode = enabled
         self.delete_btn.setVisible(not enabled)
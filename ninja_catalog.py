@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import struct
+import unicodedata
+
+# 随程序发布的忍者目录：catalog/ninjas.json 是可编辑的源文件，
+# catalog/ninjas.idx 是预先编译好的紧凑索引，运行时只读映射该索引
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog")
+SOURCE_FILE = os.path.join(CATALOG_DIR, "ninjas.json")
+INDEX_FILE = os.path.join(CATALOG_DIR, "ninjas.idx")
+
+# 索引格式（小端）：
+#   头部     magic(8) 忍者数 键数 等级区偏移 忍者表偏移 键表偏移 字符串区偏移
+#   等级区   以逗号分隔的等级名称
+#   忍者表   每项 名称偏移(u32) 名称长度(u16) 等级序号(u8) 保留(u8)
+#   键表     按规范化键排序，每项 键偏移(u32) 键长度(u16) 保留(u16) 忍者序号(u32)
+#   字符串区 UTF-8 文本
+MAGIC = b"NJCAT\x00\x01\x00"
+HEADER = struct.Struct("<8s6I")
+ENTRY = struct.Struct("<IHBx")
+KEY = struct.Struct("<IH2xI")
+
+
+def catalog_key(name):
+    # 全角/半角、大小写和首尾空白都不影响匹配
+    return unicodedata.normalize("NFKC", name).strip().lower()
+
+
+def build_index(source_file=SOURCE_FILE, index_file=INDEX_FILE):
+    with open(source_file, 'r', encoding='utf-8') as f:
+        source = json.load(f)
+
+    ranks = source["ranks"]
+    strings = bytearray()
+    offsets = {}
+
+    def add_string(text):
+        if text not in offsets:
+            offsets[text] = len(strings)
+            strings.extend(text.encode('utf-8'))
+        return offsets[text], len(text.encode('utf-8'))
+
+    entries = []
+    keys = {}
+    for ninja in source["ninjas"]:
+        entry_id = len(entries)
+        name_off, name_len = add_string(ninja["name"])
+        entries.append(ENTRY.pack(name_off, name_len, ranks.index(ninja["rank"])))
+        for alias in [ninja["name"]] + ninja.get("aliases", []):
+            # 同一个键只保留第一个忍者
+            keys.setdefault(catalog_key(alias).encode('utf-8'), entry_id)
+
+    key_table = bytearray()
+    for key in sorted(keys):
+        key_off, key_len = add_string(key.decode('utf-8'))
+        key_table.extend(KEY.pack(key_off, key_len, keys[key]))
+
+    rank_blob = ",".join(ranks).encode('utf-8')
+    rank_offset = HEADER.size
+    entries_offset = rank_offset + len(rank_blob)
+    keys_offset = entries_offset + ENTRY.size * len(entries)
+    strings_offset = keys_offset + len(key_table)
+
+    with open(index_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), len(keys), rank_offset,
+                            entries_offset, keys_offset, strings_offset))
+        f.write(rank_blob)
+        f.write(b"".join(entries))
+        f.write(key_table)
+        f.write(strings)
+
+
+class NinjaCatalog:
+    # 按需打开并内存映射索引文件，查找走键表二分，不把整个目录读进内存
+
+    def __init__(self, index_file=INDEX_FILE):
+        self.index_file = index_file
+        self._file = None
+        self._mm = None
+        self._ranks = []
+        self._entry_count = 0
+        self._key_count = 0
+
+    def _open(self):
+        if self._mm is not None:
+            return True
+        if not os.path.exists(self.index_file):
+            return False
+
+        self._file = open(self.index_file, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._entry_count, self._key_count, rank_offset, self._entries_offset,
+         self._keys_offset, self._strings_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            return False
+        self._ranks = self._mm[rank_offset:self._entries_offset].decode('utf-8').split(",")
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+        self._mm = None
+        self._file = None
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._mm[start:start + length]
+
+    def _key_at(self, index):
+        key_off, key_len, entry_id = KEY.unpack_from(self._mm, self._keys_offset + KEY.size * index)
+        return self._string(key_off, key_len), entry_id
+
+    def _entry(self, entry_id):
+        name_off, name_len, rank_code = ENTRY.unpack_from(
+            self._mm, self._entries_offset + ENTRY.size * entry_id)
+        return self._string(name_off, name_len).decode('utf-8'), self._ranks[rank_code]
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self._key_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __len__(self):
+        return self._entry_count if self._open() else 0
+
+    def ranks(self):
+        return list(self._ranks) if self._open() else []
+
+    def lookup(self, name):
+        # 名称或别名 -> (正式名称, 默认等级)，找不到返回 None
+        if not self._open():
+            return None
+        key = catalog_key(name).encode('utf-8')
+        if not key:
+            return None
+        index = self._lower_bound(key)
+        if index < self._key_count:
+            found, entry_id = self._key_at(index)
+            if found == key:
+                return self._entry(entry_id)
+        return None
+
+    def complete(self, prefix, limit=20):
+        # 前缀补全，结果为去重后的正式名称
+        if not self._open():
+            return []
+        key = catalog_key(prefix).encode('utf-8')
+        if not key:
+            return []
+
+        names = []
+        seen = set()
+        index = self._lower_bound(key)
+        while index < self._key_count and len(names) < limit:
+            found, entry_id = self._key_at(index)
+            if not found.startswith(key):
+                break
+            if entry_id not in seen:
+                seen.add(entry_id)
+                names.append(self._entry(entry_id)[0])
+            index += 1
+        return names
+
+    def names_by_rank(self):
+        if not self._open():
+            return {}
+        result = {rank: [] for rank in self._ranks}
+        for entry_id in range(self._entry_count):
+            name, rank = self._entry(entry_id)
+            result[rank].append(name)
+        return result
+
+
+_catalog = None
+
+
+def get_catalog():
+    # 全局共享一个目录实例，第一次查询时才真正打开索引
+    global _catalog
+    if _catalog is None:
+        _catalog = NinjaCatalog()
+    return _catalog
+
+
+def canonical_name(name):
+    # 别名或全角输入统一换成忍者目录里的正式名称
+    name = name.strip()
+    entry = get_catalog().lookup(name) if name else None
+    return entry[0] if entry else name
+
+
+if __name__ == '__main__':
+    build_index()
+    print(f"已生成 {INDEX_FILE}，共 {len(NinjaCatalog())} 个忍者")
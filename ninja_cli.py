@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import sys
+
+from ban_history import BanHistory
+from match_log import LOSS, WIN, MatchLog
+from name_tokenizer import iter_names
+from ninja_catalog import canonical_name
+from ninja_record import json_default
+from snapshot_ring import SnapshotRing
+from utils import DEFAULT_PROFILE, NinjaData, ban_key, load_settings
+
+# 不依赖 PySide6 的命令行工具，方便比赛脚本频繁调用
+#   python -m ninja_cli add 宇智波斑 --rank S
+#   python -m ninja_cli list --rank S --json
+
+
+def open_data(data_dir, profile=None):
+    # 不指定方案时使用界面当前选中的方案
+    if profile is None:
+        profile = load_settings(os.path.join(data_dir, "settings.json")).get("profile", DEFAULT_PROFILE)
+    ninja_data = NinjaData(
+        data_file=os.path.join(data_dir, "ninjas.json"),
+        rules_file=os.path.join(data_dir, "rules.txt"),
+        scrolls_file=os.path.join(data_dir, "scrolls.json"),
+        catalog_file=os.path.join(data_dir, "catalog.json"),
+        profiles_dir=os.path.join(data_dir, "profiles"),
+        profile=profile,
+        tiers_file=os.path.join(data_dir, "tiers.json"),
+    )
+    # 命令行的增删同样记入禁用历史和自动快照
+    snapshots = SnapshotRing(os.path.join(data_dir, "snapshots"))
+    snapshots.attach(ninja_data)
+    history = BanHistory(data_dir)
+    history.attach(ninja_data)
+    return ninja_data, history, snapshots
+
+
+def add_names(ninja_data, names, rank):
+    # 与界面一致：换成目录里的正式名称，忽略已禁用和重复的名称
+    existing = ninja_data.banned_keys()
+    added = []
+    skipped = []
+    for name in names:
+        name = canonical_name(name)
+        key = ban_key(name)
+        if not key:
+            continue
+        if key in existing:
+            skipped.append(name)
+            continue
+        existing.add(key)
+        added.append(ninja_data.new_ninja(name, rank))
+    ninja_data.add_ninjas(added)
+    return {"added": [n["name"] for n in added], "skipped": skipped}
+
+
+def cmd_add(ninja_data, args):
+    return add_names(ninja_data, args.names, args.rank)
+
+
+def cmd_bulk_add(ninja_data, args):
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            names = list(iter_names(f))
+    else:
+        names = list(iter_names(sys.stdin))
+    return add_names(ninja_data, names, args.rank)
+
+
+def cmd_remove(ninja_data, args):
+    # 名单里存的可能是别名，删除实际存的记录
+    names = [ninja["name"] for ninja in ninja_data.find_banned(args.names)]
+    removed = ninja_data.delete_ninjas(names)
+    return {"removed": [n["name"] for n in removed]}
+
+
+def cmd_list(ninja_data, args):
+    return ninja_data.get_ninjas(args.rank)
+
+
+def cmd_search(ninja_data, args):
+    name = canonical_name(args.name)
+    found = ninja_data.find_banned([name])
+    return {"name": name, "banned": bool(found), "rank": found[0]["rank"] if found else None}
+
+
+def cmd_clear_rank(ninja_data, args):
+    removed = ninja_data.clear_rank(args.rank)
+    return {"removed": [n["name"] for n in removed]}
+
+
+def cmd_scroll(ninja_data, args):
+    if args.action == "add":
+        ninja_data.add_scrolls([name.strip() for name in args.names])
+    elif args.action == "remove":
+        ninja_data.remove_scrolls([name.strip() for name in args.names])
+    return ninja_data.load_scrolls()
+
+
+def cmd_stats(ninja_data, args):
+    history = args.history
+    return {
+        "top": [{"name": name, "rank": rank, "bans": bans, "unbans": unbans}
+                for name, rank, bans, unbans in history.top_ninjas(args.limit, args.rank)],
+        "ranks": history.rank_totals(),
+        "weeks": dict(history.weekly(args.weeks)),
+    }
+
+
+def cmd_match(ninja_data, args):
+    match_log = MatchLog(os.path.join(args.data_dir, "matches"))
+    try:
+        if args.action == "add":
+            if not args.name or args.result is None or args.rank is None:
+                raise SystemExit("记录比赛需要忍者名称、--win 或 --loss，以及 --vs 对手等级")
+            match_log.record(canonical_name(args.name), args.result, args.rank, (args.scroll or "").strip())
+        return {
+            "overall": match_log.overall,
+            "by": args.by,
+            "summary": match_log.summary(args.by),
+        }
+    finally:
+        match_log.close()
+
+
+def print_text(command, result):
+    if command == "list":
+        for ninja in result:
+            print(f"{ninja['rank']}\t{ninja['name']}")
+    elif command == "search":
+        status = f"已被禁用（{result['rank']}级）" if result["banned"] else "未被禁用"
+        print(f"忍者「{result['name']}」{status}")
+    elif command == "stats":
+        for item in result["top"]:
+            print(f"{item['rank']}\t{item['name']}\t禁用 {item['bans']} 次")
+        for week, counts in result["weeks"].items():
+            print(f"{week}\t" + "  ".join(f"{rank}:{count}" for rank, count in sorted(counts.items())))
+    elif command == "scroll":
+        for name in result:
+            print(name)
+    elif command == "match":
+        wins, losses = result["overall"]
+        print(f"共 {wins + losses} 场，胜 {wins} 负 {losses}")
+        for value, wins, losses in result["summary"]:
+            print(f"{value or '（无）'}\t{wins + losses} 场\t胜 {wins}\t胜率 {wins / (wins + losses) * 100:.1f}%")
+    else:
+        for key, names in result.items():
+            if key == "skipped" and not names:
+                continue
+            label = {"added": "已添加", "skipped": "已存在", "removed": "已删除"}[key]
+            print(f"{label} {len(names)} 个" + (f"：{'、'.join(names)}" if names else ""))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ninja_cli", description="火影忍者段位赛禁用名单管理")
+    parser.add_argument("--data-dir", default="data", help="数据目录，默认 data")
+    parser.add_argument("--profile", "-p", help="禁用名单方案，默认使用界面当前的方案")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="添加忍者")
+    add.add_argument("names", nargs="+")
+    add.add_argument("--rank", "-r", required=True)
+    add.set_defaults(func=cmd_add)
+
+    bulk_add = commands.add_parser("bulk-add", help="从文件或标准输入批量添加")
+    bulk_add.add_argument("--rank", "-r", required=True)
+    bulk_add.add_argument("--file", "-f")
+    bulk_add.set_defaults(func=cmd_bulk_add)
+
+    remove = commands.add_parser("remove", help="删除忍者")
+    remove.add_argument("names", nargs="+")
+    remove.set_defaults(func=cmd_remove)
+
+    list_cmd = commands.add_parser("list", help="列出禁用的忍者")
+    list_cmd.add_argument("--rank", "-r")
+    list_cmd.set_defaults(func=cmd_list)
+
+    search = commands.add_parser("search", help="查询忍者是否被禁用")
+    search.add_argument("name")
+    search.set_defaults(func=cmd_search)
+
+    clear_rank = commands.add_parser("clear-rank", help="清空某个等级")
+    clear_rank.add_argument("rank")
+    clear_rank.set_defaults(func=cmd_clear_rank)
+
+    scroll = commands.add_parser("scroll", help="管理转盘秘卷")
+    scroll.add_argument("action", choices=["list", "add", "remove"])
+    scroll.add_argument("names", nargs="*")
+    scroll.set_defaults(func=cmd_scroll)
+
+    match = commands.add_parser("match", help="记录比赛结果或查看胜率")
+    match.add_argument("action", choices=["add", "stats"])
+    match.add_argument("name", nargs="?", help="使用的忍者（add 时必填）")
+    result = match.add_mutually_exclusive_group()
+    result.add_argument("--win", dest="result", action="store_const", const=WIN)
+    result.add_argument("--loss", dest="result", action="store_const", const=LOSS)
+    # 与其他命令的 --rank 一样会检查等级是否存在
+    match.add_argument("--vs", dest="rank", help="对手等级")
+    match.add_argument("--scroll", help="转盘转出的秘卷")
+    match.add_argument("--by", choices=["ninja", "opponent", "scroll"], default="ninja", help="汇总维度，默认按忍者")
+    match.set_defaults(func=cmd_match)
+
+    stats = commands.add_parser("stats", help="禁用历史统计")
+    stats.add_argument("--rank", "-r")
+    stats.add_argument("--limit", type=int, default=20)
+    stats.add_argument("--weeks", type=int, default=8)
+    stats.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ninja_data, history, snapshots = open_data(args.data_dir, args.profile)
+    try:
+        if args.profile is not None and ninja_data.profile != args.profile:
+            print(f"方案不存在：{args.profile}", file=sys.stderr)
+            return 1
+        # 等级由 data 目录中的配置决定，打开数据后再检查
+        if getattr(args, "rank", None) and args.rank not in ninja_data.ranks():
+            print(f"等级不存在：{args.rank}（可选：{'、'.join(ninja_data.ranks())}）", file=sys.stderr)
+            return 1
+        args.history = history
+        result = args.func(ninja_data, args)
+    finally:
+        history.close()
+        snapshots.close()
+    for path, backup, restored in ninja_data.recovered:
+        print(f"{path} 已损坏（保留为 {backup}），{'已从快照恢复' if restored else '没有可用的快照'}",
+              file=sys.stderr)
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, default=json_default)
+        sys.stdout.write("\n")
+    else:
+        print_text(args.command, result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,33 @@
+import json
 import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
 
+import roster_io
+from ban_history import BanHistory
+from board_export import BoardExporter, board_snapshot
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
+from shiboken6 import delete
+from catalog_completer import CompletingTextEdit, attach_line_edit_completer
+from diagnostics import DiagnosticsDialog
 from ninja_card import NinjaCard
+from name_tokenizer import IncrementalNameParser, iter_names
+from ninja_catalog import canonical_name, get_catalog
+from ninja_picker import NinjaPicker
+from match_log import MatchLog
+from match_panel import MatchPanel
+from rank_counters import RankCounters
+from overlay_server import DEFAULT_PORT, OverlayFeed, OverlayServer
+from presentation import PresentationWindow
 from scroll_wheel import ScrollWheel
-from utils import NinjaData
+from session_recorder import SessionRecorder, recorded
+from snapshot_ring import SnapshotRing
+from theme import apply_theme, set_state
+from undo_history import UndoHistory
+from utils import DEFAULT_PROFILE, NinjaData, ban_key, is_valid_profile_name, load_settings, save_settings
 
 
 class QFlowLayout(QLayout):
@@ -14,7 +36,8 @@ class QFlowLayout(QLayout):
         self.itemList = []
         self.margin = margin
         self.spacing = spacing
-
+        # 宽度 -> 高度，布局一次查询很多次，内容变化前结果不变
+        self._height_cache = {}
 
     def __del__(self):
         item = self.takeAt(0)
@@ -37,6 +60,26 @@ class QFlowLayout(QLayout):
             return self.itemList.pop(index)
         return None
 
+    def removeWidgets(self, widgets):
+        # QLayout.removeWidget 每移除一个都要经 itemAt 从头查找，批量移除时只过滤一遍列表
+        widgets = set(widgets)
+        kept = []
+        for item in self.itemList:
+            widget = item.widget()
+            if widget in widgets:
+                # 清掉标记后再 addWidget 到别的区域时，Qt 不会再到这里逐项查找它
+                widget.setAttribute(Qt.WA_LaidOut, False)
+                delete(item)
+            else:
+                kept.append(item)
+        self.itemList = kept
+        self.invalidate()
+
+    def insertWidget(self, index, widget):
+        # addWidget 追加到末尾后再挪到 index
+        self.addWidget(widget)
+        self.itemList.insert(index, self.itemList.pop())
+
     def expandingDirections(self):
         return Qt.Orientations(Qt.Orientation(0))
 
@@ -44,8 +87,15 @@ class QFlowLayout(QLayout):
         return True
 
     def heightForWidth(self, width):
-        height = self.doLayout(QRect(0, 0, width, 0), True)
-        return height
+        if width not in self._height_cache:
+            self._height_cache[width] = self.doLayout(QRect(0, 0, width, 0), True)
+        return self._height_cache[width]
+
+    def invalidate(self):
+        # 增删项目或项目大小变化时 Qt 会调用这里；布局暂停期间沿用旧高度，恢复时再统一重算
+        if self.isEnabled():
+            self._height_cache.clear()
+        super().invalidate()
 
     def setGeometry(self, rect):
         super().setGeometry(rect)
@@ -67,79 +117,257 @@ class QFlowLayout(QLayout):
         lineHeight = 0
 
         for item in self.itemList:
-            widget = item.widget()
+            size = item.sizeHint()
             spaceX = self.spacing
             spaceY = self.spacing
-            nextX = x + item.sizeHint().width() + spaceX
+            nextX = x + size.width() + spaceX
             if nextX - spaceX > rect.right() and lineHeight > 0:
                 x = rect.x() + self.margin
                 y = y + lineHeight + spaceY
-                nextX = x + item.sizeHint().width() + spaceX
+                nextX = x + size.width() + spaceX
                 lineHeight = 0
 
             if not testOnly:
-                item.setGeometry(QRect(QPoint(x, y), item.sizeHint()))
+                item.setGeometry(QRect(QPoint(x, y), size))
 
             x = nextX
-            lineHeight = max(lineHeight, item.sizeHint().height())
+            lineHeight = max(lineHeight, size.height())
 
         return y + lineHeight - rect.y() + self.margin
 
 
+@contextmanager
+def paused_layouts(layouts):
+    # 一次加入、移走很多项目时暂停这些布局：可见区域里每显示一个项目
+    # Qt 都会重新排列整个区域，批量操作就成了平方级；结束后每个布局只重排一次
+    layouts = list(layouts)
+    for layout in layouts:
+        layout.setEnabled(False)
+    try:
+        yield
+    finally:
+        for layout in layouts:
+            layout.setEnabled(True)
+            layout.invalidate()
+
+
 # 添加秘卷项组件v
 class ScrollItem(QWidget):
     deleted = Signal(str)
 
     def __init__(self, name, parent=None):
         super().__init__(parent)
+        self.name = name
         layout = QVBoxLayout(self)
         layout.setSpacing(4)
         layout.setContentsMargins(8, 8, 8, 8)
 
         # 秘卷名称
         name_label = QLabel(name)
-        name_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        name_label.setObjectName("scrollName")
 
         # 删除按钮
         delete_btn = QPushButton("删除")
         delete_btn.setObjectName("deleteButton")
-        delete_btn.clicked.connect(lambda: self.deleted.emit(name))
+        # 连接到方法而不是引用 self 的 lambda，否则删除后的秘卷项不会被释放
+        delete_btn.clicked.connect(self.delete_scroll)
 
         layout.addWidget(name_label)
         layout.addWidget(delete_btn)
 
-        self.setStyleSheet("""
-            ScrollItem {
-                background-color: white;
-                border-radius: 6px;
-                border: 1px solid #ddd;
-            }
-            ScrollItem:hover {
-                border-color: #2196F3;
-            }
-        """)
+    def delete_scroll(self):
+        self.deleted.emit(self.name)
+
+
+# 规则输入停顿这么多毫秒后才保存，连续输入只加锁写一次文件
+RULES_SAVE_DELAY = 400
+
+# 拖放忍者卡片时使用的 MIME 类型，内容为名称列表的 JSON
+NINJA_MIME = "application/x-ninja-names"
+
+# 展开折叠的等级区域时分批创建卡片，界面在重建期间保持响应。每批至少用 CARD_BUILD_BUDGET 秒；
+# 区域越大每批之后重新排版越慢，每批再多用与上一批排版、绘制相同的时间（最多 CARD_BUILD_MAX_BUDGET 秒），
+# 批数不会随卡片数一起增长
+CARD_BUILD_BUDGET = 0.008
+CARD_BUILD_MAX_BUDGET = 0.05
+
+
+# 接收拖入忍者卡片的等级区域
+class RankDropArea(QWidget):
+    ninjas_dropped = Signal(list, str)
+
+    def __init__(self, rank, parent=None):
+        super().__init__(parent)
+        self.rank = rank
+        self.setAcceptDrops(True)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasFormat(NINJA_MIME):
+            event.acceptProposedAction()
+
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasFormat(NINJA_MIME):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        names = json.loads(bytes(event.mimeData().data(NINJA_MIME)).decode('utf-8'))
+        event.acceptProposedAction()
+        self.ninjas_dropped.emit(names, self.rank)
+
+
+# 在后台线程执行耗时任务，task(progress, cancelled) 的返回值通过 succeeded 发回
+class TaskWorker(QThread):
+    progress = Signal(int)  # 百分比
+    succeeded = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+
+    def run(self):
+        try:
+            result = self.task(self.report_progress, self.isInterruptionRequested)
+        except roster_io.RosterCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
+
+    def report_progress(self, done, total):
+        if not self.isInterruptionRequested():
+            self.progress.emit(int(done * 100 / total) if total else 100)
+
+
+# 批量添加时超过这个长度的文本放到后台线程解析
+LARGE_PASTE_CHARS = 20000
+
+
+# 批量添加输入框的实时预览：输入停顿后增量解析，大段文本在后台线程解析
+class BatchParsePreview(QObject):
+    updated = Signal(dict)
+
+    def __init__(self, parser, text_source, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.text_source = text_source
+        self.worker = None
+        self.pending = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(150)
+        self.timer.timeout.connect(self.refresh)
+
+    def schedule(self):
+        self.timer.start()
+
+    def refresh(self):
+        # 后台解析还没结束时先记下，结束后再解析最新文本
+        if self.worker is not None:
+            self.pending = True
+            return
+
+        text = self.text_source()
+        if len(text) < LARGE_PASTE_CHARS:
+            self.parser.update(text)
+            self.updated.emit(self.parser.stats())
+            return
+
+        self.worker = TaskWorker(lambda progress, cancelled: self.parser.update(text), self)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def on_worker_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.updated.emit(self.parser.stats())
+        if self.pending:
+            self.pending = False
+            self.refresh()
+
+    def finish(self):
+        # 确认添加前同步到最新文本
+        self.timer.stop()
+        self.pending = False
+        if self.worker is not None:
+            self.worker.wait()
+        self.parser.update(self.text_source())
+        return self.parser
 
 
 class NinjaManager(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self.ninja_data = NinjaData()
+        self.settings = load_settings()
+        self.ninja_data = NinjaData(profile=self.settings.get("profile", DEFAULT_PROFILE))
+        # 先接上快照，之后第一次读取名单时如发现文件损坏可以从快照恢复
+        self.snapshots = SnapshotRing()
+        self.snapshots.attach(self.ninja_data)
+        self.ninja_picker = NinjaPicker(self.ninja_data)
+        self.ban_history = BanHistory()
+        self.ban_history.attach(self.ninja_data)
+        self.match_log = MatchLog()
+        self.match_panel = None  # 第一次打开比赛记录时创建
+        self.presentation = None  # 副屏演示窗口
+        self.rank_counters = RankCounters(self.ninja_data, self.ninja_data.ranks())
+        self.undo_history = UndoHistory(self.ninja_data, self)
+        self.board_exporter = BoardExporter()
+        self.overlay_server = None
+        self.last_spin_metrics = None  # 上一次转盘转动的帧节奏统计，诊断对话框里显示
         self.selected_ninjas = set()
+        self.ninja_cards = {}  # 名称 -> NinjaCard
+        # 折叠的等级只保留标题栏和数量，不创建卡片
+        self.collapsed_ranks = set(self.settings.get("collapsed_ranks", []))
+        self.card_builds = {}  # 正在展开的等级 -> {名称: 记录}，还没创建卡片的忍者
+        self.card_chunk_end = None  # 上一批卡片建完的时间
+        self.scroll_items = {}  # 秘卷名称 -> ScrollItem
+        self.wheel_shows_scrolls = True  # 转盘上是秘卷还是随机抽取的忍者
+        self.session_recorder = None  # 工具菜单中开启录制时才创建
 
         # 检查并创建checkmark.svg文件
         self.ensure_checkmark_file()
 
         self.setup_ui()
+        self.card_build_timer = QTimer(self)
+        self.card_build_timer.setInterval(0)
+        self.card_build_timer.timeout.connect(self.build_card_chunk)
         self.load_ninjas()
         self.load_scrolls()
 
+        # 计数器在前面已注册监听，这里读到的总是更新后的数字
+        self.ninja_data.add_listener(self.on_rank_counts_changed)
+        self.ninja_data.add_listener(self.on_roster_changed)
+        self.ninja_data.add_listener(self.on_profile_switched)
+        self.update_rank_summary()
+
+        # 其他实例（或命令行工具）修改数据目录时自动刷新，连续的修改合并成一次
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(300)
+        self.reload_timer.timeout.connect(self.reload_external_changes)
+        self.data_watcher = QFileSystemWatcher(self)
+        self.data_watcher.fileChanged.connect(self.reload_timer.start)
+        self.data_watcher.directoryChanged.connect(self.reload_timer.start)
+        self.watch_data_files()
+
+        # 变化不多时也定期检查一次是否该拍快照
+        self.snapshot_timer = QTimer(self)
+        self.snapshot_timer.setInterval(60 * 1000)
+        self.snapshot_timer.timeout.connect(self.snapshots.maybe_snapshot)
+        self.snapshot_timer.start()
+        if self.ninja_data.recovered:
+            QTimer.singleShot(0, self.show_recovered_files)
+
         # 自动触发所有等级的批量删除按钮
         QTimer.singleShot(300, self.auto_trigger_batch_delete)
 
     def auto_trigger_batch_delete(self):
         # 为每个等级触发批量删除按钮的点击事件
-        for rank in ['S', 'A', 'B', 'C']:
+        for rank in self.ninja_data.ranks():
             self.toggle_batch_delete_mode(rank)
 
     def ensure_checkmark_file(self):
@@ -156,6 +384,8 @@ class NinjaManager(QMainWindow):
         self.setWindowTitle("火影忍者段位赛挑战管理器 by宇宙暴龙大皇帝无敌奇拉比公式大王")
         self.setMinimumSize(1200, 800)
 
+        self.create_menu_bar()
+
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
         main_layout = QHBoxLayout(main_widget)
@@ -170,39 +400,85 @@ class NinjaManager(QMainWindow):
         splitter.setStretchFactor(1, 3)
 
         main_layout.addWidget(splitter)
-        self.load_stylesheet()
+        apply_theme(QApplication.instance(), self.ninja_data.tiers)
+
+    def create_menu_bar(self):
+        file_menu = self.menuBar().addMenu("文件")
+
+        import_action = file_menu.addAction("导入禁用名单...")
+        import_action.triggered.connect(self.import_roster_file)
+
+        export_action = file_menu.addAction("导出禁用名单...")
+        export_action.triggered.connect(self.export_roster_file)
+
+        file_menu.addSeparator()
+
+        export_board_action = file_menu.addAction("导出禁用名单图片...")
+        export_board_action.triggered.connect(self.export_board_image)
+
+        file_menu.addSeparator()
+
+        snapshot_action = file_menu.addAction("从快照恢复...")
+        snapshot_action.triggered.connect(self.show_snapshots)
+
+        edit_menu = self.menuBar().addMenu("编辑")
+
+        # 不用 QUndoStack 自带的动作，撤销和重做要经过 undo()/redo() 才会被录制
+        self.undo_action = edit_menu.addAction("撤销")
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        # 先保存还没写入的规则输入（单独录制），再撤销
+        self.undo_action.triggered.connect(self.save_rules)
+        self.undo_action.triggered.connect(self.undo)
+
+        self.redo_action = edit_menu.addAction("重做")
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.save_rules)
+        self.redo_action.triggered.connect(self.redo)
+
+        self.undo_history.stack.indexChanged.connect(self.update_undo_actions)
+        self.undo_history.stack.cleanChanged.connect(self.update_undo_actions)
+        self.update_undo_actions()
+
+        self.profile_menu = self.menuBar().addMenu("方案")
+        self.update_profile_menu()
+
+        tools_menu = self.menuBar().addMenu("工具")
+
+        self.overlay_action = tools_menu.addAction(f"直播叠加层数据服务（端口 {DEFAULT_PORT}）")
+        self.overlay_action.setCheckable(True)
+        self.overlay_action.toggled.connect(self.toggle_overlay_server)
+
+        stats_action = tools_menu.addAction("禁用统计...")
+        stats_action.triggered.connect(self.show_ban_stats)
+
+        match_action = tools_menu.addAction("比赛记录...")
+        match_action.triggered.connect(self.show_match_panel)
+
+        self.presentation_action = tools_menu.addAction("演示窗口（副屏，Esc 关闭）")
+        self.presentation_action.setCheckable(True)
+        self.presentation_action.toggled.connect(self.toggle_presentation)
+
+        self.wheel_quality_action = tools_menu.addAction("转盘转得快时降低画质")
+        self.wheel_quality_action.setCheckable(True)
+        self.wheel_quality_action.setChecked(self.settings.get("adaptive_wheel_quality", True))
+        self.wheel_quality_action.toggled.connect(self.set_wheel_adaptive_quality)
+
+        tools_menu.addSeparator()
+
+        self.record_action = tools_menu.addAction("录制操作（用于性能回放）")
+        self.record_action.setCheckable(True)
+        self.record_action.toggled.connect(self.toggle_session_recording)
+
+        # 诊断对话框不放在菜单里，只能用快捷键打开
+        diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+F12"), self)
+        diagnostics_shortcut.activated.connect(self.show_diagnostics)
 
     def create_left_panel(self):
         # 创建滚动区域作为最外层容器
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        scroll.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: transparent;
-            }
-            QScrollBar:vertical {
-                border: none;
-                background: #f0f0f0;
-                width: 8px;
-                border-radius: 4px;
-            }
-            QScrollBar::handle:vertical {
-                background: #cdcdcd;
-                min-height: 20px;
-                border-radius: 4px;
-            }
-            QScrollBar::handle:vertical:hover {
-                background: #b8b8b8;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                height: 0px;
-            }
-            QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {
-                background: none;
-            }
-        """)
+        scroll.setObjectName("leftScroll")
 
         # 创建内容面板
         panel = QWidget()
@@ -230,7 +506,13 @@ class NinjaManager(QMainWindow):
         self.rules_text.setFont(font)
 
         self.rules_text.setText(self.ninja_data.load_rules())
-        self.rules_text.textChanged.connect(self.save_rules)
+        # 每次按键都保存会加锁、重读分片、落盘并广播整段文本，停顿后再保存；失去焦点时立即保存
+        self.rules_save_timer = QTimer(self)
+        self.rules_save_timer.setSingleShot(True)
+        self.rules_save_timer.setInterval(RULES_SAVE_DELAY)
+        self.rules_save_timer.timeout.connect(self.save_rules)
+        self.rules_text.textChanged.connect(self.rules_save_timer.start)
+        self.rules_text.installEventFilter(self)
 
         rules_layout.addWidget(rules_label)
         rules_layout.addWidget(self.rules_text)
@@ -246,26 +528,26 @@ class NinjaManager(QMainWindow):
 
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入忍者名称...")
+        self.search_completer = attach_line_edit_completer(self.search_input)
 
         search_btn = QPushButton("搜索")
         search_btn.clicked.connect(self.search_ninja)
 
+        # 按忍者目录里的默认等级添加
+        default_add_btn = QPushButton("添加")
+        default_add_btn.clicked.connect(self.quick_add_default_rank)
+
         clear_btn = QPushButton("清空")
         clear_btn.clicked.connect(self.clear_search)
 
         search_header_layout.addWidget(self.search_input)
         search_header_layout.addWidget(search_btn)
+        search_header_layout.addWidget(default_add_btn)
         search_header_layout.addWidget(clear_btn)
 
         self.search_result_label = QLabel()
+        self.search_result_label.setObjectName("searchResult")
         self.search_result_label.setWordWrap(True)
-        self.search_result_label.setStyleSheet("""
-            QLabel {
-                padding: 8px;
-                border-radius: 4px;
-                font-size: 13px;
-            }
-        """)
         self.search_result_label.hide()
 
         search_layout.addWidget(search_header)
@@ -281,7 +563,7 @@ class NinjaManager(QMainWindow):
         rank_title.setObjectName("rankTitle")
         rank_layout.addWidget(rank_title)
 
-        for rank in ['S', 'A', 'B', 'C']:
+        for rank in self.ninja_data.ranks():
             rank_group = QWidget()
             rank_group_layout = QHBoxLayout(rank_group)
             rank_group_layout.setContentsMargins(0, 0, 0, 0)
@@ -325,8 +607,35 @@ class NinjaManager(QMainWindow):
         add_scroll_btn = QPushButton("添加")
         add_scroll_btn.clicked.connect(self.add_scroll)
 
+        batch_scroll_btn = QPushButton("批量添加")
+        batch_scroll_btn.clicked.connect(self.batch_add_scrolls)
+
         input_layout.addWidget(self.scroll_input)
         input_layout.addWidget(add_scroll_btn)
+        input_layout.addWidget(batch_scroll_btn)
+
+        # 随机忍者区域（从忍者目录中排除已禁用的忍者）
+        picker_widget = QWidget()
+        picker_layout = QHBoxLayout(picker_widget)
+        picker_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.picker_rank_combo = QComboBox()
+        self.picker_rank_combo.addItems(self.ninja_data.ranks())
+
+        self.picker_count_spin = QSpinBox()
+        self.picker_count_spin.setRange(1, 50)
+        self.picker_count_spin.setValue(8)
+
+        random_ninja_btn = QPushButton("随机忍者")
+        random_ninja_btn.clicked.connect(self.load_random_ninjas)
+
+        scroll_items_btn = QPushButton("秘卷")
+        scroll_items_btn.clicked.connect(self.load_scrolls)
+
+        picker_layout.addWidget(self.picker_rank_combo)
+        picker_layout.addWidget(self.picker_count_spin)
+        picker_layout.addWidget(random_ninja_btn)
+        picker_layout.addWidget(scroll_items_btn)
 
         # 秘卷列表区域
         self.scroll_list_widget = QWidget()
@@ -336,14 +645,18 @@ class NinjaManager(QMainWindow):
 
         # 转盘
         self.scroll_wheel = ScrollWheel()
+        self.scroll_wheel.set_adaptive_quality(self.settings.get("adaptive_wheel_quality", True))
+        self.scroll_wheel.spin_metrics.connect(self.on_spin_metrics)
 
         # 转动按钮
         self.spin_btn = QPushButton("转动")
         self.spin_btn.setObjectName("spinButton")
-        self.spin_btn.clicked.connect(self.scroll_wheel.spin)
+        self.spin_btn.clicked.connect(self.spin_wheel)
+        self.scroll_wheel.spin_result.connect(self.on_spin_result)
 
         scroll_layout.addWidget(scroll_title)
         scroll_layout.addWidget(input_widget)
+        scroll_layout.addWidget(picker_widget)
         scroll_layout.addWidget(self.scroll_list_widget)
         scroll_layout.addWidget(self.scroll_wheel)
         scroll_layout.addWidget(self.spin_btn)
@@ -365,13 +678,15 @@ class NinjaManager(QMainWindow):
     # 修改 toggle_batch_delete_mode 方法，确保切换模式时重置全选按钮状态
     def toggle_batch_delete_mode(self, rank):
         layout = self.rank_areas[rank]
-        for i in range(layout.count()):
-            widget = layout.itemAt(i).widget()
-            if isinstance(widget, NinjaCard):
-                widget.set_checkbox_mode(True)
+        with self.batched_layouts([rank]):
+            for i in range(layout.count()):
+                widget = layout.itemAt(i).widget()
+                if isinstance(widget, NinjaCard):
+                    widget.set_checkbox_mode(True)
 
-        # 显示删除和全选按钮，并重置全选按钮状态
+        # 显示删除、移动和全选按钮，并重置全选按钮状态
         self.batch_delete_buttons[rank].show()
+        self.move_buttons[rank].show()
         select_all_btn = self.select_all_buttons[rank]
         select_all_btn.show()
         select_all_btn.setText("全选")
@@ -385,6 +700,11 @@ class NinjaManager(QMainWindow):
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
 
+        # 禁用总数汇总
+        self.summary_label = QLabel()
+        self.summary_label.setObjectName("summaryLabel")
+        container_layout.addWidget(self.summary_label)
+
         content_widget = QWidget()
         self.right_layout = QVBoxLayout(content_widget)
         self.right_layout.setSpacing(1)
@@ -394,10 +714,15 @@ class NinjaManager(QMainWindow):
         self.rank_containers = {}  # 存储每个等级的容器
         self.batch_delete_buttons = {}  # 存储每个等级的批量删除按钮
         self.select_all_buttons = {}  # 存储每个等级的全选按钮
+        self.rank_badges = {}  # 每个等级标题旁的数量标记
+        self.move_buttons = {}  # 每个等级的“移动选中”按钮
+        self.collapse_buttons = {}  # 每个等级标题栏的折叠按钮
+        self.rank_bodies = {}  # 等级 -> (卡片区域, 操作栏)，折叠时隐藏
 
-        for rank in ['S', 'A', 'B', 'C']:
-            rank_container = QWidget()
+        for rank in self.ninja_data.ranks():
+            rank_container = RankDropArea(rank)
             rank_container.setObjectName(f"rank_container_{rank}")
+            rank_container.ninjas_dropped.connect(self.move_ninjas)
             rank_layout = QVBoxLayout(rank_container)
 
             # 标题栏
@@ -405,8 +730,19 @@ class NinjaManager(QMainWindow):
             title_layout = QHBoxLayout(title_bar)
             title_layout.setContentsMargins(0, 0, 0, 0)
 
+            collapse_btn = QToolButton()
+            collapse_btn.setObjectName("collapseButton")
+            collapse_btn.setAutoRaise(True)
+            collapse_btn.clicked.connect(lambda checked, r=rank: self.toggle_rank_collapsed(r))
+            self.collapse_buttons[rank] = collapse_btn
+
             title = QLabel(f"{rank}级忍者")
             title.setObjectName("rankTitle")
+            title.setProperty("rank", rank)
+
+            badge = QLabel()
+            badge.setObjectName("rankBadge")
+            self.rank_badges[rank] = badge
 
             batch_delete_btn = QPushButton("批量删除")
             batch_delete_btn.setObjectName("batchClearButton")
@@ -419,7 +755,9 @@ class NinjaManager(QMainWindow):
             select_all_btn.clicked.connect(lambda checked, r=rank: self.toggle_select_all_ninjas(r))
             select_all_btn.hide()  # 初始隐藏全选按钮
 
+            title_layout.addWidget(collapse_btn)
             title_layout.addWidget(title)
+            title_layout.addWidget(badge)
             title_layout.addWidget(batch_delete_btn)
             title_layout.addWidget(select_all_btn)
             title_layout.addStretch()
@@ -441,11 +779,30 @@ class NinjaManager(QMainWindow):
             delete_selected_btn.clicked.connect(lambda checked, r=rank: self.delete_selected_ninjas(r))
             delete_selected_btn.hide()
 
+            # 把选中的忍者移动到其他等级
+            move_selected_btn = QPushButton("移动选中到")
+            move_selected_btn.setObjectName("moveSelectedButton")
+            move_menu = QMenu(move_selected_btn)
+            for target in self.ninja_data.ranks():
+                if target != rank:
+                    move_menu.addAction(f"{target}级", lambda r=rank, t=target: self.move_selected_ninjas(r, t))
+            move_selected_btn.setMenu(move_menu)
+            move_selected_btn.hide()
+
+            actions_bar = QWidget()
+            actions_layout = QHBoxLayout(actions_bar)
+            actions_layout.setContentsMargins(0, 0, 0, 0)
+            actions_layout.addWidget(delete_selected_btn)
+            actions_layout.addWidget(move_selected_btn)
+
             rank_layout.addWidget(cards_widget)
-            rank_layout.addWidget(delete_selected_btn)
+            rank_layout.addWidget(actions_bar)
+            self.rank_bodies[rank] = (cards_widget, actions_bar)
+            self.update_rank_section(rank)
 
             self.rank_containers[rank] = rank_container
             self.batch_delete_buttons[rank] = delete_selected_btn
+            self.move_buttons[rank] = move_selected_btn
             self.select_all_buttons[rank] = select_all_btn
             self.right_layout.addWidget(rank_container)
 
@@ -455,30 +812,341 @@ class NinjaManager(QMainWindow):
         return container
 
     def load_ninjas(self):
-        for rank_layout in self.rank_areas.values():
-            while rank_layout.count():
-                item = rank_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-
-        ninjas = self.ninja_data.get_ninjas()
-
-        rank_ninjas = {'S': [], 'A': [], 'B': [], 'C': []}
-        for ninja in ninjas:
+        # 与当前名单对比：只删除多出的卡片、创建缺少的卡片，其余卡片原样复用，
+        # 切换方案时也不会把所有卡片推倒重建
+        # 折叠的等级不在其中，移到折叠等级的忍者的卡片也会被删除
+        rank_ninjas = {rank: [] for rank in self.rank_areas if rank not in self.collapsed_ranks}
+        # 下面直接创建所有缺少的卡片，不再需要分批创建
+        self.card_builds.clear()
+        self.card_build_timer.stop()
+        for ninja in self.ninja_data.get_ninjas():
             if ninja['rank'] in rank_ninjas:
                 rank_ninjas[ninja['rank']].append(ninja)
 
-        for rank, ninjas in rank_ninjas.items():
+        wanted = {ninja["name"]: ninja for ninjas in rank_ninjas.values() for ninja in ninjas}
+        with self.batched_layouts(self.rank_areas):
+            stale = []
+            for name, card in self.ninja_cards.items():
+                ninja = wanted.get(name)
+                if ninja is None or ninja.get("image_path") != card.image_path:
+                    stale.append(card)
+            self.remove_cards(stale)
+
+            moves = []
+            for rank, ninjas in rank_ninjas.items():
+                for ninja in ninjas:
+                    card = self.ninja_cards.get(ninja["name"])
+                    if card is None:
+                        self.add_card(ninja)
+                    elif card.rank != rank:
+                        moves.append((card, rank))
+            self.move_cards(moves)
+
+            # 卡片顺序与名单一致，只调整布局项的顺序
+            for rank, ninjas in rank_ninjas.items():
+                order = {ninja["name"]: i for i, ninja in enumerate(ninjas)}
+                self.rank_areas[rank].itemList.sort(key=lambda item: order.get(item.widget().name, len(order)))
+
+    def batched_layouts(self, ranks):
+        return paused_layouts(self.rank_areas[rank] for rank in set(ranks) if rank in self.rank_areas)
+
+    def add_card(self, ninja):
+        rank = ninja["rank"]
+        card = NinjaCard(
+            ninja["name"],
+            rank,
+            ninja.get("image_path")
+        )
+        card.deleted.connect(self.delete_ninja)
+        card.drag_requested.connect(self.start_card_drag)
+        card.set_checkbox_mode(not self.batch_delete_buttons[rank].isHidden())
+        self.rank_areas[rank].addWidget(card)
+        # 立即显示，而不是等 Qt 在下一轮事件循环里逐张显示（那时布局已经恢复，每张都会重排一次）
+        card.show()
+        self.ninja_cards[ninja["name"]] = card
+        return card
+
+    def detach_cards(self, cards):
+        # 按等级分组，每个区域只过滤一遍布局项
+        rank_cards = {}
+        for card in cards:
+            rank_cards.setdefault(card.rank, []).append(card)
+        for rank, widgets in rank_cards.items():
+            self.rank_areas[rank].removeWidgets(widgets)
+
+    def remove_cards(self, cards):
+        self.detach_cards(cards)
+        for card in cards:
+            card.deleteLater()
+            del self.ninja_cards[card.name]
+
+    def move_cards(self, moves):
+        self.detach_cards([card for card, new_rank in moves])
+        for card, new_rank in moves:
+            card.rank = new_rank
+            card.checkbox.setChecked(False)
+            card.set_checkbox_mode(not self.batch_delete_buttons[new_rank].isHidden())
+            self.rank_areas[new_rank].addWidget(card)
+            # 重新挂到新区域后需要显式显示
+            card.show()
+
+    def has_cards(self, rank):
+        return rank in self.rank_areas and rank not in self.collapsed_ranks
+
+    def update_rank_section(self, rank):
+        collapsed = rank in self.collapsed_ranks
+        button = self.collapse_buttons[rank]
+        button.setArrowType(Qt.RightArrow if collapsed else Qt.DownArrow)
+        button.setToolTip("展开" if collapsed else "折叠")
+        for widget in self.rank_bodies[rank]:
+            widget.setVisible(not collapsed)
+
+    def toggle_rank_collapsed(self, rank):
+        self.set_rank_collapsed(rank, rank not in self.collapsed_ranks)
+
+    @recorded
+    def set_rank_collapsed(self, rank, collapsed):
+        if collapsed == (rank in self.collapsed_ranks):
+            return
+        if collapsed:
+            self.collapsed_ranks.add(rank)
+            self.card_builds.pop(rank, None)
+            self.release_rank_cards(rank)
+        else:
+            self.collapsed_ranks.discard(rank)
+            # 从内存中的名单分批重建，先显示标题栏和空区域
+            self.card_builds[rank] = {ninja["name"]: ninja for ninja in self.ninja_data.get_ninjas(rank)}
+            self.card_build_timer.start()
+        self.update_rank_section(rank)
+        self.settings["collapsed_ranks"] = [r for r in self.ninja_data.ranks() if r in self.collapsed_ranks]
+        save_settings(self.settings)
+
+    def release_rank_cards(self, rank):
+        # 折叠时释放整个区域的卡片；从末尾取出布局项，不用逐个 removeWidget 查找
+        layout = self.rank_areas[rank]
+        while layout.count():
+            card = layout.takeAt(layout.count() - 1).widget()
+            card.hide()
+            card.deleteLater()
+            del self.ninja_cards[card.name]
+        layout.invalidate()
+
+    def build_card_chunk(self):
+        # 每次只用一小段时间创建卡片，剩下的留到下一次事件循环
+        now = time.perf_counter()
+        budget = CARD_BUILD_BUDGET
+        if self.card_chunk_end is not None:
+            budget = min(max(budget, now - self.card_chunk_end), CARD_BUILD_MAX_BUDGET)
+        deadline = now + budget
+        while self.card_builds:
+            rank, pending = next(iter(self.card_builds.items()))
             layout = self.rank_areas[rank]
-            
-            for ninja in ninjas:
-                card = NinjaCard(
-                    ninja["name"],
-                    ninja["rank"]
-                )
-                card.deleted.connect(self.delete_ninja)
-                layout.addWidget(card)
+            with self.batched_layouts([rank]):
+                while pending and time.perf_counter() < deadline:
+                    name = next(iter(pending))
+                    ninja = pending.pop(name)
+                    if name not in self.ninja_cards:
+                        self.add_card(ninja)
+            if pending:
+                self.card_chunk_end = time.perf_counter()
+                return
+            del self.card_builds[rank]
+            # 重建期间新加入的卡片排在后面，建完后按名单重新排序
+            order = {ninja["name"]: i for i, ninja in enumerate(self.ninja_data.get_ninjas(rank))}
+            layout.itemList.sort(key=lambda item: order.get(item.widget().name, len(order)))
+            layout.invalidate()
+        self.card_build_timer.stop()
+        self.card_chunk_end = None
+
+    def selected_names(self, rank):
+        layout = self.rank_areas[rank]
+        names = []
+        for i in range(layout.count()):
+            widget = layout.itemAt(i).widget()
+            if isinstance(widget, NinjaCard) and widget.checkbox.isChecked():
+                names.append(widget.name)
+        return names
 
+    def start_card_drag(self, name):
+        card = self.ninja_cards.get(name)
+        if card is None:
+            return
+        # 拖动已勾选的卡片时带上同一等级里所有勾选的忍者
+        names = [name]
+        if card.checkbox.isChecked():
+            names = self.selected_names(card.rank)
+
+        mime = QMimeData()
+        mime.setData(NINJA_MIME, QByteArray(json.dumps(names, ensure_ascii=False).encode('utf-8')))
+        drag = QDrag(card)
+        drag.setMimeData(mime)
+        drag.setPixmap(card.grab())
+        drag.setHotSpot(QPoint(card.width() // 2, card.height() // 2))
+        drag.exec(Qt.MoveAction)
+
+    def move_selected_ninjas(self, rank, new_rank):
+        names = self.selected_names(rank)
+        if names:
+            self.move_ninjas(names, new_rank)
+
+    @recorded
+    def move_ninjas(self, names, new_rank):
+        # 卡片由 on_roster_changed 根据 move 事件搬到新的等级区域
+        self.ninja_data.move_ninjas(names, new_rank)
+
+    def on_roster_changed(self, event, payload):
+        # 本地操作、撤销/重做和其他实例的修改都走这里，只改动受影响的卡片
+        # 折叠的等级没有卡片；正在展开的等级里还没创建卡片的忍者要从待创建列表中同步增删
+        if event == "add":
+            with self.batched_layouts(ninja["rank"] for ninja in payload):
+                for ninja in payload:
+                    if ninja["name"] not in self.ninja_cards and self.has_cards(ninja["rank"]):
+                        self.add_card(ninja)
+        elif event == "delete":
+            removed = []
+            for ninja in payload:
+                self.card_builds.get(ninja["rank"], {}).pop(ninja["name"], None)
+                card = self.ninja_cards.get(ninja["name"])
+                if card is not None:
+                    removed.append(card)
+            with self.batched_layouts(card.rank for card in removed):
+                self.remove_cards(removed)
+        elif event == "move":
+            ranks = {rank for ninja, old_rank in payload for rank in (ninja["rank"], old_rank)}
+            with self.batched_layouts(ranks):
+                removed = []
+                moves = []
+                for ninja, old_rank in payload:
+                    self.card_builds.get(old_rank, {}).pop(ninja["name"], None)
+                    card = self.ninja_cards.get(ninja["name"])
+                    if not self.has_cards(ninja["rank"]):
+                        if card is not None:
+                            removed.append(card)
+                    elif card is None:
+                        self.add_card(ninja)
+                    elif card.rank == old_rank:
+                        moves.append((card, ninja["rank"]))
+                self.remove_cards(removed)
+                self.move_cards(moves)
+        elif event == "rules":
+            if self.rules_text.toPlainText() != payload:
+                cursor = self.rules_text.textCursor().position()
+                self.rules_text.blockSignals(True)
+                self.rules_text.setText(payload)
+                self.rules_text.blockSignals(False)
+                text_cursor = self.rules_text.textCursor()
+                text_cursor.setPosition(min(cursor, len(payload)))
+                self.rules_text.setTextCursor(text_cursor)
+        elif event == "scrolls":
+            self.update_scroll_items(payload)
+
+    def update_profile_menu(self):
+        self.profile_menu.clear()
+        group = QActionGroup(self.profile_menu)
+        for profile in self.ninja_data.list_profiles():
+            action = self.profile_menu.addAction(profile)
+            action.setCheckable(True)
+            action.setChecked(profile == self.ninja_data.profile)
+            # 还没保存的规则属于切换前的方案
+            action.triggered.connect(self.save_rules)
+            action.triggered.connect(lambda checked, p=profile: self.switch_profile(p))
+            group.addAction(action)
+
+        self.profile_menu.addSeparator()
+        new_action = self.profile_menu.addAction("新建方案...")
+        new_action.triggered.connect(self.create_profile)
+        delete_action = self.profile_menu.addAction("删除当前方案")
+        delete_action.setEnabled(self.ninja_data.profile != DEFAULT_PROFILE)
+        delete_action.triggered.connect(self.delete_current_profile)
+
+    @recorded
+    def switch_profile(self, profile):
+        if profile == self.ninja_data.profile:
+            return
+        self.ninja_data.switch_profile(profile)
+        if self.session_recorder is not None:
+            # 回放时没有这个方案的数据，记下切换后的完整数据
+            self.session_recorder.record_state(self.ninja_data, "profile")
+        self.settings["profile"] = profile
+        save_settings(self.settings)
+        self.update_profile_menu()
+
+    def create_profile(self):
+        self.save_rules()
+        name, ok = QInputDialog.getText(self, "新建方案", "方案名称：")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if not is_valid_profile_name(name) or name in self.ninja_data.list_profiles():
+            QMessageBox.warning(self, "警告", "方案名称无效或已存在")
+            return
+        copy_current = QMessageBox.question(
+            self, "新建方案", f"是否复制当前方案「{self.ninja_data.profile}」的禁用名单、规则和秘卷？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        ) == QMessageBox.Yes
+        self.ninja_data.create_profile(name, copy_current)
+        self.switch_profile(name)
+
+    def delete_current_profile(self):
+        self.save_rules()
+        profile = self.ninja_data.profile
+        reply = QMessageBox.question(self, "删除方案", f"确定要删除方案「{profile}」吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self.switch_profile(DEFAULT_PROFILE)
+        self.ninja_data.delete_profile(profile)
+        self.update_profile_menu()
+
+    def watch_data_files(self):
+        # 文件被替换后监视会失效，每次刷新后重新登记
+        paths = {os.path.abspath(path) for path in self.ninja_data.watched_paths()}
+        watched = set(self.data_watcher.files() + self.data_watcher.directories())
+        if watched - paths:
+            self.data_watcher.removePaths(list(watched - paths))
+        missing = [path for path in paths - watched if os.path.exists(path)]
+        if missing:
+            self.data_watcher.addPaths(missing)
+
+    def reload_external_changes(self):
+        # 只把差异通过事件应用到界面，自己写入时文件状态没变，不会有任何动作
+        if self.ninja_data.reload() and self.session_recorder is not None:
+            # 其他实例的修改无法通过重放操作得到，记下修改后的完整数据
+            self.session_recorder.record_state(self.ninja_data, "external")
+        self.watch_data_files()
+
+    def on_profile_switched(self, event, payload):
+        if event != "profile":
+            return
+        self.watch_data_files()
+        # 换规则文本时不触发保存
+        self.rules_text.blockSignals(True)
+        self.rules_text.setText(self.ninja_data.load_rules())
+        self.rules_text.blockSignals(False)
+        self.load_scrolls()
+        self.load_ninjas()
+
+    def on_rank_counts_changed(self, event, payload):
+        if event in ("add", "delete", "move", "profile"):
+            self.update_rank_summary()
+
+    def update_rank_summary(self):
+        # 只读计数器，不扫描名单
+        counters = self.rank_counters
+        for rank, badge in self.rank_badges.items():
+            text = f"{counters.count(rank)} / {counters.catalog_size(rank)}"
+            last = counters.last_added(rank)
+            if last:
+                text += f" · 最近：{last[0]}"
+            badge.setText(text)
+
+        summary = f"方案：{self.ninja_data.profile} · 已禁用 {counters.total()} 个忍者 / 目录共 {counters.catalog_size()} 个"
+        last = counters.last_added()
+        if last:
+            summary += f" · 最近添加：{last[0]}（{last[1]}级）"
+        self.summary_label.setText(summary)
+
+    @recorded
     def toggle_select_all_ninjas(self, rank):
         button = self.select_all_buttons[rank]
         is_all_selected = button.property("is_all_selected")
@@ -500,12 +1168,7 @@ class NinjaManager(QMainWindow):
 
     def delete_selected_ninjas(self, rank):
         layout = self.rank_areas[rank]
-        selected_names = []
-
-        for i in range(layout.count()):
-            widget = layout.itemAt(i).widget()
-            if isinstance(widget, NinjaCard) and widget.checkbox.isChecked():
-                selected_names.append(widget.name)
+        selected_names = self.selected_names(rank)
 
         if selected_names:
             reply = QMessageBox.question(
@@ -517,9 +1180,7 @@ class NinjaManager(QMainWindow):
             )
 
             if reply == QMessageBox.Yes:
-                for name in selected_names:
-                    self.ninja_data.delete_ninja(name)
-                self.load_ninjas()
+                self.delete_ninjas(selected_names)
 
                 # 调整该等级区域的高度
                 # container = self.rank_containers[rank]
@@ -531,15 +1192,17 @@ class NinjaManager(QMainWindow):
 
         # 恢复正常模式
         self.batch_delete_buttons[rank].hide()
+        self.move_buttons[rank].hide()
         select_all_btn = self.select_all_buttons[rank]
         select_all_btn.hide()
         select_all_btn.setText("全选")  # 重置按钮文字
         select_all_btn.setProperty("is_all_selected", False)  # 重置状态
         QTimer.singleShot(300, self.auto_trigger_batch_delete)
-        for i in range(layout.count()):
-            widget = layout.itemAt(i).widget()
-            if isinstance(widget, NinjaCard):
-                widget.set_checkbox_mode(False)
+        with self.batched_layouts([rank]):
+            for i in range(layout.count()):
+                widget = layout.itemAt(i).widget()
+                if isinstance(widget, NinjaCard):
+                    widget.set_checkbox_mode(False)
 
     def select_all_ninjas(self, rank):
         layout = self.rank_areas[rank]
@@ -555,20 +1218,16 @@ class NinjaManager(QMainWindow):
 
         name_input = QLineEdit()
         name_input.setPlaceholderText("输入忍者名称")
+        attach_line_edit_completer(name_input)
 
         confirm_btn = QPushButton("确认")
 
         def on_confirm():
-            name = name_input.text().strip()
+            name = self.canonical_name(name_input.text())
             if name:
-                # 检查是否已存在
-                ninjas = self.ninja_data.get_ninjas()
-                if any(ninja["name"].lower() == name.lower() for ninja in ninjas):
+                if not self.add_ninjas([name], rank):
                     QMessageBox.warning(dialog, "警告", "该忍者已被禁用")
                     return
-
-                self.ninja_data.add_ninja(name, rank)
-                self.load_ninjas()
                 dialog.accept()
             else:
                 QMessageBox.warning(dialog, "警告", "请输入忍者名称")
@@ -581,17 +1240,39 @@ class NinjaManager(QMainWindow):
 
         dialog.exec_()
 
-    def quick_add_ninja(self, rank):
+    def canonical_name(self, name):
+        return canonical_name(name)
+
+    def quick_add_default_rank(self):
         name = self.search_input.text().strip()
+        if not name:
+            QMessageBox.warning(self, "警告", "请输入忍者名称")
+            return
+
+        entry = get_catalog().lookup(name)
+        if not entry:
+            QMessageBox.warning(self, "警告", f"忍者目录中没有「{name}」，请在忍者等级中选择等级添加")
+            return
+
+        canonical, rank = entry
+        ranks = self.ninja_data.ranks()
+        if rank not in ranks:
+            # 自定义了等级时目录的默认等级可能不存在，直接添加会落进没有区域显示的分片，改为让用户选择
+            rank, ok = QInputDialog.getItem(self, "选择等级",
+                                            f"「{canonical}」的默认等级 {rank} 不在当前的等级中，请选择：",
+                                            ranks, 0, False)
+            if not ok:
+                return
+
+        self.quick_add_ninja(rank)
+
+    def quick_add_ninja(self, rank):
+        name = self.canonical_name(self.search_input.text())
         if name:
-            # 检查是否已存在
-            ninjas = self.ninja_data.get_ninjas()
-            if any(ninja["name"].lower() == name.lower() for ninja in ninjas):
+            if not self.add_ninjas([name], rank):
                 QMessageBox.warning(self, "警告", "该忍者已被禁用")
                 return
 
-            self.ninja_data.add_ninja(name, rank)
-            self.load_ninjas()
             self.search_input.clear()
             self.search_result_label.hide()
         else:
@@ -600,70 +1281,60 @@ class NinjaManager(QMainWindow):
     def batch_add_ninja(self, rank):
         dialog = QDialog(self)
         dialog.setWindowTitle(f"批量添加{rank}级忍者")
+        dialog.setObjectName("batchAddDialog")
         dialog.resize(600, 400)  # 设置更大的对话框尺寸
         layout = QVBoxLayout(dialog)
         layout.setSpacing(16)
         layout.setContentsMargins(24, 24, 24, 24)  # 增加边距
 
         # 说明文本
-        hint_label = QLabel("请输入忍者名称，用空格分隔多个忍者")
-        hint_label.setStyleSheet("""
-            QLabel {
-                font-size: 14px;
-                color: #666;
-                margin-bottom: 8px;
-            }
-        """)
-
-        # 输入框
-        name_input = QTextEdit()  # 使用QTextEdit替代QLineEdit
-        name_input.setPlaceholderText("例如：宇智波斑 千手柱间 宇智波鼬")
+        hint_label = QLabel("请输入忍者名称，可用空格、逗号、顿号或换行分隔，可带序号")
+        hint_label.setObjectName("hintLabel")
+
+        # 输入框（带忍者目录补全）
+        name_input = CompletingTextEdit()  # 使用QTextEdit替代QLineEdit
+        name_input.setPlaceholderText("例如：宇智波斑、千手柱间、宇智波鼬")
         name_input.setMinimumHeight(200)  # 设置最小高度
         font = name_input.font()
         font.setPointSize(14)  # 设置更大的字体
         name_input.setFont(font)
 
+        # 实时预览解析结果
+        preview_label = QLabel("新增 0 个，重复 0 个，无效 0 个")
+
+        # 旧数据里可能存的是别名，按正式名称判断是否已存在
+        parser = IncrementalNameParser(self.ninja_data.banned_keys(), self.canonical_name)
+        preview = BatchParsePreview(parser, name_input.toPlainText, dialog)
+        preview.updated.connect(lambda stats: preview_label.setText(
+            f"新增 {stats['new']} 个，重复 {stats['duplicate']} 个，无效 {stats['invalid']} 个"
+        ))
+        name_input.textChanged.connect(preview.schedule)
+
         # 确认按钮
         confirm_btn = QPushButton("确认添加")
+        confirm_btn.setObjectName("confirmButton")
         confirm_btn.setMinimumHeight(40)  # 增加按钮高度
-        confirm_btn.setStyleSheet("""
-            QPushButton {
-                font-size: 14px;
-                font-weight: bold;
-            }
-        """)
 
         def on_confirm():
-            names_text = name_input.toPlainText().strip()
-            if names_text:
-                # 分割文本并过滤空字符串
-                names = [name.strip() for name in names_text.split() if name.strip()]
-
-                # 检查重复的忍者
-                existing_ninjas = self.ninja_data.get_ninjas()
-                existing_names = {ninja["name"].lower() for ninja in existing_ninjas}
-
-                # 记录添加结果
-                success_count = 0
-                duplicate_names = []
-
-                for name in names:
-                    if name.lower() not in existing_names:
-                        self.ninja_data.add_ninja(name, rank)
-                        success_count += 1
-                        existing_names.add(name.lower())
-                    else:
-                        duplicate_names.append(name)
+            if name_input.toPlainText().strip():
+                # 解析结果已经在输入时增量维护好了
+                parser = preview.finish()
+                names = parser.new_names()
+                duplicate_names = parser.duplicate_names()
+
+                # 一次性写入所有新忍者
+                success_count = len(self.batch_add_ninjas(names, rank))
 
                 # 显示结果消息
                 result_message = f"成功添加 {success_count} 个忍者"
                 if duplicate_names:
                     result_message += f"\n以下忍者已存在：\n{', '.join(duplicate_names)}"
+                if parser.invalid_count:
+                    result_message += f"\n无效名称 {parser.invalid_count} 个"
 
                 QMessageBox.information(dialog, "添加结果", result_message)
 
                 if success_count > 0:
-                    self.load_ninjas()
                     dialog.accept()
             else:
                 QMessageBox.warning(dialog, "警告", "请输入忍者名称")
@@ -673,401 +1344,511 @@ class NinjaManager(QMainWindow):
 
         layout.addWidget(hint_label)
         layout.addWidget(name_input)
+        layout.addWidget(preview_label)
         layout.addWidget(confirm_btn)
 
-        # 设置对话框样式
-        dialog.setStyleSheet("""
-            QDialog {
-                background-color: white;
-            }
-            QTextEdit {
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                padding: 12px;
-                background-color: white;
-            }
-            QTextEdit:focus {
-                border: 2px solid #2196F3;
-            }
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 16px;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:pressed {
-                background-color: #0D47A1;
-            }
-        """)
 
         dialog.exec_()
         QTimer.singleShot(300, self.auto_trigger_batch_delete)
 
-    def delete_ninja(self, name):
-        self.ninja_data.delete_ninja(name)
-        self.load_ninjas()
+    # 以下是录制和回放使用的操作入口：参数里已经包含界面上的输入，不弹出任何对话框
 
-    def clear_search(self):
-        self.search_input.clear()
-        self.search_result_label.hide()
+    @recorded
+    def add_ninjas(self, names, rank):
+        # 跳过已禁用的名称（忽略大小写和别名），返回实际添加的名称
+        existing = self.ninja_data.banned_keys()
+        names = [name for name in names if ban_key(name) not in existing]
+        self.ninja_data.add_ninjas([self.ninja_data.new_ninja(name, rank) for name in names])
+        return names
 
-    def search_ninja(self):
-        search_text = self.search_input.text().strip()
+    @recorded
+    def batch_add_ninjas(self, names, rank):
+        return self.add_ninjas(names, rank)
+
+    @recorded
+    def delete_ninjas(self, names):
+        return self.ninja_data.delete_ninjas(names)
+
+    @recorded
+    def find_ninja(self, text):
+        search_text = self.canonical_name(text)
         if not search_text:
             self.search_result_label.hide()
-            return
+            return None
 
-        # 在所有忍者中搜索
-        ninjas = self.ninja_data.get_ninjas()
-        found = any(ninja["name"].lower() == search_text.lower() for ninja in ninjas)
+        # 在所有忍者中搜索，名单里存的是别名也算
+        found = bool(self.ninja_data.find_banned([search_text]))
 
-        # 设置搜索结果提示
+        # 设置搜索结果提示，颜色由 banned 属性决定
         if found:
             self.search_result_label.setText(f"忍者「{search_text}」已被禁用")
-            self.search_result_label.setStyleSheet("""
-                QLabel {
-                    background-color: #ffebee;
-                    color: #c62828;
-                    padding: 8px;
-                    border-radius: 4px;
-                    font-size: 13px;
-                }
-            """)
         else:
             self.search_result_label.setText(f"忍者「{search_text}」未被禁用")
-            self.search_result_label.setStyleSheet("""
-                QLabel {
-                    background-color: #e8f5e9;
-                    color: #2e7d32;
-                    padding: 8px;
-                    border-radius: 4px;
-                    font-size: 13px;
-                }
-            """)
+        set_state(self.search_result_label, "banned", found)
 
         self.search_result_label.show()
+        return found
+
+    @recorded
+    def set_rules(self, text):
+        self.ninja_data.save_rules(text)
+
+    @recorded
+    def import_records(self, records):
+        # 导入文件里解析出的新记录，录制的是记录本身，回放时不需要原文件
+        self.ninja_data.add_ninjas(records)
+
+    @recorded
+    def restore_snapshot(self, state):
+        # 恢复本身也可以整体撤销
+        stack = self.undo_history.stack
+        stack.beginMacro("从快照恢复")
+        try:
+            self.ninja_data.restore_state(state)
+        finally:
+            stack.endMacro()
+
+    @recorded
+    def set_wheel_items(self, names):
+        # 随机抽取的结果作为参数录制，回放时转盘上是同样的忍者
+        self.wheel_shows_scrolls = False
+        self.scroll_wheel.set_items(names)
+        self.scroll_wheel.setVisible(True)
+        self.spin_btn.setVisible(True)
+
+    @recorded
+    def undo(self):
+        self.undo_history.stack.undo()
+
+    @recorded
+    def redo(self):
+        self.undo_history.stack.redo()
+
+    def update_undo_actions(self):
+        stack = self.undo_history.stack
+        self.undo_action.setEnabled(stack.canUndo())
+        self.undo_action.setText(f"撤销 {stack.undoText()}".strip())
+        self.redo_action.setEnabled(stack.canRedo())
+        self.redo_action.setText(f"重做 {stack.redoText()}".strip())
+
+    @recorded
+    def spin_wheel(self):
+        self.scroll_wheel.spin()
+
+    @recorded
+    def add_scrolls(self, names):
+        return self.ninja_data.add_scrolls(names)
+
+    @recorded
+    def remove_scroll(self, name):
+        self.ninja_data.remove_scroll(name)
+
+    def delete_ninja(self, name):
+        self.delete_ninjas([name])
+
+    def clear_search(self):
+        self.search_input.clear()
+        self.search_result_label.hide()
+
+    def search_ninja(self):
+        self.find_ninja(self.search_input.text())
 
     def save_rules(self):
-        self.ninja_data.save_rules(self.rules_text.toPlainText())
+        # 保存还没写入的规则输入；切换方案、撤销和关闭窗口前也会调用
+        self.rules_save_timer.stop()
+        text = self.rules_text.toPlainText()
+        if text != self.ninja_data.load_rules():
+            self.set_rules(text)
+
+    def eventFilter(self, watched, event):
+        if watched is self.rules_text and event.type() == QEvent.FocusOut:
+            self.save_rules()
+        return super().eventFilter(watched, event)
+
+    def run_roster_task(self, title, task, on_success):
+        progress_dialog = QProgressDialog(title, "取消", 0, 100, self)
+        progress_dialog.setWindowTitle(title)
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(300)
+
+        worker = TaskWorker(task, self)
+        worker.progress.connect(progress_dialog.setValue)
+        worker.succeeded.connect(on_success)
+        worker.failed.connect(lambda message: QMessageBox.warning(self, "错误", message))
+        worker.finished.connect(progress_dialog.close)
+        worker.finished.connect(worker.deleteLater)
+        progress_dialog.canceled.connect(worker.requestInterruption)
+
+        self.roster_worker = worker
+        worker.start()
+
+    def import_roster_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "导入禁用名单", "", "禁用名单 (*.jsonl *.csv)")
+        if not path:
+            return
 
-    def load_scrolls(self):
-        # 清除现有的秘卷项
-        while self.scroll_list_layout.count():
-            item = self.scroll_list_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        existing_names = self.ninja_data.banned_keys()
+        ranks = self.ninja_data.ranks()
+        self.run_roster_task(
+            "正在导入禁用名单",
+            lambda progress, cancelled: roster_io.import_roster(path, existing_names, ranks,
+                                                                progress, cancelled),
+            self.on_roster_imported
+        )
+
+    def on_roster_imported(self, result):
+        new_records, duplicates, invalid = result
+
+        # 所有新记录一次性写入
+        if new_records:
+            self.import_records(new_records)
+            QTimer.singleShot(300, self.auto_trigger_batch_delete)
+
+        QMessageBox.information(
+            self, "导入结果",
+            f"成功导入 {len(new_records)} 个忍者\n已存在 {duplicates} 个，无效 {invalid} 个"
+        )
+
+    def export_roster_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出禁用名单", "ninjas.jsonl",
+                                              "JSON Lines (*.jsonl);;CSV (*.csv)")
+        if not path:
+            return
 
-        # 加载秘卷列表
-        scrolls = self.ninja_data.load_scrolls()
+        records = self.ninja_data.get_ninjas()
+        self.run_roster_task(
+            "正在导出禁用名单",
+            lambda progress, cancelled: roster_io.export_roster(records, path, progress, cancelled),
+            lambda count: QMessageBox.information(self, "导出结果", f"已导出 {count} 个忍者")
+        )
 
-        # 更新转盘和转动按钮状态
+    def export_board_image(self):
+        scale, ok = QInputDialog.getDouble(self, "导出禁用名单图片", "缩放倍数：", 2.0, 0.5, 8.0, 1)
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出禁用名单图片", "禁用名单.png", "PNG 图片 (*.png)")
+        if not path:
+            return
+
+        snapshot = board_snapshot(self.ninja_data)
+        task = lambda progress, cancelled: self.board_exporter.export(snapshot, scale, path,
+                                                                      progress, cancelled)
+
+        def on_exported(paths):
+            if paths:
+                QMessageBox.information(self, "导出结果", "已导出：\n" + "\n".join(paths))
+
+        self.run_roster_task("正在导出禁用名单图片", task, on_exported)
+
+    def toggle_overlay_server(self, enabled):
+        if enabled and self.overlay_server is None:
+            try:
+                self.overlay_server = OverlayServer(OverlayFeed(self.ninja_data))
+            except OSError as e:
+                QMessageBox.warning(self, "错误", f"无法启动数据服务：{e}")
+                self.overlay_action.setChecked(False)
+                return
+            self.overlay_server.start()
+        elif not enabled and self.overlay_server is not None:
+            self.overlay_server.stop()
+            self.overlay_server = None
+
+    def toggle_session_recording(self, enabled):
+        if enabled and self.session_recorder is None:
+            path = os.path.join("data", "sessions", f"session-{datetime.now():%Y%m%d-%H%M%S}.jsonl")
+            self.session_recorder = SessionRecorder(path, self.ninja_data)
+        elif not enabled and self.session_recorder is not None:
+            recorder = self.session_recorder
+            self.session_recorder = None
+            recorder.close()
+            QMessageBox.information(self, "录制操作", f"已录制 {recorder.count} 个操作：\n{recorder.path}\n\n"
+                                                    f"回放：python session_replay.py {recorder.path}")
+
+    def show_diagnostics(self):
+        # 非模态，方便开着对话框操作主窗口后再比较
+        dialog = DiagnosticsDialog(self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    def show_match_panel(self):
+        # 非模态，比赛间隙一直开着，转盘结果会自动填入
+        if self.match_panel is None:
+            self.match_panel = MatchPanel(self.match_log, self.ninja_data, self)
+        self.match_panel.show()
+        self.match_panel.raise_()
+        self.match_panel.activateWindow()
+
+    def toggle_presentation(self, enabled):
+        if enabled and self.presentation is None:
+            # 与本窗口共用 NinjaData 和转盘，不另外读取数据
+            self.presentation = PresentationWindow(self.ninja_data, self.scroll_wheel, self)
+            self.presentation.setAttribute(Qt.WA_DeleteOnClose)
+            self.presentation.closed.connect(self.on_presentation_closed)
+            self.presentation.show_on_second_screen()
+        elif not enabled and self.presentation is not None:
+            self.presentation.close()
+
+    def on_presentation_closed(self):
+        self.presentation = None
+        self.presentation_action.setChecked(False)
+
+    def set_wheel_adaptive_quality(self, enabled):
+        self.scroll_wheel.set_adaptive_quality(enabled)
+        self.settings["adaptive_wheel_quality"] = enabled
+        save_settings(self.settings)
+
+    def on_spin_metrics(self, metrics):
+        self.last_spin_metrics = metrics
+
+    def on_spin_result(self, result):
+        if self.match_panel is not None:
+            self.match_panel.set_scroll(result)
+        if self.overlay_server is not None:
+            self.overlay_server.feed.publish_spin(result)
+
+    def closeEvent(self, event):
+        self.save_rules()
+        if self.overlay_server is not None:
+            self.overlay_server.stop()
+            self.overlay_server = None
+        self.ban_history.close()
+        self.match_log.close()
+        self.snapshots.close()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        super().closeEvent(event)
+
+    def show_recovered_files(self):
+        lines = []
+        for path, backup, restored in self.ninja_data.recovered:
+            result = "已从最近的快照恢复" if restored else "没有可用的快照，已重置为空"
+            lines.append(f"{path}：{result}\n损坏的文件保留为 {backup}")
+        QMessageBox.warning(self, "数据文件损坏", "\n\n".join(lines) +
+                            "\n\n可以通过“文件 → 从快照恢复”选择更早的快照。")
+
+    def show_snapshots(self):
+        # 快照列表和选中快照的数据预览都在后台线程读取，界面线程不等待快照写入和解压
+        snapshots = self.snapshots
+        profile = self.ninja_data.profile
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"从快照恢复（{profile}）")
+        dialog.resize(480, 420)
+        layout = QVBoxLayout(dialog)
+
+        snapshot_list = QListWidget()
+        layout.addWidget(snapshot_list)
+        preview = QLabel("正在读取快照列表…")
+        preview.setWordWrap(True)
+        layout.addWidget(preview)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        restore_button = buttons.addButton("恢复", QDialogButtonBox.AcceptRole)
+        restore_button.setEnabled(False)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        selected = {}
+
+        def start(task, on_success):
+            # 只处理最近一次启动的任务，切换选中项后旧任务的结果直接丢弃
+            worker = TaskWorker(task, dialog)
+            selected["worker"] = worker
+            worker.succeeded.connect(lambda result: worker is selected["worker"] and on_success(result))
+            worker.failed.connect(lambda message: worker is selected["worker"] and
+                                  preview.setText(f"无法读取快照：{message}"))
+            worker.finished.connect(worker.deleteLater)
+            worker.start()
+
+        def list_snapshots(progress, cancelled):
+            # 等排队中的快照写完，列表里才有刚拍的那一份
+            snapshots.wait()
+            return snapshots.list(profile), snapshots.disk_usage(profile)
+
+        def on_listed(result):
+            entries, usage = result
+            dialog.setWindowTitle(f"从快照恢复（{profile}，共 {len(entries)} 份，{usage / 1024:.1f} KB）")
+            for snapshot_id, moment, keyframe in entries:
+                item = QListWidgetItem(f"{moment:%Y-%m-%d %H:%M:%S}" + ("" if keyframe else "  （增量）"))
+                item.setData(Qt.UserRole, snapshot_id)
+                snapshot_list.addItem(item)
+            if snapshot_list.currentItem() is None:
+                preview.setText("选择一份快照查看内容")
+
+        def on_selected():
+            item = snapshot_list.currentItem()
+            selected["state"] = None
+            restore_button.setEnabled(False)
+            if item is None:
+                return
+            snapshot_id = item.data(Qt.UserRole)
+            preview.setText("正在读取快照…")
+            start(lambda progress, cancelled: snapshots.load(snapshot_id, profile), on_loaded)
+
+        def on_loaded(state):
+            selected["state"] = state
+            restore_button.setEnabled(state is not None)
+            if state is None:
+                preview.setText("无法读取这份快照")
+                return
+            current = {ninja["name"]: ninja["rank"] for ninja in self.ninja_data.get_ninjas()}
+            names = {ninja["name"]: rank for rank, ninjas in state["ninjas"].items() for ninja in ninjas}
+            counts = "  ".join(f"{rank}:{len(state['ninjas'].get(rank, []))}" for rank in self.ninja_data.ranks())
+            preview.setText(
+                f"共 {len(names)} 个忍者（{counts}），{len(state['scrolls'])} 个秘卷\n"
+                f"与当前相比：恢复 {sum(name not in current for name in names)} 个，"
+                f"移除 {sum(name not in names for name in current)} 个，"
+                f"改变等级 {sum(name in current and current[name] != rank for name, rank in names.items())} 个")
+
+        snapshot_list.currentItemChanged.connect(on_selected)
+        start(list_snapshots, on_listed)
+        if dialog.exec_() != QDialog.Accepted or not selected.get("state"):
+            return
+
+        # 恢复前先给当前数据拍一份快照
+        snapshots.snapshot()
+        self.restore_snapshot(selected["state"])
+
+    def show_ban_stats(self):
+        # 统计数据全部来自增量维护的汇总表，打开对话框不扫描历史事件
+        history = self.ban_history
+        ranks = self.ninja_data.ranks()
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"禁用统计（共 {history.event_count()} 条记录）")
+        dialog.resize(520, 480)
+        layout = QVBoxLayout(dialog)
+        tabs = QTabWidget()
+        layout.addWidget(tabs)
+
+        def make_table(headers, rows):
+            table = QTableWidget(len(rows), len(headers))
+            table.setHorizontalHeaderLabels(headers)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            table.verticalHeader().setVisible(False)
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            for row, values in enumerate(rows):
+                for column, value in enumerate(values):
+                    table.setItem(row, column, QTableWidgetItem(str(value)))
+            return table
+
+        ninja_page = QWidget()
+        ninja_layout = QVBoxLayout(ninja_page)
+        rank_filter = QComboBox()
+        rank_filter.addItem("全部等级", None)
+        for rank in ranks:
+            rank_filter.addItem(f"{rank}级", rank)
+        ninja_layout.addWidget(rank_filter)
+        ninja_table = make_table(["忍者", "等级", "禁用次数", "解禁次数"], history.top_ninjas(50))
+        ninja_layout.addWidget(ninja_table)
+
+        def on_rank_filter_changed():
+            rows = history.top_ninjas(50, rank_filter.currentData())
+            ninja_table.setRowCount(len(rows))
+            for row, values in enumerate(rows):
+                for column, value in enumerate(values):
+                    ninja_table.setItem(row, column, QTableWidgetItem(str(value)))
+
+        rank_filter.currentIndexChanged.connect(on_rank_filter_changed)
+        tabs.addTab(ninja_page, "忍者排行")
+
+        totals = history.rank_totals()
+        tabs.addTab(make_table(["等级", "禁用次数", "解禁次数"], [
+            (rank, totals.get(rank, {}).get("bans", 0), totals.get(rank, {}).get("unbans", 0))
+            for rank in ranks
+        ]), "等级")
+
+        tabs.addTab(make_table(["周"] + ranks + ["合计"], [
+            [week] + [counts.get(rank, 0) for rank in ranks] + [sum(counts.values())]
+            for week, counts in history.weekly(52)
+        ]), "每周")
+
+        dialog.exec_()
+
+    def load_scrolls(self):
+        # 启动、切换方案或点击“秘卷”按钮时：秘卷列表按名称比对，只删除和新建变化的秘卷项，
+        # 转盘换回秘卷。之后的增删由 scrolls 事件的差异更新
+        scrolls = self.ninja_data.load_scrolls()
+        current = set(scrolls)
+        layout = self.scroll_list_layout
+        with paused_layouts([layout]):
+            stale = [self.scroll_items.pop(name) for name in list(self.scroll_items) if name not in current]
+            self.remove_scroll_items(stale)
+            for scroll in scrolls:
+                if scroll not in self.scroll_items:
+                    self.add_scroll_item(len(layout.itemList), scroll)
+            # 顺序与存储一致，之后按位置插入才对得上
+            order = {name: i for i, name in enumerate(scrolls)}
+            layout.itemList.sort(key=lambda item: order[item.widget().name])
+
+        self.wheel_shows_scrolls = True
         self.scroll_wheel.set_items(scrolls)
+        self.update_scroll_wheel_visibility()
+
+    def update_scroll_items(self, diff):
+        # 按 scrolls 事件的差异只删除、插入变化的秘卷项，转盘上的秘卷同样按位置增删
+        with paused_layouts([self.scroll_list_layout]):
+            self.remove_scroll_items([self.scroll_items.pop(name) for _, name in diff["removed"]])
+            for index, name in diff["added"]:
+                self.add_scroll_item(index, name)
 
+        if self.wheel_shows_scrolls:
+            self.scroll_wheel.update_items(diff["removed"], diff["added"])
+        else:
+            # 转盘上是随机抽取的忍者时，秘卷有变化就换回秘卷
+            self.wheel_shows_scrolls = True
+            self.scroll_wheel.set_items(self.ninja_data.load_scrolls())
+        self.update_scroll_wheel_visibility()
+
+    def add_scroll_item(self, index, name):
+        scroll_item = ScrollItem(name)
+        scroll_item.deleted.connect(self.remove_scroll)
+        self.scroll_list_layout.insertWidget(index, scroll_item)
+        scroll_item.show()
+        self.scroll_items[name] = scroll_item
+
+    def remove_scroll_items(self, scroll_items):
+        self.scroll_list_layout.removeWidgets(scroll_items)
+        for scroll_item in scroll_items:
+            scroll_item.deleteLater()
+
+    def update_scroll_wheel_visibility(self):
         # 根据是否有秘卷来设置转盘和按钮的可见性
-        has_scrolls = len(scrolls) > 0
+        has_scrolls = bool(self.scroll_wheel.items)
         self.scroll_wheel.setVisible(has_scrolls)
         self.spin_btn.setVisible(has_scrolls)
 
-        # 添加秘卷项到列表
-        for scroll in scrolls:
-            scroll_item = ScrollItem(scroll)
-            scroll_item.deleted.connect(self.remove_scroll)
-            self.scroll_list_layout.addWidget(scroll_item)
+    def load_random_ninjas(self):
+        # 把随机抽取的未禁用忍者放到转盘上
+        rank = self.picker_rank_combo.currentText()
+        names = self.ninja_picker.sample(rank, self.picker_count_spin.value())
+        if not names:
+            QMessageBox.warning(self, "警告", f"没有可选的{rank}级忍者")
+            return
+
+        self.set_wheel_items(names)
 
     def add_scroll(self):
         name = self.scroll_input.text().strip()
         if name:
-            self.ninja_data.add_scroll(name)
-            self.load_scrolls()
+            self.add_scrolls([name])
             self.scroll_input.clear()
 
             # 确保转盘和按钮可见
             self.scroll_wheel.setVisible(True)
             self.spin_btn.setVisible(True)
 
-    def remove_scroll(self, name):
-        self.ninja_data.remove_scroll(name)
-        self.load_scrolls()
+    def batch_add_scrolls(self):
+        # 粘贴一段文字，按换行、空格、逗号、顿号等切分后一次添加
+        text, ok = QInputDialog.getMultiLineText(self, "批量添加秘卷", "秘卷名称（可用换行、空格、逗号或顿号分隔）：")
+        if not ok:
+            return
+        names = list(iter_names(text.splitlines()))
+        if not names:
+            return
+        added = self.add_scrolls(names)
+        message = f"成功添加 {len(added)} 个秘卷"
+        if len(added) < len(names):
+            message += f"，{len(names) - len(added)} 个已存在或重复"
+        QMessageBox.information(self, "添加结果", message)
 
-    def load_stylesheet(self):
-        style = """
-        QMainWindow {
-            background-color: #f5f5f5;
-        }
-
-        QWidget {
-            font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
-        }
-
-        QWidget#leftPanel {
-            background-color: white;
-            border-radius: 8px;
-            margin: 8px;
-        }
-
-        QPushButton {
-            background-color: #2196F3;
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            font-weight: bold;
-        }
-
-        QPushButton:hover {
-            background-color: #1976D2;
-        }
-
-        QPushButton:pressed {
-            background-color: #0D47A1;
-        }
-
-        QPushButton#deleteButton {
-            background-color: #F44336;
-            padding: 4px 8px;
-        }
-
-        QPushButton#deleteButton:hover {
-            background-color: #D32F2F;
-        }
-
-        QLineEdit {
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            background-color: white;
-        }
-
-        QLineEdit:focus {
-            border: 2px solid #2196F3;
-        }
-
-        QLabel#searchLabel, QLabel#rankTitle {
-            font-size: 16px;
-            font-weight: bold;
-            color: #1976D2;
-            padding-bottom: 8px;
-        }
-
-        QLabel#rankLabel {
-            font-size: 14px;
-            font-weight: bold;
-            color: #333;
-        }
-
-        QPushButton#addButton {
-            min-width: 80px;
-        }
-
-        QWidget#rankWidget {
-            background-color: #f8f9fa;
-            border-radius: 6px;
-            padding: 12px;
-        }
-
-        .NinjaCard {
-            background-color: white;
-            border-radius: 1px;  /* 减小圆角 */
-            padding: 0px;
-            margin: 0px;
-            box-shadow: none;    /* 移除阴影以减少视觉空间 */
-        }
-        QScrollArea {
-            border: none;
-            background-color: transparent;
-        }
-
-        QWidget[objectName^="rank_container_"] {
-            background-color: white;
-            border-radius: 4px;  /* 减小圆角 */
-            padding: 2px;        /* 进一步减小容器内边距 */
-            margin: 2px;         /* 减小容器外边距 */
-            box-shadow: 0 1px 2px rgba(0,0,0,0.1);
-        }
-
-        QDialog {
-            background-color: white;
-        }
-
-        QDialog QLabel {
-            font-size: 14px;
-            color: #333;
-            margin-top: 8px;
-        }
-
-        QDialog QPushButton {
-            margin-top: 16px;
-        }
-
-        QLabel#rulesLabel {
-            font-size: 16px;
-            font-weight: bold;
-            color: #1976D2;
-            padding-bottom: 8px;
-        }
-
-        QTextEdit {
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            background-color: white;
-            font-size: 13px;
-        }
-
-        QTextEdit:focus {
-            border: 2px solid #2196F3;
-        }
-
-        QLabel#scrollTitle {
-            font-size: 16px;
-            font-weight: bold;
-            color: #1976D2;
-            padding-bottom: 8px;
-        }
-
-        QPushButton#spinButton {
-            background-color: #4CAF50;
-            font-size: 16px;
-            padding: 12px;
-            margin-top: 8px;
-        }
-
-        QPushButton#spinButton:hover {
-            background-color: #388E3C;
-        }
-
-        QPushButton#batchClearButton {
-            background-color: #FF5722;
-            color: white;
-            border: none;
-            padding: 6px 12px;
-            border-radius: 4px;
-            font-weight: bold;
-        }
-
-        QPushButton#batchClearButton:hover {
-            background-color: #F4511E;
-        }
-
-        QPushButton#deleteSelectedButton {
-            background-color: #F44336;
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            font-weight: bold;
-            margin-top: 8px;
-        }
-
-        QPushButton#deleteSelectedButton:hover {
-            background-color: #D32F2F;
-        }
-
-        QPushButton#selectAllButton {
-            background-color: #2196F3;
-            color: white;
-            border: none;
-            padding: 6px 12px;
-            border-radius: 4px;
-            font-weight: bold;
-            margin-left: 8px;
-        }
-
-        QPushButton#selectAllButton:hover {
-            background-color: #1976D2;
-        }
-
-        
-        QCheckBox {
-            spacing: 0px;
-            margin: 0px;
-            padding: 0px;
-        }
-
-        QCheckBox::indicator {
-            width: 10px;
-            height: 10px;
-            margin: 0px;
-            padding: 0px;
-        }
-
-        QCheckBox::indicator:unchecked {
-            border: 1px solid #ddd;
-            border-radius: 2px;
-            background-color: white;
-            margin: 0px;
-        }
-
-        QCheckBox::indicator:checked {
-            border: 1px solid #2196F3;
-            border-radius: 2px;
-            background-color: #2196F3;
-            image: url(checkmark.svg);
-            margin: 0px;
-        }
-
-        .NinjaCard {
-            background-color: white;
-            border-radius: 0px;
-            padding: 0px;
-            margin: 0px;
-            min-height: 20px;    /* 设置最小高度 */
-            max-height: 20px;    /* 设置最大高度 */
-        }
-
-        /* 添加水平布局容器的样式 */
-        .NinjaCard QWidget {
-            margin: 0px;
-            padding: 0px;
-        }
-
-        /* 确保标签没有额外的边距 */
-        .NinjaCard QLabel {
-            margin: 0px;
-            padding: 0px;
-            min-height: 16px;
-            max-height: 16px;
-        }
-
-        /* 调整删除按钮的样式 */
-        QPushButton#deleteButton {
-            padding: 0px 2px;
-            margin: 0px;
-            height: 16px;
-            font-size: 10px;
-        }
-
-        /* 调整卡片内部布局容器 */
-        .NinjaCard > QWidget {
-            margin: 0px;
-            padding: 0px;
-            min-height: 16px;
-            max-height: 16px;
-        }
-
-        /* 调整水平布局 */
-        .NinjaCard QHBoxLayout {
-            margin: 0px;
-            padding: 0px;
-            spacing: 0px;
-        }
-
-        /* 调整垂直布局 */
-        .NinjaCard QVBoxLayout {
-            margin: 0px;
-            padding: 0px;
-            spacing: 0px;
-        }
-
-        QWidget[objectName^="rank_container_"] {
-            background-color: white;
-            border-radius: 2px;
-            padding: 1px;
-            margin: 1px;
-        }
-        """
-        self.setStyleSheet(style)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import random
+
+from utils import ban_key
+
+
+class NinjaPicker:
+    # 从全部忍者目录中按等级随机抽取未被禁用的忍者
+    # 每个等级维护一份可选列表，配合 名称 -> 下标 的索引做交换删除，
+    # 禁用/解禁时 O(1) 更新，抽取时不需要重新扫描 ninjas.json
+
+    def __init__(self, ninja_data, catalog=None):
+        self.ninja_data = ninja_data
+        self._allowed = {}  # rank -> [name, ...]
+        self._index = {}  # 规范化名称 -> 在可选列表中的下标
+        self._catalog = {}  # 规范化名称 -> (name, rank)
+        self._catalog_source = None
+        self._banned = set()
+        self._loaded = False
+
+        # 不传目录时等到第一次抽取再加载，避免拖慢启动
+        if catalog is not None:
+            self.set_catalog(catalog)
+        ninja_data.add_listener(self.on_data_changed)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.set_catalog(self.ninja_data.load_catalog())
+
+    def set_catalog(self, catalog):
+        self._loaded = True
+        self._catalog_source = catalog
+        self._allowed = {}
+        self._index = {}
+        self._catalog = {}
+        self._banned = self.ninja_data.banned_keys()
+
+        for rank, names in catalog.items():
+            self._allowed.setdefault(rank, [])
+            for name in names:
+                key = ban_key(name)
+                if not key or key in self._catalog:
+                    continue
+                self._catalog[key] = (name, rank)
+                if key not in self._banned:
+                    self._insert(key)
+
+    def _insert(self, key):
+        name, rank = self._catalog[key]
+        allowed = self._allowed.setdefault(rank, [])
+        self._index[key] = len(allowed)
+        allowed.append(name)
+
+    def _remove(self, key):
+        index = self._index.pop(key, None)
+        if index is None:
+            return
+        _, rank = self._catalog[key]
+        allowed = self._allowed[rank]
+        # 用最后一个元素填补空位
+        last = allowed.pop()
+        if index < len(allowed):
+            allowed[index] = last
+            self._index[ban_key(last)] = index
+
+    def on_data_changed(self, event, payload):
+        if not self._loaded:
+            return
+        if event == "profile":
+            # 切换方案后目录不变，只需按新的禁用名单重建可选列表
+            self.set_catalog(self._catalog_source)
+            return
+        if event == "add":
+            for ninja in payload:
+                key = ban_key(ninja["name"])
+                self._banned.add(key)
+                self._remove(key)
+        elif event == "delete":
+            for ninja in payload:
+                key = ban_key(ninja["name"])
+                self._banned.discard(key)
+                if key in self._catalog and key not in self._index:
+                    self._insert(key)
+
+    def ranks(self):
+        self._ensure_loaded()
+        return list(self._allowed.keys())
+
+    def allowed_count(self, rank):
+        self._ensure_loaded()
+        return len(self._allowed.get(rank, []))
+
+    def is_allowed(self, name):
+        self._ensure_loaded()
+        return ban_key(name) in self._index
+
+    def pick(self, rank):
+        self._ensure_loaded()
+        allowed = self._allowed.get(rank)
+        if not allowed:
+            return None
+        return random.choice(allowed)
+
+    def sample(self, rank, count):
+        # 不重复地抽取多个，可直接作为转盘的选项
+        self._ensure_loaded()
+        allowed = self._allowed.get(rank, [])
+        return random.sample(allowed, min(count, len(allowed)))
+
+    def close(self):
+        self.ninja_data.remove_listener(self.on_data_changed)
@@ -0,0 +1,119 @@
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+
+# 紧凑的忍者记录：用 __slots__ 代替每条记录一个 dict，名称驻留复用，
+# 等级存成小整数编号，created_at 保留原始字符串，用到时才解析成 datetime。
+# 同时实现只读 Mapping 接口并支持 record["rank"] = ... 赋值，原来按 dict 使用的代码不用改
+FIELDS = ("name", "rank", "created_at")
+
+# 等级名称 <-> 编号，全进程共用
+_rank_names = []
+_rank_codes = {}
+
+
+def rank_code(rank):
+    code = _rank_codes.get(rank)
+    if code is None:
+        code = _rank_codes[rank] = len(_rank_names)
+        _rank_names.append(sys.intern(rank))
+    return code
+
+
+class NinjaRecord(Mapping):
+    __slots__ = ("name", "_rank", "created_at", "_extra")
+
+    def __init__(self, name, rank, created_at=None, extra=None):
+        self.name = sys.intern(name)
+        self._rank = rank_code(rank)
+        self.created_at = created_at
+        # image_path 等不常用字段，没有时为 None，不占 dict
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        # 也可作为 json.load 的 object_hook；不像忍者记录的对象原样返回
+        if isinstance(data, NinjaRecord):
+            return data
+        if "name" not in data or "rank" not in data:
+            return data
+        extra = {key: value for key, value in data.items() if key not in FIELDS}
+        return cls(data["name"], data["rank"], data.get("created_at"), extra)
+
+    @property
+    def rank(self):
+        return _rank_names[self._rank]
+
+    @rank.setter
+    def rank(self, rank):
+        self._rank = rank_code(rank)
+
+    @property
+    def created(self):
+        # 只有真正需要时间时才解析
+        return datetime.fromisoformat(self.created_at) if self.created_at else None
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key == "rank":
+            return self.rank
+        if key == "created_at":
+            if self.created_at is None:
+                raise KeyError(key)
+            return self.created_at
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __iter__(self):
+        yield "name"
+        yield "rank"
+        if self.created_at is not None:
+            yield "created_at"
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return 2 + (self.created_at is not None) + len(self._extra or ())
+
+    def __repr__(self):
+        return f"NinjaRecord({self.name!r}, {self.rank!r}, {self.created_at!r})"
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+def json_default(value):
+    # json.dump(..., default=json_default)，让记录可以直接序列化
+    if isinstance(value, NinjaRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if __name__ == '__main__':
+    # 内存对比：每 10000 条记录的占用
+    import tracemalloc
+
+    def measure(make):
+        tracemalloc.start()
+        records = [make(i) for i in range(10000)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del records
+        return current
+
+    names = [f"忍者{i % 500}" for i in range(10000)]
+    created_at = datetime.now().isoformat()
+    dict_bytes = measure(lambda i: {"name": names[i], "rank": "S", "created_at": created_at[:-1] + str(i % 10)})
+    record_bytes = measure(lambda i: NinjaRecord(names[i], "S", created_at[:-1] + str(i % 10)))
+    print(f"dict 记录：每 10000 条 {dict_bytes / 1024:.1f} KiB")
+    print(f"NinjaRecord：每 10000 条 {record_bytes / 1024:.1f} KiB（{record_bytes / dict_bytes:.0%}）")
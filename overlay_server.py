@@ -0,0 +1,171 @@
+import hashlib
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ninja_record import json_default
+
+# 给 OBS 浏览器源用的本地只读数据接口
+#   GET /snapshot  当前禁用名单、规则、秘卷和最近一次转盘结果，支持 ETag/304
+#   GET /events    Server-Sent Events，只推送变化的部分
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+KEEPALIVE_SECONDS = 15
+
+
+class OverlayFeed:
+    # 数据变化时序列化一次，之后所有客户端共用同一份字节串
+
+    def __init__(self, ninja_data):
+        self.ninja_data = ninja_data
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.last_spin = None
+        self.snapshot_body = b""
+        self.etag = ""
+        self.rebuild_snapshot()
+        ninja_data.add_listener(self.on_data_changed)
+
+    def rebuild_snapshot(self):
+        snapshot = {
+            "version": self.ninja_data.version,
+            "tiers": self.ninja_data.tiers,
+            "bans": self.ninja_data.get_ninjas(),
+            "rules": self.ninja_data.load_rules(),
+            "scrolls": self.ninja_data.load_scrolls(),
+            "last_spin": self.last_spin,
+        }
+        body = json.dumps(snapshot, ensure_ascii=False, default=json_default).encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        with self.lock:
+            self.snapshot_body = body
+            self.etag = etag
+
+    def get_snapshot(self):
+        with self.lock:
+            return self.snapshot_body, self.etag
+
+    def on_data_changed(self, event, payload):
+        self.rebuild_snapshot()
+        self.broadcast(event, payload)
+
+    def publish_spin(self, result):
+        self.last_spin = {"result": result, "time": time.time()}
+        self.rebuild_snapshot()
+        self.broadcast("spin", self.last_spin)
+
+    def broadcast(self, event, payload):
+        data = json.dumps({"version": self.ninja_data.version, "data": payload}, ensure_ascii=False,
+                          default=json_default)
+        message = f"id: {self.ninja_data.version}\nevent: {event}\ndata: {data}\n\n".encode('utf-8')
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.put(message)
+
+    def subscribe(self):
+        client = queue.Queue()
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def close(self):
+        self.ninja_data.remove_listener(self.on_data_changed)
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.put(None)
+
+
+class OverlayRequestHandler(BaseHTTPRequestHandler):
+    feed = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_common_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Cache-Control", "no-cache")
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/snapshot"):
+            self.send_snapshot()
+        elif path == "/events":
+            self.send_events()
+        else:
+            self.send_error(404)
+
+    def send_snapshot(self):
+        body, etag = self.feed.get_snapshot()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_common_headers()
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_common_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_common_headers()
+        self.end_headers()
+
+        client = self.feed.subscribe()
+        try:
+            # 连接后先告诉客户端当前版本，客户端可据此决定是否重新拉取 /snapshot
+            self.wfile.write(f"event: hello\ndata: {self.feed.ninja_data.version}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            while True:
+                try:
+                    message = client.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self.feed.unsubscribe(client)
+
+
+class OverlayServer:
+    # 在独立线程中运行的 HTTP 服务
+
+    def __init__(self, feed, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        handler = type("BoundOverlayRequestHandler", (OverlayRequestHandler,), {"feed": feed})
+        self.feed = feed
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.feed.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,323 @@
+from PySide6.QtWidgets import *
+from PySide6.QtCore import *
+from PySide6.QtGui import *
+import math
+from board_export import BOARD_WIDTH, PADDING, SECTION_SPACING, layout_section, make_font, paint_ops
+
+# 副屏演示窗口：与主窗口共用同一个 NinjaData，只注册监听，不另建数据对象也不读文件。
+# 每个等级区域和转盘盘面都预先画成 QPixmap，数据变化时只重画变化的等级、只刷新它占据的区域；
+# 连续的修改合并成一次重画，推迟到主窗口处理完操作之后，新名称之外都只是贴图
+FONT_SCALE = 1.6
+REDRAW_DELAY = 30  # 毫秒，连续的修改合并成一次重画
+# 名单太长放不下时缩小字号，最多缩到这个比例
+MIN_FIT = 0.4
+BACKGROUND = "#FFFFFF"
+
+
+class BoardView(QWidget):
+    # 大字号的禁用名单：每个名称画成一张小图缓存起来，等级区域由这些小图拼成一张缓存的图，
+    # 名单变化时只重新拼接变化的等级，新出现的名称才需要真正画文字
+
+    def __init__(self, ninja_data, parent=None):
+        super().__init__(parent)
+        self.ninja_data = ninja_data
+        # 等级 -> (名称元组, 排版参数, 图片)
+        self._sections = {}
+        # 等级 -> 图片顶部的 y
+        self._tops = {}
+        # (名称, 颜色) -> 名称小图，排版参数变化时清空
+        self._chips = {}
+        self._chips_key = None
+        self._dirty = set(ninja_data.ranks())
+        self._fit = 1.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(REDRAW_DELAY)
+        self._timer.timeout.connect(self.redraw)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def mark_dirty(self, ranks):
+        self._dirty.update(rank for rank in ranks if rank in self.ninja_data.ranks())
+        if self._dirty and not self._timer.isActive():
+            self._timer.start()
+
+    def scale(self):
+        return max(1.0, self.width() / BOARD_WIDTH) * FONT_SCALE * self._fit
+
+    def layout_key(self):
+        return (self.width(), round(self.scale(), 3), self.devicePixelRatioF())
+
+    def chip(self, name, color, chip_op, text_op):
+        # 名称小图：底色和文字，以左上角为原点
+        pixmap = self._chips.get((name, color))
+        if pixmap is None:
+            rect = chip_op[1]
+            origin = QRectF(0, 0, rect.width(), rect.height())
+            ratio = self.devicePixelRatioF()
+            pixmap = QPixmap(math.ceil((rect.width() + 1) * ratio), math.ceil((rect.height() + 1) * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setRenderHint(QPainter.TextAntialiasing)
+            painter.translate(0.5, 0.5)
+            paint_ops(painter, [("chip", origin, color), ("text", origin) + text_op[2:]], origin)
+            painter.end()
+            self._chips[(name, color)] = pixmap
+        return pixmap
+
+    def render_section(self, rank, names, key):
+        width, scale, ratio = key
+        color = self.ninja_data.tier_color(rank)
+        padding = PADDING * scale
+        ops, bottom = layout_section(rank, color, names, scale, padding, 0, width - padding * 2)
+        height = max(1, math.ceil(bottom))
+        pixmap = QPixmap(math.ceil(width * ratio), math.ceil(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QColor(BACKGROUND))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        # layout_section 的指令依次是：标题文字，然后每个名称一条底色、一条文字
+        paint_ops(painter, ops[:1], QRectF(0, 0, width, height))
+        for chip_op, text_op in zip(ops[1::2], ops[2::2]):
+            rect = chip_op[1]
+            painter.drawPixmap(QPointF(rect.x() - 0.5, rect.y() - 0.5), self.chip(text_op[5], color, chip_op, text_op))
+        painter.end()
+        return pixmap
+
+    def redraw(self):
+        key = self.layout_key()
+        if key != self._chips_key:
+            # 字号或宽度变了，全部重画
+            self._chips.clear()
+            self._chips_key = key
+            self._dirty = set(self.ninja_data.ranks())
+        old_tops = dict(self._tops)
+        old_heights = {rank: self.section_height(rank) for rank in self._sections}
+        changed = set()
+        for rank in self._dirty:
+            names = tuple(ninja["name"] for ninja in self.ninja_data.get_ninjas(rank))
+            cached = self._sections.get(rank)
+            if cached is None or cached[:2] != (names, key):
+                self._sections[rank] = (names, key, self.render_section(rank, names, key))
+                changed.add(rank)
+        self._dirty.clear()
+
+        total = self.relayout()
+        if self.fit_to_height(total):
+            return
+
+        # 高度不变的等级只刷新自己；有等级变高或变矮时，从它开始往下整体刷新
+        region = QRegion()
+        for rank in self.ninja_data.ranks():
+            if rank not in self._tops:
+                continue
+            top, height = self._tops[rank], self.section_height(rank)
+            if old_tops.get(rank) != top or (rank in changed and old_heights.get(rank) != height):
+                region += QRect(0, min(top, old_tops.get(rank, top)), self.width(), self.height())
+                break
+            if rank in changed:
+                region += QRect(0, top, self.width(), height)
+        if not region.isEmpty():
+            self.update(region)
+
+    def section_height(self, rank):
+        pixmap = self._sections[rank][2]
+        return math.ceil(pixmap.height() / pixmap.devicePixelRatio())
+
+    def relayout(self):
+        # 计算每个等级图片的位置，返回总高度
+        y = PADDING * self.scale()
+        spacing = SECTION_SPACING * self.scale()
+        for rank in self.ninja_data.ranks():
+            if rank in self._sections:
+                self._tops[rank] = round(y)
+                y += self.section_height(rank) + spacing
+        return y
+
+    def fit_to_height(self, total):
+        # 放不下时缩小字号，内容变少后再放大；需要整体重画时返回 True
+        height = self.height()
+        if total > height and self._fit > MIN_FIT:
+            fit = max(MIN_FIT, self._fit * height / total * 0.95)
+        elif self._fit < 1.0 and total < height * 0.7:
+            fit = min(1.0, self._fit * height * 0.85 / total)
+        else:
+            return False
+        if abs(fit - self._fit) < 0.01:
+            return False
+        self._fit = fit
+        self.mark_dirty(self.ninja_data.ranks())
+        return True
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.mark_dirty(self.ninja_data.ranks())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(BACKGROUND))
+        for rank, top in self._tops.items():
+            pixmap = self._sections[rank][2]
+            rect = QRect(0, top, self.width(), self.section_height(rank))
+            if rect.intersects(event.rect()):
+                painter.drawPixmap(0, top, pixmap)
+        painter.end()
+
+
+class WheelView(QWidget):
+    # 跟随主窗口转盘的大转盘：盘面（分隔线和文字）缓存成一张图，每帧只旋转贴图并画指针
+
+    def __init__(self, scroll_wheel, parent=None):
+        super().__init__(parent)
+        self.source = scroll_wheel
+        self.items = list(scroll_wheel.items)
+        self._face = None
+        self._face_key = None
+        scroll_wheel.items_changed.connect(self.set_items)
+        scroll_wheel.animation.valueChanged.connect(self.on_rotation)
+        self.setMinimumSize(300, 300)
+
+    def set_items(self, items):
+        self.items = list(items)
+        self._face = None
+        self.update()
+
+    def wheel_rect(self):
+        size = min(self.width(), self.height())
+        return QRect((self.width() - size) // 2, (self.height() - size) // 2, size, size)
+
+    def on_rotation(self, value):
+        # 只有盘面区域需要重画
+        self.update(self.wheel_rect())
+
+    def build_face(self, size):
+        ratio = self.devicePixelRatioF()
+        face = QPixmap(int(size * ratio), int(size * ratio))
+        face.setDevicePixelRatio(ratio)
+        face.fill(Qt.transparent)
+        if not self.items:
+            return face
+        painter = QPainter(face)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        radius = size * 0.45
+        painter.translate(size / 2, size / 2)
+        painter.setPen(QPen(QColor("#2196F3"), max(2, size / 200)))
+        painter.setBrush(QColor("#FFFFFF"))
+        painter.drawEllipse(QPointF(0, 0), radius, radius)
+
+        slice_angle = 360.0 / len(self.items)
+        for i in range(len(self.items)):
+            angle = math.radians(i * slice_angle)
+            painter.drawLine(QPointF(0, 0), QPointF(radius * math.cos(angle), radius * math.sin(angle)))
+
+        # 盘面整体旋转，文字沿半径方向排列
+        font = make_font(max(12, min(size / 18, radius * math.radians(slice_angle) * 0.5)), True)
+        painter.setFont(font)
+        painter.setPen(QColor("#000000"))
+        metrics = QFontMetricsF(font)
+        for i, item in enumerate(self.items):
+            painter.save()
+            painter.rotate((i + 0.5) * slice_angle)
+            text = metrics.elidedText(item, Qt.ElideRight, radius * 0.7)
+            painter.drawText(QRectF(radius * 0.25, -metrics.height() / 2, radius * 0.7, metrics.height()),
+                             Qt.AlignCenter, text)
+            painter.restore()
+        painter.end()
+        return face
+
+    def paintEvent(self, event):
+        rect = self.wheel_rect()
+        key = (rect.width(), tuple(self.items), self.devicePixelRatioF())
+        if key != self._face_key:
+            self._face = self.build_face(rect.width())
+            self._face_key = key
+
+        painter = QPainter(self)
+        # 主窗口转盘进入低画质时，这里也不做平滑缩放
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, self.source.quality != "fast")
+        painter.setRenderHint(QPainter.Antialiasing)
+        center = QPointF(rect.center()) + QPointF(0.5, 0.5)
+        painter.save()
+        painter.translate(center)
+        painter.rotate(-self.source.current_rotation)
+        painter.drawPixmap(QPointF(-rect.width() / 2, -rect.height() / 2), self._face)
+        painter.restore()
+
+        if self.items:
+            # 指针在正上方
+            center_radius = rect.width() * 0.04
+            pointer = QPainterPath()
+            pointer.moveTo(center.x(), center.y() - center_radius * 2.5)
+            pointer.lineTo(center.x() - center_radius * 0.6, center.y() - center_radius)
+            pointer.lineTo(center.x() + center_radius * 0.6, center.y() - center_radius)
+            pointer.closeSubpath()
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor("#F44336"))
+            painter.drawPath(pointer)
+            painter.drawEllipse(center, center_radius, center_radius)
+        painter.end()
+
+
+class PresentationWindow(QWidget):
+    # 副屏上的演示窗口，按 Esc 或 F11 退出全屏/关闭
+    closed = Signal()
+
+    def __init__(self, ninja_data, scroll_wheel, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.ninja_data = ninja_data
+        self.setWindowTitle("禁用名单（演示）")
+        self.setObjectName("presentationWindow")
+        self.resize(1280, 720)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        self.board = BoardView(ninja_data)
+        layout.addWidget(self.board, 3)
+
+        wheel_panel = QWidget()
+        wheel_layout = QVBoxLayout(wheel_panel)
+        self.wheel = WheelView(scroll_wheel)
+        wheel_layout.addWidget(self.wheel, 1)
+        self.result_label = QLabel()
+        self.result_label.setAlignment(Qt.AlignCenter)
+        self.result_label.setFont(make_font(48, True))
+        wheel_layout.addWidget(self.result_label)
+        layout.addWidget(wheel_panel, 2)
+        scroll_wheel.spin_result.connect(self.result_label.setText)
+
+        ninja_data.add_listener(self.on_data_changed)
+
+    def on_data_changed(self, event, payload):
+        if event in ("add", "delete"):
+            self.board.mark_dirty({ninja["rank"] for ninja in payload})
+        elif event == "move":
+            self.board.mark_dirty({ninja["rank"] for ninja, _ in payload} | {rank for _, rank in payload})
+        elif event == "profile":
+            self.board.mark_dirty(self.ninja_data.ranks())
+
+    def show_on_second_screen(self):
+        # 有第二块屏幕时全屏显示在上面，否则作为普通窗口打开
+        parent = self.parentWidget()
+        current = parent.screen() if parent is not None else QGuiApplication.primaryScreen()
+        others = [screen for screen in QGuiApplication.screens() if screen is not current]
+        if others:
+            self.setGeometry(others[0].geometry())
+            self.showFullScreen()
+        else:
+            self.show()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.close()
+        elif event.key() == Qt.Key_F11:
+            self.showNormal() if self.isFullScreen() else self.showFullScreen()
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        self.ninja_data.remove_listener(self.on_data_changed)
+        self.closed.emit()
+        super().closeEvent(event)
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+
+class RankCounters:
+    # 每个等级的禁用数量和最近添加的忍者，启动时统计一次，
+    # 之后只根据 add/delete/move 事件增量更新，不再扫描 ninjas.json
+
+    def __init__(self, ninja_data, ranks):
+        self.ninja_data = ninja_data
+        self.ranks = list(ranks)
+        # rank -> OrderedDict(name -> created_at)，按添加顺序，末尾是最近添加的
+        self._names = {}
+        self._catalog_sizes = None
+        self.reset()
+        ninja_data.add_listener(self.on_data_changed)
+
+    def reset(self):
+        self._names = {rank: OrderedDict() for rank in self.ranks}
+        for ninja in self.ninja_data.get_ninjas():
+            self._add(ninja)
+
+    def _add(self, ninja):
+        names = self._names.setdefault(ninja["rank"], OrderedDict())
+        names[ninja["name"]] = ninja.get("created_at")
+
+    def _remove(self, name, rank):
+        self._names.get(rank, {}).pop(name, None)
+
+    def on_data_changed(self, event, payload):
+        if event == "add":
+            for ninja in payload:
+                self._add(ninja)
+        elif event == "delete":
+            for ninja in payload:
+                self._remove(ninja["name"], ninja["rank"])
+        elif event == "move":
+            # payload: [(record, 原等级), ...]
+            for ninja, old_rank in payload:
+                self._remove(ninja["name"], old_rank)
+                self._add(ninja)
+        elif event == "profile":
+            # 换成另一份名单，只有这时才重新统计
+            self.reset()
+
+    def close(self):
+        self.ninja_data.remove_listener(self.on_data_changed)
+
+    def count(self, rank):
+        return len(self._names.get(rank, ()))
+
+    def total(self):
+        return sum(len(names) for names in self._names.values())
+
+    def last_added(self, rank=None):
+        # 返回 (名称, 等级, 添加时间)，没有时返回 None
+        if rank is not None:
+            names = self._names.get(rank)
+            if not names:
+                return None
+            name = next(reversed(names))
+            return name, rank, names[name]
+
+        latest = None
+        for rank in self._names:
+            entry = self.last_added(rank)
+            if entry and (latest is None or (entry[2] or "") > (latest[2] or "")):
+                latest = entry
+        return latest
+
+    def catalog_size(self, rank=None):
+        if self._catalog_sizes is None:
+            catalog = self.ninja_data.load_catalog()
+            self._catalog_sizes = {rank: len(names) for rank, names in catalog.items()}
+        if rank is None:
+            return sum(self._catalog_sizes.values())
+        return self._catalog_sizes.get(rank, 0)
@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from ninja_record import json_default
+from utils import ban_key
+
+# 禁用名单的导入导出，逐条流式读写，支持 JSON Lines 和 CSV
+CSV_FIELDS = ["name", "rank", "created_at"]
+PROGRESS_STEP = 500  # 每处理多少条回调一次进度
+
+
+class RosterCancelled(Exception):
+    pass
+
+
+def roster_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def export_roster(records, path, progress=None, cancelled=None):
+    # 先写临时文件，完成后再替换，取消时不留下半个文件
+    tmp_path = path + ".tmp"
+    total = len(records)
+    fmt = roster_format(path)
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+
+            for i, record in enumerate(records, 1):
+                if writer:
+                    writer.writerow(record)
+                else:
+                    f.write(json.dumps(record, ensure_ascii=False, default=json_default))
+                    f.write("\n")
+
+                if i % PROGRESS_STEP == 0:
+                    if cancelled and cancelled():
+                        raise RosterCancelled()
+                    if progress:
+                        progress(i, total)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if progress:
+        progress(total, total)
+    return total
+
+
+def _read_lines(f, counter):
+    # 按字节统计读取进度（文本模式下迭代时无法使用 tell）
+    for raw in f:
+        counter[0] += len(raw)
+        yield raw.decode('utf-8-sig')
+
+
+def iter_roster(path, counter):
+    with open(path, 'rb') as f:
+        lines = _read_lines(f, counter)
+        if roster_format(path) == "csv":
+            for row in csv.DictReader(lines):
+                yield row
+        else:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def import_roster(path, existing_names, ranks, progress=None, cancelled=None):
+    # 单次遍历：用规范化名称集合去重，只收集新记录，由调用方一次性写入
+    total = os.path.getsize(path)
+    counter = [0]
+    seen = set(existing_names)
+    new_records = []
+    duplicates = 0
+    invalid = 0
+
+    for i, row in enumerate(iter_roster(path, counter), 1):
+        name = (row.get("name") or "").strip() if isinstance(row, dict) else ""
+        rank = (row.get("rank") or "").strip() if isinstance(row, dict) else ""
+        if not name or rank not in ranks:
+            invalid += 1
+        elif ban_key(name) in seen:
+            duplicates += 1
+        else:
+            seen.add(ban_key(name))
+            new_records.append({
+                "name": name,
+                "rank": rank,
+                "created_at": row.get("created_at") or datetime.now().isoformat()
+            })
+
+        if i % PROGRESS_STEP == 0:
+            if cancelled and cancelled():
+                raise RosterCancelled()
+            if progress:
+                progress(counter[0], total)
+
+    if progress:
+        progress(total, total)
+    return new_records, duplicates, invalid
@@ -3,12 +3,37 @@ from PySide6.QtCore import *
 from PySide6.QtGui import *
 import math
 import random
+from collections import deque
+
+# 画质档位
+QUALITY_FULL = "full"
+QUALITY_FAST = "fast"
+
+# 角速度阈值（度/秒），进入和退出使用不同阈值避免来回闪烁
+FAST_ENTER_VELOCITY = 540
+FAST_EXIT_VELOCITY = 360
+
+# 帧节奏统计窗口和掉帧判定（超过约 1.5 个 30fps 帧间隔）
+FRAME_WINDOW = 240
+SLOW_FRAME_MS = 50
 
 
 class ScrollWheel(QWidget):
+    # 一次转动结束后发出本次的帧节奏统计
+    spin_metrics = Signal(dict)
+    # 转动结束后指针指向的选项
+    spin_result = Signal(str)
+    # 选项变化（秘卷列表或随机抽取的忍者），演示窗口据此同步
+    items_changed = Signal(list)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.items = []
+        # 每个选项文字的宽度，只在选项第一次出现时测量
+        self._text_widths = {}
+        self.text_font = QFont(self.font())
+        self.text_font.setBold(True)
+        self.text_font.setPointSize(16)
         self.current_rotation = 0
         self.target_rotation = 0
         self.is_spinning = False
@@ -17,6 +42,19 @@ class ScrollWheel(QWidget):
         self.animation.setEasingCurve(QEasingCurve.OutCubic)
         self.animation.finished.connect(self.on_spin_finished)
 
+        # 自适应画质：转得太快时关闭抗锯齿和文字
+        self.adaptive_quality = True
+        self.quality = QUALITY_FULL
+        self.angular_velocity = 0.0
+        self._velocity_clock = QElapsedTimer()
+
+        # 帧节奏统计
+        self._frame_clock = QElapsedTimer()
+        self._last_frame_ms = None
+        self._frame_intervals = deque(maxlen=FRAME_WINDOW)
+        self._paint_times = deque(maxlen=FRAME_WINDOW)
+        self._fast_frames = 0
+
         # 设置最小尺寸
         self.setMinimumSize(300, 300)
 
@@ -26,18 +64,93 @@ class ScrollWheel(QWidget):
 
     @rotation.setter
     def rotation(self, value):
+        self.update_velocity(value)
         self.current_rotation = value
         self.update()
 
+    def update_velocity(self, value):
+        # 根据两次动画步进之间的角度差估算角速度
+        if not self.is_spinning or not self._velocity_clock.isValid():
+            self.angular_velocity = 0.0
+        else:
+            elapsed = self._velocity_clock.restart()
+            if elapsed > 0:
+                velocity = abs(value - self.current_rotation) * 1000.0 / elapsed
+                # 简单平滑，避免单帧抖动导致画质来回切换
+                self.angular_velocity = self.angular_velocity * 0.5 + velocity * 0.5
+        self.update_quality()
+
+    def update_quality(self):
+        # 按当前角速度切换画质：超过 FAST_ENTER_VELOCITY 才降低，低于 FAST_EXIT_VELOCITY 才恢复
+        if not self.adaptive_quality:
+            self.quality = QUALITY_FULL
+        elif self.quality == QUALITY_FULL and self.angular_velocity > FAST_ENTER_VELOCITY:
+            self.quality = QUALITY_FAST
+        elif self.quality == QUALITY_FAST and self.angular_velocity < FAST_EXIT_VELOCITY:
+            self.quality = QUALITY_FULL
+
+    def set_adaptive_quality(self, enabled):
+        self.adaptive_quality = enabled
+        if not enabled:
+            self.quality = QUALITY_FULL
+            self.update()
+
+    def reset_frame_metrics(self):
+        self._frame_intervals.clear()
+        self._paint_times.clear()
+        self._fast_frames = 0
+        self._last_frame_ms = None
+        self._frame_clock.start()
+
+    def frame_metrics(self):
+        intervals = list(self._frame_intervals)
+        paints = list(self._paint_times)
+        frames = len(paints)
+        avg_interval = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            "frames": frames,
+            "fps": 1000.0 / avg_interval if avg_interval else 0.0,
+            "avg_interval_ms": avg_interval,
+            "max_interval_ms": max(intervals) if intervals else 0.0,
+            "slow_frames": sum(1 for i in intervals if i > SLOW_FRAME_MS),
+            "avg_paint_ms": sum(paints) / frames if frames else 0.0,
+            "max_paint_ms": max(paints) if paints else 0.0,
+            "fast_quality_frames": self._fast_frames,
+        }
+
     def set_items(self, items):
+        items = list(items)
+        if items == self.items:
+            return
+        widths = self._text_widths
+        metrics = QFontMetrics(self.text_font)
+        self._text_widths = {item: widths[item] if item in widths else metrics.horizontalAdvance(item)
+                             for item in items}
         self.items = items
         self.update()
+        self.items_changed.emit(items)
+
+    def update_items(self, removed, added):
+        # 只按位置删除、插入变化的选项，不重建整个列表：removed/added 为 [(位置, 选项)]，位置从小到大
+        for index, item in reversed(removed):
+            del self.items[index]
+            self._text_widths.pop(item, None)
+        metrics = QFontMetrics(self.text_font)
+        for index, item in added:
+            self.items.insert(index, item)
+            if item not in self._text_widths:
+                self._text_widths[item] = metrics.horizontalAdvance(item)
+        self.update()
+        self.items_changed.emit(self.items)
 
     def spin(self):
         if self.is_spinning or not self.items:
             return
 
         self.is_spinning = True
+        self.angular_velocity = 0.0
+        self._velocity_clock.start()
+        self.reset_frame_metrics()
 
         # 随机选择一个目标角度（确保至少转动720度）
         target_item = random.choice(range(len(self.items)))
@@ -51,13 +164,31 @@ class ScrollWheel(QWidget):
     def on_spin_finished(self):
         self.is_spinning = False
         self.current_rotation = self.target_rotation % 360
+        # 停下后恢复完整画质
+        self.angular_velocity = 0.0
+        self.quality = QUALITY_FULL
+        self.update()
+        self.spin_metrics.emit(self.frame_metrics())
+        self.spin_result.emit(self.current_item())
+
+    def current_item(self):
+        # 指针在正上方（270°），第 i 项占据 [i*slice - rotation, (i+1)*slice - rotation)
+        if not self.items:
+            return None
+        slice_angle = 360.0 / len(self.items)
+        index = int(((270 + self.current_rotation) % 360) // slice_angle)
+        return self.items[min(index, len(self.items) - 1)]
 
     def paintEvent(self, event):
         if not self.items:
             return
 
+        paint_clock = QElapsedTimer()
+        paint_clock.start()
+        fast = self.quality == QUALITY_FAST
+
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.Antialiasing, not fast)
 
         # 计算中心点和半径
         center = self.rect().center()
@@ -80,42 +211,34 @@ class ScrollWheel(QWidget):
                              radius * math.sin(math.radians(i * slice_angle)))
         painter.restore()
 
-        # 单独绘制文字，保持水平
-        for i, item in enumerate(self.items):
+        # 单独绘制文字，保持水平（高速转动时看不清，直接跳过）
+        if not fast:
             painter.save()
-
-            # 设置文字样式
-            font = painter.font()
-            font.setBold(True)
-            font.setPointSize(16)
-            painter.setFont(font)
+            painter.setFont(self.text_font)
             painter.setPen(QColor("#000000"))
+            text_height = painter.fontMetrics().height()
+            for i, item in enumerate(self.items):
+                # 计算文字位置
+                angle = math.radians(i * slice_angle - self.current_rotation)
+                next_angle = math.radians((i + 1) * slice_angle - self.current_rotation)
+                mid_angle = (angle + next_angle) / 2
+
+                # 将文字放在扇形区域的中心位置
+                text_radius = radius * 0.65
+                text_x = center.x() + text_radius * math.cos(mid_angle)
+                text_y = center.y() + text_radius * math.sin(mid_angle)
 
-            # 计算文字位置
-            angle = math.radians(i * slice_angle - self.current_rotation)
-            next_angle = math.radians((i + 1) * slice_angle - self.current_rotation)
-            mid_angle = (angle + next_angle) / 2
-
-            # 将文字放在扇形区域的中心位置
-            text_radius = radius * 0.65
-            text_x = center.x() + text_radius * math.cos(mid_angle)
-            text_y = center.y() + text_radius * math.sin(mid_angle)
-
-            # 计算文字边界框
-            metrics = painter.fontMetrics()
-            text_width = metrics.horizontalAdvance(item)
-            text_height = metrics.height()
-
-            # 创建文字边界框
-            text_rect = QRectF(
-                text_x - text_width / 2,
-                text_y - text_height / 2,
-                text_width,
-                text_height
-            )
-
-            # 绘制文字
-            painter.drawText(text_rect, Qt.AlignCenter, item)
+                # 创建文字边界框，宽度用缓存的测量结果
+                text_width = self._text_widths[item]
+                text_rect = QRectF(
+                    text_x - text_width / 2,
+                    text_y - text_height / 2,
+                    text_width,
+                    text_height
+                )
+
+                # 绘制文字
+                painter.drawText(text_rect, Qt.AlignCenter, item)
             painter.restore()
 
         # 绘制中心圆和指针
@@ -142,6 +265,19 @@ class ScrollWheel(QWidget):
         # 绘制中心圆
         painter.setBrush(QColor("#F44336"))
         painter.drawEllipse(center, center_radius, center_radius)
+        painter.end()
+
+        if self.is_spinning:
+            self.record_frame(paint_clock.nsecsElapsed() / 1e6, fast)
+
+    def record_frame(self, paint_ms, fast):
+        now = self._frame_clock.elapsed()
+        if self._last_frame_ms is not None:
+            self._frame_intervals.append(now - self._last_frame_ms)
+        self._last_frame_ms = now
+        self._paint_times.append(paint_ms)
+        if fast:
+            self._fast_frames += 1
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
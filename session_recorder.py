@@ -0,0 +1,98 @@
+import functools
+import json
+import os
+import time
+from datetime import datetime
+
+# 操作录制：把主窗口的每个操作（方法名、参数、耗时）逐行写入 JSON Lines 文件，
+# 第一行记下开始时的完整数据和等级配置，session_replay.py 据此在离屏窗口里重放。
+# 主窗口中需要录制的方法用 @recorded 标记，参数必须能序列化成 JSON。
+# 重放操作得不到的变化（切换到另一个方案、其他实例修改了数据）记为 state 行，
+# 内容是变化后那个方案的完整数据，回放时直接写入
+SESSION_FORMAT = 2
+# 格式 1 没有 state 行，开始信息里也没有方案名，同样可以回放
+SUPPORTED_FORMATS = (1, 2)
+
+
+def recorded(method):
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        recorder = getattr(self, "session_recorder", None)
+        if recorder is None or recorder.depth:
+            # 未录制，或是其他被录制操作内部的调用
+            return method(self, *args)
+        recorder.depth += 1
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            recorder.depth -= 1
+            recorder.record(method.__name__, args, time.perf_counter() - start)
+    return wrapper
+
+
+class SessionRecorder:
+
+    def __init__(self, path, ninja_data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.depth = 0
+        self.count = 0
+        self._start = time.monotonic()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({
+            "type": "start",
+            "format": SESSION_FORMAT,
+            "time": datetime.now().isoformat(),
+            "tiers": ninja_data.tiers,
+            "profile": ninja_data.profile,
+            "state": self._state(ninja_data),
+        })
+
+    @staticmethod
+    def _state(ninja_data):
+        state = ninja_data.snapshot_state()
+        return {
+            "ninjas": {rank: [dict(n, rank=rank) for n in records]
+                       for rank, records in state["shards"].items() if records},
+            "rules": state["rules"],
+            "scrolls": state["scrolls"],
+        }
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # 程序崩溃时也要保留已录制的部分
+        self._file.flush()
+
+    def record(self, action, args, elapsed):
+        self.count += 1
+        self._write({
+            "t": round(time.monotonic() - self._start, 4),
+            "action": action,
+            "args": list(args),
+            "ms": round(elapsed * 1000, 3),
+        })
+
+    def record_state(self, ninja_data, reason):
+        # 在当前操作的记录之前写入，回放时先还原数据再执行操作
+        self._write({
+            "t": round(time.monotonic() - self._start, 4),
+            "type": "state",
+            "reason": reason,
+            "profile": ninja_data.profile,
+            "state": self._state(ninja_data),
+        })
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_session(path):
+    # 返回 (开始信息, [操作或 state 行])
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get("type") != "start" or header.get("format") not in SUPPORTED_FORMATS:
+            raise ValueError(f"不是操作录制文件：{path}")
+        actions = [json.loads(line) for line in f if line.strip()]
+    return header, actions
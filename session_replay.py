@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from session_recorder import read_session
+from utils import DEFAULT_PROFILE, NinjaData, save_settings
+
+# 在离屏窗口中重放录制的操作，统计每类操作的耗时分布，用作性能回归测试
+#   python session_replay.py data/sessions/session-20250101-200000.jsonl
+#   python session_replay.py session.jsonl --speed 1      # 按录制时的节奏
+#   python session_replay.py session.jsonl --repeat 5 --json
+#   python session_replay.py session.jsonl --diagnostics  # 附带回放前后的内存和对象变化
+
+
+def seed_profile(data_dir, profile, state):
+    # 把某个方案的数据整体写成 state
+    if profile != DEFAULT_PROFILE:
+        os.makedirs(os.path.join(data_dir, "profiles", profile), exist_ok=True)
+    ninja_data = NinjaData(
+        data_file=os.path.join(data_dir, "ninjas.json"),
+        rules_file=os.path.join(data_dir, "rules.txt"),
+        scrolls_file=os.path.join(data_dir, "scrolls.json"),
+        catalog_file=os.path.join(data_dir, "catalog.json"),
+        profiles_dir=os.path.join(data_dir, "profiles"),
+        profile=profile,
+        tiers_file=os.path.join(data_dir, "tiers.json"),
+    )
+    ninja_data.restore_state(state)
+
+
+def seed_data_dir(data_dir, header):
+    # 在临时目录中还原录制开始时的等级配置和数据，主窗口从录制时的方案启动
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "tiers.json"), 'w', encoding='utf-8') as f:
+        json.dump({"tiers": header["tiers"]}, f, ensure_ascii=False, indent=2)
+    profile = header.get("profile", DEFAULT_PROFILE)
+    seed_profile(data_dir, profile, header["state"])
+    save_settings({"profile": profile}, os.path.join(data_dir, "settings.json"))
+
+
+def apply_state(window, entry):
+    # state 行：先把那个方案的文件写成录制时的数据；是当前方案时（其他实例的修改）
+    # 再像文件监视那样重新读取，差异按外部修改发出事件，不进入撤销栈
+    seed_profile("data", entry["profile"], entry["state"])
+    if entry["profile"] == window.ninja_data.profile:
+        window.ninja_data.reload()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(latencies):
+    # {操作: {count, p50, p90, p99, max, first, last}}，单位毫秒；
+    # first/last 是前四分之一和后四分之一的中位数，用来看越用越慢的问题
+    report = {}
+    for action, values in latencies.items():
+        quarter = max(1, len(values) // 4)
+        report[action] = {
+            "count": len(values),
+            "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9),
+            "p99": percentile(values, 0.99),
+            "max": max(values),
+            "first": statistics.median(values[:quarter]),
+            "last": statistics.median(values[-quarter:]),
+        }
+    return report
+
+
+def replay(path, speed=0.0, repeat=1, diagnostics=False):
+    header, actions = read_session(path)
+    image_dir = os.path.abspath("images")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ninja-replay-") as work_dir:
+        seed_data_dir(os.path.join(work_dir, "data"), header)
+        if os.path.isdir(image_dir):
+            # 头像也参与加载和绘制；不支持符号链接时没有头像也能回放
+            try:
+                os.symlink(image_dir, os.path.join(work_dir, "images"), target_is_directory=True)
+            except OSError:
+                pass
+        # 主窗口使用相对路径 data/ 和 images/
+        os.chdir(work_dir)
+        try:
+            return _run(actions, speed, repeat, diagnostics)
+        finally:
+            os.chdir(cwd)
+
+
+def _run(actions, speed, repeat, diagnostics):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if diagnostics:
+        import diagnostics as diag
+        diag.start_tracing()
+    from PySide6.QtWidgets import QApplication
+    from ninja_manager import NinjaManager
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    app.setStyle("Fusion")
+    window = NinjaManager()
+    window.show()
+    app.processEvents()
+    if speed > 0:
+        window.scroll_wheel.animation.setDuration(int(3000 / speed))
+    else:
+        # 全速回放时转盘动画也缩到最短，否则后面的转动都会因为还在转而被忽略
+        window.scroll_wheel.animation.setDuration(1)
+
+    latencies = {}
+    failures = []
+    memory = None
+    if diagnostics:
+        baseline = diag.take_snapshot(window)
+    try:
+        for _ in range(repeat):
+            previous = 0.0
+            for entry in actions:
+                if entry.get("type") == "state":
+                    apply_state(window, entry)
+                    app.processEvents()
+                    continue
+                if speed > 0:
+                    # 等到录制时的间隔，期间照常处理事件（动画、缩略图等）
+                    deadline = time.perf_counter() + (entry["t"] - previous) / speed
+                    while time.perf_counter() < deadline:
+                        app.processEvents()
+                        time.sleep(0.001)
+                    previous = entry["t"]
+                method = getattr(window, entry["action"], None)
+                if method is None:
+                    failures.append((entry["action"], "主窗口没有这个操作"))
+                    continue
+                start = time.perf_counter()
+                try:
+                    method(*entry["args"])
+                except Exception as e:
+                    failures.append((entry["action"], repr(e)))
+                    continue
+                # 计入操作引起的重新布局和绘制
+                app.processEvents()
+                latencies.setdefault(entry["action"], []).append((time.perf_counter() - start) * 1000)
+            if speed <= 0:
+                # 让最后一次转动结束，下一轮的转动不会被跳过
+                while window.scroll_wheel.is_spinning:
+                    app.processEvents()
+        if diagnostics:
+            # 先执行排队的删除，剩下的增长才可能是泄漏
+            diag.flush_deleted_objects()
+            memory = diag.format_report(diag.take_snapshot(window), baseline)
+    finally:
+        window.close()
+        app.processEvents()
+    return summarize(latencies), failures, memory
+
+
+def print_report(report, failures, memory=None):
+    print(f"{'操作':<24}{'次数':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'前1/4':>9}{'后1/4':>9}")
+    for action, row in sorted(report.items(), key=lambda item: -item[1]["p90"]):
+        print(f"{action:<24}{row['count']:>6}" +
+              "".join(f"{row[key]:>9.2f}" for key in ("p50", "p90", "p99", "max", "first", "last")))
+    for action, error in failures:
+        print(f"失败：{action}：{error}", file=sys.stderr)
+    if memory is not None:
+        print()
+        print(memory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python session_replay.py", description="重放录制的操作并统计耗时（毫秒）")
+    parser.add_argument("session", help="工具菜单中录制的 .jsonl 文件")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="回放速度：0 为不等待（默认），1 为按录制时的节奏，2 为两倍速")
+    parser.add_argument("--repeat", type=int, default=1, help="在同一个窗口中重复回放的次数，默认 1")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--diagnostics", action="store_true", help="同时报告回放前后的内存和 Qt 对象变化")
+    args = parser.parse_args(argv)
+
+    try:
+        report, failures, memory = replay(args.session, args.speed, max(1, args.repeat), args.diagnostics)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        json.dump({"actions": report, "failures": failures, "diagnostics": memory}, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        print_report(report, failures, memory)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
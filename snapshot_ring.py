@@ -0,0 +1,235 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from utils import file_lock, roster_diff
+
+# 自动快照：数据变化达到一定次数或时间后，把当前方案的完整数据交给后台线程，
+# 与上一份快照比较后只把差异压缩保存，每隔若干份保存一次完整数据作为关键帧。
+# 文件名：<编号>-<时间>-<k 关键帧 | d 增量>.json.gz，存放在 snapshots/<方案>/ 下
+CHANGES_PER_SNAPSHOT = 20
+SNAPSHOT_INTERVAL = 300  # 秒
+KEYFRAME_EVERY = 20
+# 至少保留这么多份快照，超出时按关键帧整组删除最旧的
+MAX_SNAPSHOTS = 60
+TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def snapshot_delta(old, new):
+    # 两份快照数据的差异；名单按名称比较，规则和秘卷有变化时整份保存
+    flatten = lambda state: [dict(n, rank=rank) for rank, ninjas in state["ninjas"].items() for n in ninjas]
+    delta = {}
+    for event, payload in roster_diff(flatten(old), flatten(new)):
+        if event == "delete":
+            delta["delete"] = [n["name"] for n in payload]
+        elif event == "move":
+            delta["move"] = [[n["name"], n["rank"]] for n, _ in payload]
+        else:
+            delta["add"] = payload
+    if new["rules"] != old["rules"]:
+        delta["rules"] = new["rules"]
+    if new["scrolls"] != old["scrolls"]:
+        delta["scrolls"] = new["scrolls"]
+    return delta
+
+
+def apply_delta(state, delta):
+    moves = dict(delta.get("move", []))
+    gone = set(delta.get("delete", [])) | set(moves)
+    ninjas = {rank: [n for n in records if n["name"] not in gone] for rank, records in state["ninjas"].items()}
+    moved = [dict(n, rank=moves[n["name"]]) for records in state["ninjas"].values()
+             for n in records if n["name"] in moves]
+    by_name = {n["name"]: n for n in moved}
+    # 移动和新增的记录按差异中的顺序追加到目标等级末尾，与 NinjaData 的行为一致
+    for name, rank in delta.get("move", []):
+        ninjas.setdefault(rank, []).append(by_name[name])
+    for ninja in delta.get("add", []):
+        ninjas.setdefault(ninja["rank"], []).append(ninja)
+    return {
+        "ninjas": {rank: records for rank, records in ninjas.items() if records},
+        "rules": delta.get("rules", state["rules"]),
+        "scrolls": delta.get("scrolls", state["scrolls"]),
+    }
+
+
+class SnapshotRing:
+
+    def __init__(self, snapshot_dir="data/snapshots"):
+        self.snapshot_dir = snapshot_dir
+        self.ninja_data = None
+        self.pending = 0
+        self.last_time = time.monotonic()
+        # 后台线程最近写入的一份快照：(目录, 编号, 数据)，用来计算下一份的差异
+        self._last = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def attach(self, ninja_data):
+        self.ninja_data = ninja_data
+        ninja_data.snapshots = self
+        ninja_data.add_listener(self.on_data_changed)
+        if not self.list():
+            self.snapshot()
+
+    def profile_dir(self, profile=None):
+        if profile is None:
+            profile = self.ninja_data.profile
+        return os.path.join(self.snapshot_dir, quote(profile, safe=''))
+
+    def on_data_changed(self, event, payload):
+        if event == "profile":
+            # 换了方案，计数重新开始；还没有快照的方案先存一份
+            self.pending = 0
+            self.last_time = time.monotonic()
+            if not self.list():
+                self.snapshot()
+            return
+        self.pending += 1
+        self.maybe_snapshot()
+
+    def maybe_snapshot(self):
+        # 由数据变化和界面的定时器调用
+        if self.pending and (self.pending >= CHANGES_PER_SNAPSHOT or
+                             time.monotonic() - self.last_time >= SNAPSHOT_INTERVAL):
+            self.snapshot()
+
+    def snapshot(self):
+        # 界面线程上只复制各分片的列表，比较、压缩和写文件都在后台线程
+        self.pending = 0
+        self.last_time = time.monotonic()
+        self._queue.put((self.profile_dir(), self.ninja_data.snapshot_state(), datetime.now()))
+
+    def wait(self):
+        self._queue.join()
+
+    def close(self):
+        if self.ninja_data is not None:
+            if self.pending:
+                self.snapshot()
+            self.ninja_data.remove_listener(self.on_data_changed)
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except (OSError, ValueError, KeyError):
+                # 快照失败不影响正常使用，下次再试
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _files(self, directory):
+        # [(编号, 文件名)]，从旧到新
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        return sorted((int(name.split("-")[0]), name) for name in names if name.endswith(".json.gz"))
+
+    def _read(self, directory, name):
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _materialize(self, directory, snapshot_id):
+        # 从最近的关键帧开始依次应用增量
+        files = [(i, name) for i, name in self._files(directory) if i <= snapshot_id]
+        start = max((k for k, (_, name) in enumerate(files) if name.endswith("-k.json.gz")), default=None)
+        if start is None or files[-1][0] != snapshot_id:
+            return None
+        state = self._read(directory, files[start][1])
+        for _, name in files[start + 1:]:
+            state = apply_delta(state, self._read(directory, name))
+        return state
+
+    def _write(self, directory, shards, moment):
+        state = {
+            "ninjas": {rank: [dict(n, rank=rank) for n in records] for rank, records in shards["shards"].items()
+                       if records},
+            "rules": shards["rules"],
+            "scrolls": shards["scrolls"],
+        }
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(os.path.join(directory, ".lock")):
+            files = self._files(directory)
+            last_id = files[-1][0] if files else 0
+            previous = None
+            if files:
+                if self._last and self._last[:2] == (directory, last_id):
+                    previous = self._last[2]
+                else:
+                    previous = self._materialize(directory, last_id)
+            if previous == state:
+                return
+
+            # 距上一个关键帧太远、或差异无法准确还原时保存完整数据
+            since_keyframe = 0
+            for _, name in reversed(files):
+                if name.endswith("-k.json.gz"):
+                    break
+                since_keyframe += 1
+            content, kind = state, "k"
+            if previous is not None and since_keyframe + 1 < KEYFRAME_EVERY:
+                delta = snapshot_delta(previous, state)
+                if apply_delta(previous, delta) == state:
+                    content, kind = delta, "d"
+
+            snapshot_id = last_id + 1
+            name = f"{snapshot_id:06d}-{moment.strftime(TIME_FORMAT)}-{kind}.json.gz"
+            tmp_path = os.path.join(directory, name + ".tmp")
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, os.path.join(directory, name))
+            self._last = (directory, snapshot_id, state)
+            self._rotate(directory)
+
+    def _rotate(self, directory):
+        files = self._files(directory)
+        keyframes = [k for k, (_, name) in enumerate(files) if name.endswith("-k.json.gz")]
+        # 删掉最旧的一组后仍有足够多的快照时才删
+        drop = 0
+        for k in keyframes[1:]:
+            if len(files) - k < MAX_SNAPSHOTS:
+                break
+            drop = k
+        for _, name in files[:drop]:
+            os.remove(os.path.join(directory, name))
+
+    # 以下供恢复界面和损坏修复使用
+
+    def list(self, profile=None):
+        # [(编号, 时间, 是否关键帧)]，最新的在前
+        snapshots = []
+        for snapshot_id, name in reversed(self._files(self.profile_dir(profile))):
+            _, stamp, kind = name[:-len(".json.gz")].split("-")
+            snapshots.append((snapshot_id, datetime.strptime(stamp, TIME_FORMAT), kind == "k"))
+        return snapshots
+
+    def load(self, snapshot_id, profile=None):
+        # 某份快照的完整数据：{"ninjas": {等级: [记录]}, "rules": 文本, "scrolls": [...]}
+        directory = self.profile_dir(profile)
+        if not os.path.isdir(directory):
+            return None
+        with file_lock(os.path.join(directory, ".lock")):
+            try:
+                return self._materialize(directory, snapshot_id)
+            except (OSError, ValueError, KeyError):
+                return None
+
+    def latest(self, profile=None):
+        snapshots = self.list(profile)
+        return self.load(snapshots[0][0], profile) if snapshots else None
+
+    def disk_usage(self, profile=None):
+        directory = self.profile_dir(profile)
+        return sum(os.path.getsize(os.path.join(directory, name)) for _, name in self._files(directory))
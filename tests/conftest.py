@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# 程序的模块都在仓库根目录，测试直接导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import NinjaData
+
+
+@pytest.fixture
+def ninja_data(tmp_path):
+    # 所有数据文件都放在临时目录里
+    data_dir = tmp_path / "data"
+    return NinjaData(
+        str(data_dir / "ninjas.json"), str(data_dir / "rules.txt"), str(data_dir / "scrolls.json"),
+        str(data_dir / "catalog.json"), str(data_dir / "profiles"), tiers_file=str(data_dir / "tiers.json"))
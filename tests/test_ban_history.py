@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timedelta
+
+from ban_history import INDEX_ENTRY, BanHistory
+
+START = datetime(2026, 1, 5, 20, 0)
+
+
+def ninja(name, rank="S"):
+    return {"name": name, "rank": rank, "created_at": START.isoformat()}
+
+
+def index_entries(history_dir):
+    with open(os.path.join(history_dir, "history.idx"), 'rb') as f:
+        return list(INDEX_ENTRY.iter_unpack(f.read()))
+
+
+def test_two_writers_index_each_event_once(tmp_path):
+    history_dir = str(tmp_path)
+    gui = BanHistory(history_dir)
+    gui.record("ban", [ninja("旗木卡卡西")], START)
+
+    # 命令行工具在另一个进程里追加一条并退出
+    cli = BanHistory(history_dir)
+    cli.record("ban", [ninja("迈特凯", "A")], START + timedelta(minutes=1))
+    cli.close()
+
+    # 界面再记录时会先回放命令行写入的事件
+    gui.record("ban", [ninja("宇智波鼬")], START + timedelta(minutes=2))
+    gui.close()
+
+    assert gui.event_count() == 3
+    offsets = [offset for _, offset in index_entries(history_dir)]
+    assert len(offsets) == 3
+    assert len(set(offsets)) == 3
+
+    reopened = BanHistory(history_dir)
+    assert reopened.event_count() == 3
+    events = reopened.events_between(START, START + timedelta(hours=1))
+    assert [event["name"] for event in events] == ["旗木卡卡西", "迈特凯", "宇智波鼬"]
+    assert reopened.rank_totals() == {"S": {"bans": 2, "unbans": 0}, "A": {"bans": 1, "unbans": 0}}
+
+
+def test_interleaved_writers_keep_reopened_index_consistent(tmp_path):
+    history_dir = str(tmp_path)
+    first = BanHistory(history_dir)
+    second = BanHistory(history_dir)
+    for i in range(10):
+        writer = first if i % 2 == 0 else second
+        writer.record("ban", [ninja(f"忍者{i}")], START + timedelta(minutes=i))
+    first.close()
+    second.close()
+
+    assert len(index_entries(history_dir)) == 10
+    reopened = BanHistory(history_dir)
+    assert reopened.event_count() == 10
+    events = reopened.events_between(START, START + timedelta(hours=1))
+    assert [event["name"] for event in events] == [f"忍者{i}" for i in range(10)]
+
+
+def test_event_without_index_entry_is_indexed_on_replay(tmp_path):
+    history_dir = str(tmp_path)
+    history = BanHistory(history_dir)
+    history.record("ban", [ninja("旗木卡卡西")], START)
+    history.close()
+
+    # 另一个实例写完日志还没写索引就退出了
+    with open(os.path.join(history_dir, "history.jsonl"), 'ab') as f:
+        f.write(('{"time": "%s", "event": "ban", "name": "迈特凯", "rank": "A"}\n'
+                 % (START + timedelta(minutes=1)).isoformat()).encode('utf-8'))
+
+    reopened = BanHistory(history_dir)
+    assert reopened.event_count() == 2
+    assert len(index_entries(history_dir)) == 2
+
+
+def test_duplicate_index_entries_are_dropped_on_load(tmp_path):
+    history_dir = str(tmp_path)
+    history = BanHistory(history_dir)
+    history.record("ban", [ninja("旗木卡卡西")], START)
+    history.record("ban", [ninja("迈特凯", "A")], START + timedelta(minutes=1))
+    history.checkpoint()
+
+    # 修复前的版本回放时会把别人的索引项再写一遍
+    index_file = os.path.join(history_dir, "history.idx")
+    with open(index_file, 'rb') as f:
+        data = f.read()
+    with open(index_file, 'ab') as f:
+        f.write(data[INDEX_ENTRY.size:])
+
+    reopened = BanHistory(history_dir)
+    assert reopened.event_count() == 2
+    assert len(index_entries(history_dir)) == 2
+    assert len(reopened.events_between(START, START + timedelta(hours=1))) == 2
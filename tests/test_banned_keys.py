@@ -0,0 +1,34 @@
+from utils import NinjaData, ban_key
+
+
+def test_banned_keys_follow_local_changes(ninja_data):
+    # 旧名单里存的是别名
+    ninja_data.add_ninjas([ninja_data.new_ninja("卡卡西", "S"), ninja_data.new_ninja("迈特凯", "A")])
+    assert ninja_data.banned_keys() == {ban_key("旗木卡卡西"), ban_key("凯")}
+    assert [ninja["name"] for ninja in ninja_data.find_banned(["旗木卡卡西", "凯", "宇智波鼬"])] == ["卡卡西", "迈特凯"]
+
+    # 返回的集合是副本，调用方修改它不影响缓存
+    ninja_data.banned_keys().add(ban_key("宇智波鼬"))
+    assert ban_key("宇智波鼬") not in ninja_data.banned_keys()
+
+    ninja_data.add_ninjas([ninja_data.new_ninja("宇智波鼬", "S")])
+    ninja_data.delete_ninjas(["卡卡西"])
+    assert ninja_data.banned_keys() == {ban_key("鼬"), ban_key("迈特凯")}
+    assert ninja_data.find_banned(["卡卡西"]) == []
+    assert [ninja["name"] for ninja in ninja_data.find_banned(["鼬"])] == ["宇智波鼬"]
+
+
+def test_banned_keys_follow_other_writers(tmp_path, ninja_data):
+    ninja_data.add_ninjas([ninja_data.new_ninja("旗木卡卡西", "S")])
+    assert ninja_data.banned_keys() == {ban_key("旗木卡卡西")}
+
+    # 另一个实例（例如命令行工具）改了同一个分片
+    data_dir = tmp_path / "data"
+    other = NinjaData(
+        str(data_dir / "ninjas.json"), str(data_dir / "rules.txt"), str(data_dir / "scrolls.json"),
+        str(data_dir / "catalog.json"), str(data_dir / "profiles"), tiers_file=str(data_dir / "tiers.json"))
+    other.add_ninjas([other.new_ninja("鸣人", "S")])
+
+    ninja_data.reload()
+    assert ninja_data.banned_keys() == {ban_key("旗木卡卡西"), ban_key("漩涡鸣人")}
+    assert [ninja["name"] for ninja in ninja_data.find_banned(["漩涡鸣人"])] == ["鸣人"]
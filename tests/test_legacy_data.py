@@ -0,0 +1,36 @@
+import json
+
+from utils import NinjaData
+
+
+def open_data(data_dir):
+    return NinjaData(
+        str(data_dir / "ninjas.json"), str(data_dir / "rules.txt"), str(data_dir / "scrolls.json"),
+        str(data_dir / "catalog.json"), str(data_dir / "profiles"), tiers_file=str(data_dir / "tiers.json"))
+
+
+def test_legacy_file_is_split_into_shards(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    legacy = [{"name": "旗木卡卡西", "rank": "S"}, {"name": "迈特凯", "rank": "A"}]
+    (data_dir / "ninjas.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+
+    ninja_data = open_data(data_dir)
+    assert [ninja["name"] for ninja in ninja_data.get_ninjas()] == ["旗木卡卡西", "迈特凯"]
+    assert (data_dir / "ninjas.json.bak").exists()
+    assert ninja_data.recovered == []
+
+
+def test_corrupt_legacy_file_is_reported(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "ninjas.json").write_text('[{"name": "旗木卡卡', encoding="utf-8")
+
+    ninja_data = open_data(data_dir)
+    # 损坏的旧文件改名保留，不能悄悄当成空名单迁移
+    [(path, backup, restored)] = ninja_data.recovered
+    assert path == str(data_dir / "ninjas.json")
+    assert ".corrupt-" in backup and not restored
+    assert not (data_dir / "ninjas.json").exists()
+    assert not (data_dir / "ninjas.json.bak").exists()
+    assert ninja_data.get_ninjas() == []
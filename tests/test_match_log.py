@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+
+from match_log import LOSS, WIN, MatchLog
+
+MATCHES_PER_WRITER = 150
+
+
+def write_matches(match_dir, writer):
+    # 在单独的进程里记录比赛，每场都用一个新的忍者名，字符串表和列文件一起增长
+    match_log = MatchLog(match_dir)
+    for i in range(MATCHES_PER_WRITER):
+        match_log.record(f"{writer}-{i}", WIN if i % 2 else LOSS, writer, f"秘卷{i % 3}")
+    match_log.close()
+
+
+def test_two_writers_interleaved(tmp_path):
+    match_dir = str(tmp_path / "matches")
+    gui = MatchLog(match_dir)
+    cli = MatchLog(match_dir)
+    gui.record("旗木卡卡西", WIN, "S")
+    cli.record("迈特凯", LOSS, "A", "秘卷")
+    gui.record("宇智波鼬", WIN, "S", "秘卷")
+    cli.close()
+    gui.close()
+
+    assert gui.rows == 3
+    assert gui.overall == [2, 1]
+    assert [match["ninja"] for match in gui.recent()] == ["宇智波鼬", "迈特凯", "旗木卡卡西"]
+    assert len(gui.strings) == len(set(gui.strings))
+
+    reopened = MatchLog(match_dir)
+    assert reopened.rows == 3
+    assert reopened.summary("opponent") == [("S", 2, 0), ("A", 0, 1)]
+
+
+def test_two_processes_append_concurrently(tmp_path):
+    match_dir = str(tmp_path / "matches")
+    MatchLog(match_dir)
+    writers = [multiprocessing.Process(target=write_matches, args=(match_dir, writer)) for writer in ("S", "A")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    match_log = MatchLog(match_dir)
+    assert match_log.rows == 2 * MATCHES_PER_WRITER
+    # 每个字符串只分到一个编号，每一列都对齐到同一场
+    assert len(match_log.strings) == len(set(match_log.strings))
+    for column in os.listdir(os.path.join(match_dir, "000000")):
+        size = os.path.getsize(os.path.join(match_dir, "000000", column))
+        assert size == 2 * MATCHES_PER_WRITER * (8 if column.endswith(".d") else 4 if column.endswith(".I") else 1)
+    matches = match_log.recent(2 * MATCHES_PER_WRITER)
+    for match in matches:
+        writer, i = match["ninja"].split("-")
+        assert match["opponent"] == writer
+        assert match["result"] == (WIN if int(i) % 2 else LOSS)
+        assert match["scroll"] == f"秘卷{int(i) % 3}"
+    assert sorted(match["ninja"] for match in matches) == sorted(
+        f"{writer}-{i}" for writer in ("S", "A") for i in range(MATCHES_PER_WRITER))
+    assert match_log.overall == [MATCHES_PER_WRITER, MATCHES_PER_WRITER]
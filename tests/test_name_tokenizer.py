@@ -0,0 +1,47 @@
+import random
+
+from name_tokenizer import IncrementalNameParser
+from utils import normalize_name
+
+
+def parse(text, existing):
+    parser = IncrementalNameParser(existing)
+    parser.update(text)
+    return parser
+
+
+def test_typing_in_one_line_only_looks_up_changed_names():
+    lookups = []
+    parser = IncrementalNameParser(set(), lambda name: lookups.append(name) or name)
+    text = ""
+    for ch in "卡卡西、凯、鼬、佐助":
+        text += ch
+        parser.update(text)
+    # 每次按键只重新查询正在输入的那个名称，前面已经输完的名称不再查询
+    assert lookups == ["卡", "卡卡", "卡卡西", "凯", "鼬", "佐", "佐助"]
+    assert parser.new_names() == ["卡卡西", "凯", "鼬", "佐助"]
+
+    lookups.clear()
+    parser.update("卡卡西、迈特凯、鼬、佐助")
+    assert lookups == ["迈特凯"]
+    assert parser.new_names() == ["卡卡西", "迈特凯", "鼬", "佐助"]
+
+
+def test_incremental_updates_match_a_fresh_parse():
+    existing = {normalize_name("卡卡西"), normalize_name("鼬")}
+    pieces = ["卡卡西", "凯", "鼬", "佐助", "1.", "（2）", "!!!", "卡卡西", "、", "，", " ", "\n", "\n"]
+    rng = random.Random(30)
+    parser = IncrementalNameParser(existing)
+    text = ""
+    for _ in range(300):
+        position = rng.randint(0, len(text))
+        if text and rng.random() < 0.4:
+            text = text[:position] + text[position + rng.randint(1, 4):]
+        else:
+            text = text[:position] + rng.choice(pieces) + text[position:]
+        parser.update(text)
+        fresh = parse(text, existing)
+        assert parser.stats() == fresh.stats()
+        assert parser.new_names() == fresh.new_names()
+        assert parser.duplicate_names() == fresh.duplicate_names()
+        assert parser.line_tokens == fresh.line_tokens
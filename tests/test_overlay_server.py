@@ -0,0 +1,88 @@
+import http.client
+import json
+
+import pytest
+
+from overlay_server import OverlayFeed, OverlayServer
+
+
+@pytest.fixture
+def server(ninja_data):
+    ninja_data.add_ninjas([ninja_data.new_ninja("旗木卡卡西", "S"), ninja_data.new_ninja("迈特凯", "A")])
+    # port=0 由系统分配空闲端口
+    server = OverlayServer(OverlayFeed(ninja_data), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def get(server, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    return conn.getresponse()
+
+
+def read_frame(response):
+    # 读到空行为止，返回 {字段: 值}；连接已关闭时返回 None
+    frame = {}
+    while True:
+        line = response.readline()
+        if not line:
+            return None
+        line = line.decode('utf-8').rstrip("\n")
+        if not line:
+            return frame
+        field, _, value = line.partition(": ")
+        frame[field] = value
+
+
+def test_snapshot_etag_and_not_modified(server, ninja_data):
+    response = get(server, "/snapshot")
+    assert response.status == 200
+    etag = response.getheader("ETag")
+    assert etag
+    snapshot = json.loads(response.read())
+    assert [ninja["name"] for ninja in snapshot["bans"]] == ["旗木卡卡西", "迈特凯"]
+
+    response = get(server, "/snapshot", {"If-None-Match": etag})
+    assert response.status == 304
+    assert response.getheader("ETag") == etag
+    assert response.read() == b""
+
+    # 数据变化后旧的 ETag 不再匹配
+    ninja_data.add_ninjas([ninja_data.new_ninja("宇智波鼬", "S")])
+    response = get(server, "/snapshot", {"If-None-Match": etag})
+    assert response.status == 200
+    assert response.getheader("ETag") != etag
+    assert len(json.loads(response.read())["bans"]) == 3
+
+
+def test_events_push_only_the_added_ninjas(server, ninja_data):
+    response = get(server, "/events")
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("text/event-stream")
+    assert read_frame(response) == {"event": "hello", "data": str(ninja_data.version)}
+
+    ninja_data.add_ninjas([ninja_data.new_ninja("宇智波鼬", "S")])
+    frame = read_frame(response)
+    assert frame["event"] == "add"
+    assert frame["id"] == str(ninja_data.version)
+    message = json.loads(frame["data"])
+    assert message["version"] == ninja_data.version
+    assert [ninja["name"] for ninja in message["data"]] == ["宇智波鼬"]
+
+    # 关闭服务后流结束，其间没有别的帧
+    server.stop()
+    assert read_frame(response) is None
+
+
+def test_stop_ends_open_streams(server):
+    responses = [get(server, "/events") for _ in range(3)]
+    for response in responses:
+        assert read_frame(response)["event"] == "hello"
+
+    server.stop()
+    for response in responses:
+        assert read_frame(response) is None
+    assert not server.thread.is_alive()
+    assert not server.feed.clients
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from scroll_wheel import FAST_ENTER_VELOCITY, FAST_EXIT_VELOCITY, QUALITY_FAST, QUALITY_FULL, ScrollWheel
+
+
+@pytest.fixture
+def wheel():
+    app = QApplication.instance() or QApplication([])
+    wheel = ScrollWheel()
+    yield wheel
+    wheel.deleteLater()
+    app.processEvents()
+
+
+def qualities(wheel, velocities):
+    result = []
+    for velocity in velocities:
+        wheel.angular_velocity = velocity
+        wheel.update_quality()
+        result.append(wheel.quality)
+    return result
+
+
+def test_quality_switches_with_hysteresis(wheel):
+    assert FAST_ENTER_VELOCITY == 540 and FAST_EXIT_VELOCITY == 360
+    assert qualities(wheel, [0, 539, 540, 541, 500, 361, 360, 359, 400, 540, 541]) == [
+        QUALITY_FULL, QUALITY_FULL, QUALITY_FULL, QUALITY_FAST,
+        # 降到进入阈值以下、但还没低于退出阈值时保持低画质
+        QUALITY_FAST, QUALITY_FAST, QUALITY_FAST, QUALITY_FULL,
+        QUALITY_FULL, QUALITY_FULL, QUALITY_FAST,
+    ]
+
+
+def test_adaptive_quality_can_be_turned_off(wheel):
+    assert qualities(wheel, [600]) == [QUALITY_FAST]
+    wheel.set_adaptive_quality(False)
+    assert wheel.quality == QUALITY_FULL
+    assert qualities(wheel, [600, 1000]) == [QUALITY_FULL, QUALITY_FULL]
+    wheel.set_adaptive_quality(True)
+    assert qualities(wheel, [600]) == [QUALITY_FAST]
+
+
+def test_spin_finish_restores_quality_and_reports_metrics(wheel):
+    metrics = []
+    wheel.spin_metrics.connect(metrics.append)
+    wheel.set_items(["八门遁甲", "通灵术"])
+    wheel.reset_frame_metrics()
+    for paint_ms, fast in ((2.0, False), (1.0, True), (4.0, False)):
+        wheel.record_frame(paint_ms, fast)
+    qualities(wheel, [600])
+
+    wheel.on_spin_finished()
+    assert wheel.quality == QUALITY_FULL
+    assert len(metrics) == 1
+    assert metrics[0]["frames"] == 3
+    assert metrics[0]["fast_quality_frames"] == 1
+    assert metrics[0]["max_paint_ms"] == 4.0
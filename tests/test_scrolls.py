@@ -0,0 +1,46 @@
+from undo_history import UndoHistory
+from utils import apply_scrolls_diff, scrolls_diff
+
+
+def test_scrolls_events_carry_only_the_changes(ninja_data):
+    events = []
+    ninja_data.add_scrolls(["八门遁甲", "通灵术", "影分身"])
+    ninja_data.add_listener(lambda event, payload: events.append((event, payload)))
+
+    assert ninja_data.add_scrolls(["替身术", "通灵术", "替身术"]) == ["替身术"]
+    assert ninja_data.remove_scrolls(["影分身", "八门遁甲"]) == ["八门遁甲", "影分身"]
+    assert events == [
+        ("scrolls", {"removed": [], "added": [(3, "替身术")]}),
+        ("scrolls", {"removed": [(0, "八门遁甲"), (2, "影分身")], "added": []}),
+    ]
+    assert ninja_data.load_scrolls() == ["通灵术", "替身术"]
+
+
+def test_undo_restores_removed_scrolls_in_place(ninja_data):
+    history = UndoHistory(ninja_data)
+    scrolls = ["八门遁甲", "通灵术", "影分身", "替身术", "螺旋丸"]
+    ninja_data.add_scrolls(scrolls)
+    ninja_data.remove_scrolls(["八门遁甲", "影分身", "螺旋丸"])
+
+    events = []
+    ninja_data.add_listener(lambda event, payload: events.append(event))
+    history.stack.undo()
+    assert ninja_data.load_scrolls() == scrolls
+    history.stack.redo()
+    assert ninja_data.load_scrolls() == ["通灵术", "替身术"]
+    # 每次撤销/重做只发一次事件
+    assert events == ["scrolls", "scrolls"]
+
+
+def test_scrolls_diff_round_trip():
+    cases = [
+        ([], ["a", "b"]),
+        (["a", "b", "c"], []),
+        (["a", "b", "c", "d"], ["b", "x", "d", "y"]),
+        (["a", "b", "c", "d"], ["d", "c", "b", "a"]),
+        (["a", "b", "c"], ["a", "c", "b", "z"]),
+    ]
+    for old, new in cases:
+        scrolls = list(old)
+        apply_scrolls_diff(scrolls, scrolls_diff(old, new))
+        assert scrolls == new
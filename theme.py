@@ -0,0 +1,442 @@
+from PySide6.QtWidgets import QApplication
+
+# 全局主题：整个程序只在 QApplication 上设置一次样式表，
+# 控件状态（已禁用/未禁用等）用动态属性表示，切换时只重新 polish 该控件
+BASE_STYLESHEET = """
+QMainWindow {
+    background-color: #f5f5f5;
+}
+
+QWidget {
+    font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
+}
+
+QWidget#leftPanel {
+    background-color: white;
+    border-radius: 8px;
+    margin: 8px;
+}
+
+QPushButton {
+    background-color: #2196F3;
+    color: white;
+    border: none;
+    padding: 8px 16px;
+    border-radius: 4px;
+    font-weight: bold;
+}
+
+QPushButton:hover {
+    background-color: #1976D2;
+}
+
+QPushButton:pressed {
+    background-color: #0D47A1;
+}
+
+QPushButton#deleteButton {
+    background-color: #F44336;
+    padding: 4px 8px;
+}
+
+QPushButton#deleteButton:hover {
+    background-color: #D32F2F;
+}
+
+QLineEdit {
+    padding: 8px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+    background-color: white;
+}
+
+QLineEdit:focus {
+    border: 2px solid #2196F3;
+}
+
+QLabel#searchLabel, QLabel#rankTitle {
+    font-size: 16px;
+    font-weight: bold;
+    color: #1976D2;
+    padding-bottom: 8px;
+}
+
+QLabel#rankBadge {
+    font-size: 12px;
+    color: #666;
+    background-color: #e3f2fd;
+    border-radius: 8px;
+    padding: 2px 8px;
+    margin-bottom: 8px;
+}
+
+QToolButton#collapseButton {
+    border: none;
+    margin-bottom: 8px;
+}
+
+QLabel#summaryLabel {
+    font-size: 14px;
+    font-weight: bold;
+    color: #333;
+    padding: 4px 8px;
+}
+
+QLabel#rankLabel {
+    font-size: 14px;
+    font-weight: bold;
+    color: #333;
+}
+
+QPushButton#addButton {
+    min-width: 80px;
+}
+
+QWidget#rankWidget {
+    background-color: #f8f9fa;
+    border-radius: 6px;
+    padding: 12px;
+}
+
+.NinjaCard {
+    background-color: white;
+    border-radius: 1px;  /* 减小圆角 */
+    padding: 0px;
+    margin: 0px;
+    box-shadow: none;    /* 移除阴影以减少视觉空间 */
+}
+QScrollArea {
+    border: none;
+    background-color: transparent;
+}
+
+QWidget[objectName^="rank_container_"] {
+    background-color: white;
+    border-radius: 4px;  /* 减小圆角 */
+    padding: 2px;        /* 进一步减小容器内边距 */
+    margin: 2px;         /* 减小容器外边距 */
+    box-shadow: 0 1px 2px rgba(0,0,0,0.1);
+}
+
+QDialog {
+    background-color: white;
+}
+
+QDialog QLabel {
+    font-size: 14px;
+    color: #333;
+    margin-top: 8px;
+}
+
+QDialog QPushButton {
+    margin-top: 16px;
+}
+
+QLabel#rulesLabel {
+    font-size: 16px;
+    font-weight: bold;
+    color: #1976D2;
+    padding-bottom: 8px;
+}
+
+QTextEdit {
+    padding: 8px;
+    border: 1px solid #ddd;
+    border-radius: 4px;
+    background-color: white;
+    font-size: 13px;
+}
+
+QTextEdit:focus {
+    border: 2px solid #2196F3;
+}
+
+QLabel#scrollTitle {
+    font-size: 16px;
+    font-weight: bold;
+    color: #1976D2;
+    padding-bottom: 8px;
+}
+
+QPushButton#spinButton {
+    background-color: #4CAF50;
+    font-size: 16px;
+    padding: 12px;
+    margin-top: 8px;
+}
+
+QPushButton#spinButton:hover {
+    background-color: #388E3C;
+}
+
+QPushButton#batchClearButton {
+    background-color: #FF5722;
+    color: white;
+    border: none;
+    padding: 6px 12px;
+    border-radius: 4px;
+    font-weight: bold;
+}
+
+QPushButton#batchClearButton:hover {
+    background-color: #F4511E;
+}
+
+QPushButton#deleteSelectedButton {
+    background-color: #F44336;
+    color: white;
+    border: none;
+    padding: 8px 16px;
+    border-radius: 4px;
+    font-weight: bold;
+    margin-top: 8px;
+}
+
+QPushButton#deleteSelectedButton:hover {
+    background-color: #D32F2F;
+}
+
+QPushButton#selectAllButton {
+    background-color: #2196F3;
+    color: white;
+    border: none;
+    padding: 6px 12px;
+    border-radius: 4px;
+    font-weight: bold;
+    margin-left: 8px;
+}
+
+QPushButton#selectAllButton:hover {
+    background-color: #1976D2;
+}
+
+
+QCheckBox {
+    spacing: 0px;
+    margin: 0px;
+    padding: 0px;
+}
+
+QCheckBox::indicator {
+    width: 10px;
+    height: 10px;
+    margin: 0px;
+    padding: 0px;
+}
+
+QCheckBox::indicator:unchecked {
+    border: 1px solid #ddd;
+    border-radius: 2px;
+    background-color: white;
+    margin: 0px;
+}
+
+QCheckBox::indicator:checked {
+    border: 1px solid #2196F3;
+    border-radius: 2px;
+    background-color: #2196F3;
+    image: url(checkmark.svg);
+    margin: 0px;
+}
+
+.NinjaCard {
+    background-color: white;
+    border-radius: 0px;
+    padding: 0px;
+    margin: 0px;
+    min-height: 20px;    /* 设置最小高度 */
+    max-height: 20px;    /* 设置最大高度 */
+}
+
+/* 添加水平布局容器的样式 */
+.NinjaCard QWidget {
+    margin: 0px;
+    padding: 0px;
+}
+
+/* 确保标签没有额外的边距 */
+.NinjaCard QLabel {
+    margin: 0px;
+    padding: 0px;
+    min-height: 16px;
+    max-height: 16px;
+}
+
+/* 调整删除按钮的样式 */
+QPushButton#deleteButton {
+    padding: 0px 2px;
+    margin: 0px;
+    height: 16px;
+    font-size: 10px;
+}
+
+/* 调整卡片内部布局容器 */
+.NinjaCard > QWidget {
+    margin: 0px;
+    padding: 0px;
+    min-height: 16px;
+    max-height: 16px;
+}
+
+/* 调整水平布局 */
+.NinjaCard QHBoxLayout {
+    margin: 0px;
+    padding: 0px;
+    spacing: 0px;
+}
+
+/* 调整垂直布局 */
+.NinjaCard QVBoxLayout {
+    margin: 0px;
+    padding: 0px;
+    spacing: 0px;
+}
+
+QWidget[objectName^="rank_container_"] {
+    background-color: white;
+    border-radius: 2px;
+    padding: 1px;
+    margin: 1px;
+}
+
+/* 以下原来是各个控件单独设置的样式 */
+
+QScrollArea#leftScroll {
+    border: none;
+    background-color: transparent;
+}
+QScrollArea#leftScroll QScrollBar:vertical {
+    border: none;
+    background: #f0f0f0;
+    width: 8px;
+    border-radius: 4px;
+}
+QScrollArea#leftScroll QScrollBar::handle:vertical {
+    background: #cdcdcd;
+    min-height: 20px;
+    border-radius: 4px;
+}
+QScrollArea#leftScroll QScrollBar::handle:vertical:hover {
+    background: #b8b8b8;
+}
+QScrollArea#leftScroll QScrollBar::add-line:vertical, QScrollArea#leftScroll QScrollBar::sub-line:vertical {
+    height: 0px;
+}
+QScrollArea#leftScroll QScrollBar::add-page:vertical, QScrollArea#leftScroll QScrollBar::sub-page:vertical {
+    background: none;
+}
+
+/* 搜索结果：banned 属性区分已禁用/未禁用 */
+QLabel#searchResult {
+    padding: 8px;
+    border-radius: 4px;
+    font-size: 13px;
+}
+QLabel#searchResult[banned="true"] {
+    background-color: #ffebee;
+    color: #c62828;
+}
+QLabel#searchResult[banned="false"] {
+    background-color: #e8f5e9;
+    color: #2e7d32;
+}
+
+ScrollItem {
+    background-color: white;
+    border-radius: 6px;
+    border: 1px solid #ddd;
+}
+ScrollItem:hover {
+    border-color: #2196F3;
+}
+ScrollItem QLabel#scrollName {
+    font-size: 14px;
+    font-weight: bold;
+}
+
+.NinjaCard QLabel#ninjaName {
+    font-size: 13px;
+    font-weight: bold;
+    padding: 0px;
+    margin: 0px;
+}
+QDialog#batchAddDialog QLabel#hintLabel {
+    font-size: 14px;
+    color: #666;
+    margin-bottom: 8px;
+}
+QDialog#batchAddDialog QTextEdit {
+    border: 1px solid #ddd;
+    border-radius: 4px;
+    padding: 12px;
+    background-color: white;
+}
+QDialog#batchAddDialog QTextEdit:focus {
+    border: 2px solid #2196F3;
+}
+QDialog#batchAddDialog QPushButton#confirmButton {
+    font-size: 14px;
+    font-weight: bold;
+}
+"""
+
+# 等级标题颜色来自 tiers.json，按等级生成规则
+# 批量删除模式下勾选的卡片背景，由 NinjaCard 自己画
+SELECTED_CARD_COLOR = "#e3f2fd"
+
+TIER_TITLE_RULE = 'QLabel#rankTitle[rank="{name}"] {{ color: {color}; }}'
+
+
+def build_stylesheet(tiers):
+    rules = [TIER_TITLE_RULE.format(**tier) for tier in tiers]
+    return BASE_STYLESHEET + "\n".join(rules) + "\n"
+
+
+def apply_theme(app, tiers):
+    # 内容相同就不重新设置，避免整个程序重新 polish
+    stylesheet = build_stylesheet(tiers)
+    if app.styleSheet() != stylesheet:
+        app.setStyleSheet(stylesheet)
+
+
+def set_state(widget, name, value):
+    # 改动态属性后只 unpolish/polish 这一个控件，不重新解析样式表
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    # 样式表的 polish 会先丢掉这个控件缓存的规则，不必再 unpolish
+    widget.style().polish(widget)
+    widget.update()
+
+
+if __name__ == '__main__':
+    # 创建卡片、秘卷项和切换状态的耗时
+    import sys
+    import time
+    from PySide6.QtWidgets import QLabel, QVBoxLayout, QWidget
+    from ninja_card import NinjaCard
+    from ninja_manager import ScrollItem
+    from utils import DEFAULT_TIERS
+
+    app = QApplication(sys.argv)
+    apply_theme(app, DEFAULT_TIERS)
+    window = QWidget()
+    layout = QVBoxLayout(window)
+    window.show()
+
+    def measure(label, count, action):
+        start = time.perf_counter()
+        for i in range(count):
+            action(i)
+        app.processEvents()
+        print(f"{label}：{(time.perf_counter() - start) / count * 1000:.3f} ms/次")
+
+    cards = []
+    measure("创建忍者卡片", 500, lambda i: (cards.append(NinjaCard(f"忍者{i}", "S")), layout.addWidget(cards[-1])))
+    measure("创建秘卷项", 200, lambda i: layout.addWidget(ScrollItem(f"秘卷{i}")))
+    measure("勾选卡片", 500, lambda i: cards[i].checkbox.setChecked(True))
+    result = QLabel()
+    result.setObjectName("searchResult")
+    layout.addWidget(result)
+    app.processEvents()
+    measure("切换搜索结果状态", 1000, lambda i: set_state(result, "banned", i % 2 == 0))
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+
+from PySide6.QtCore import *
+from PySide6.QtGui import *
+from shiboken6 import isValid
+
+# 忍者卡片上的头像尺寸
+THUMB_SIZE = 28
+# 内存中缩略图的总大小上限（字节）
+MEMORY_BUDGET = 8 * 1024 * 1024
+DISK_CACHE_DIR = "data/thumbs"
+
+
+def pixmap_cost(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def disk_cache_path(path, stat, size):
+    # 原图路径、修改时间和文件大小任何一个变化都会换一个缓存文件
+    key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}"
+    return os.path.join(DISK_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png")
+
+
+class ThumbnailSignals(QObject):
+    loaded = Signal(str, QImage)
+    failed = Signal(str)
+
+
+class ThumbnailJob(QRunnable):
+    # 在线程池中解码并缩放图片，结果通过信号回到界面线程
+
+    def __init__(self, path, size, signals):
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.signals.failed.emit(self.path)
+            return
+
+        cache_path = disk_cache_path(self.path, stat, self.size)
+        image = QImage(cache_path) if os.path.exists(cache_path) else QImage()
+        if image.isNull():
+            image = QImage(self.path)
+            if image.isNull():
+                self.signals.failed.emit(self.path)
+                return
+            image = image.scaled(self.size, self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+            os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+            tmp_path = cache_path + f".{id(self)}.tmp"
+            if image.save(tmp_path, "PNG"):
+                os.replace(tmp_path, cache_path)
+
+        self.signals.loaded.emit(self.path, image)
+
+
+class ThumbnailCache(QObject):
+    # 内存 LRU + 磁盘缓存，缩略图准备好后回调等待中的卡片
+
+    def __init__(self, size=THUMB_SIZE, memory_budget=MEMORY_BUDGET, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self._pixmaps = OrderedDict()  # path -> QPixmap
+        self._waiters = {}  # path -> [weakref(card)]
+        self._failed = set()
+        self._placeholder = None
+
+        self.pool = QThreadPool.globalInstance()
+        self.signals = ThumbnailSignals(self)
+        self.signals.loaded.connect(self.on_loaded)
+        self.signals.failed.connect(self.on_failed)
+
+    def placeholder(self):
+        if self._placeholder is None:
+            self._placeholder = QPixmap(self.size, self.size)
+            self._placeholder.fill(QColor("#e0e0e0"))
+        return self._placeholder
+
+    def request(self, path, card):
+        # 已缓存直接返回；否则返回占位图，加载完成后调用 card.set_portrait
+        pixmap = self._pixmaps.get(path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(path)
+            return pixmap
+        if path in self._failed:
+            return self.placeholder()
+
+        waiters = self._waiters.get(path)
+        if waiters is None:
+            self._waiters[path] = waiters = []
+            self.pool.start(ThumbnailJob(path, self.size, self.signals))
+        waiters.append(weakref.ref(card))
+        return self.placeholder()
+
+    def on_loaded(self, path, image):
+        pixmap = QPixmap.fromImage(image)
+        self._store(path, pixmap)
+        for ref in self._waiters.pop(path, []):
+            card = ref()
+            if card is not None and isValid(card):
+                card.set_portrait(pixmap)
+
+    def on_failed(self, path):
+        self._failed.add(path)
+        self._waiters.pop(path, None)
+
+    def _store(self, path, pixmap):
+        old = self._pixmaps.pop(path, None)
+        if old is not None:
+            self.memory_used -= pixmap_cost(old)
+        self._pixmaps[path] = pixmap
+        self.memory_used += pixmap_cost(pixmap)
+        # 超出预算时淘汰最久未使用的
+        while self.memory_used > self.memory_budget and len(self._pixmaps) > 1:
+            _, old = self._pixmaps.popitem(last=False)
+            self.memory_used -= pixmap_cost(old)
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._failed.clear()
+        self.memory_used = 0
+
+
+_thumbnail_cache = None
+
+
+def get_thumbnail_cache():
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
@@ -0,0 +1,196 @@
+import time
+from contextlib import contextmanager
+
+from PySide6.QtGui import QUndoCommand, QUndoStack
+
+# 撤销/重做：监听 NinjaData 的事件，为每次本地修改生成一条逆操作，
+# 只保存变化的记录、名称或文本片段，不保存整份名单的快照
+UNDO_LIMIT = 200
+# 连续输入规则时，间隔不超过这么多秒的修改合并成一步
+RULES_MERGE_SECONDS = 2.0
+RULES_COMMAND_ID = 1
+
+
+def text_diff(old, new):
+    # 去掉公共前缀和后缀后的差异：(起点, 旧片段, 新片段)
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    return start, old[start:len(old) - end], new[start:len(new) - end]
+
+
+def apply_text_diff(text, start, old, new):
+    # 把 text 中 start 处的 old 换成 new；文本已被改得对不上时返回 None
+    if text[start:start + len(old)] != old:
+        return None
+    return text[:start] + new + text[start + len(old):]
+
+
+class DataCommand(QUndoCommand):
+    # 操作在压栈前已经执行过，压栈时的第一次 redo 直接跳过
+
+    def __init__(self, history, text):
+        super().__init__(text)
+        self.history = history
+        self.pushed = False
+
+    def redo(self):
+        if not self.pushed:
+            self.pushed = True
+            return
+        with self.history.replaying():
+            self.apply_redo(self.history.ninja_data)
+
+    def undo(self):
+        with self.history.replaying():
+            self.apply_undo(self.history.ninja_data)
+
+
+class AddCommand(DataCommand):
+    def __init__(self, history, ninjas):
+        super().__init__(history, f"添加 {len(ninjas)} 个忍者")
+        self.ninjas = ninjas
+
+    def apply_undo(self, ninja_data):
+        ninja_data.delete_ninjas([ninja["name"] for ninja in self.ninjas])
+
+    def apply_redo(self, ninja_data):
+        ninja_data.add_ninjas(self.ninjas)
+
+
+class DeleteCommand(DataCommand):
+    # 删除的记录原样保留，撤销时连同 created_at 一起加回去
+
+    def __init__(self, history, ninjas):
+        super().__init__(history, f"删除 {len(ninjas)} 个忍者")
+        self.ninjas = ninjas
+
+    def apply_undo(self, ninja_data):
+        ninja_data.add_ninjas(self.ninjas)
+
+    def apply_redo(self, ninja_data):
+        ninja_data.delete_ninjas([ninja["name"] for ninja in self.ninjas])
+
+
+class MoveCommand(DataCommand):
+    def __init__(self, history, moves):
+        super().__init__(history, f"移动 {len(moves)} 个忍者")
+        # [(名称, 原等级, 新等级)]
+        self.moves = moves
+
+    def _move(self, ninja_data, index):
+        by_rank = {}
+        for move in self.moves:
+            by_rank.setdefault(move[index], []).append(move[0])
+        for rank, names in by_rank.items():
+            ninja_data.move_ninjas(names, rank)
+
+    def apply_undo(self, ninja_data):
+        self._move(ninja_data, 1)
+
+    def apply_redo(self, ninja_data):
+        self._move(ninja_data, 2)
+
+
+class ScrollCommand(DataCommand):
+    # 保存 scrolls 事件的差异，撤销删除时放回原来的位置；每次撤销/重做只写一次文件
+
+    def __init__(self, history, diff):
+        super().__init__(history, "修改秘卷")
+        # [(位置, 名称)]
+        self.added = diff["added"]
+        self.removed = diff["removed"]
+
+    def apply_undo(self, ninja_data):
+        ninja_data.update_scrolls([name for _, name in self.added], self.removed)
+
+    def apply_redo(self, ninja_data):
+        ninja_data.update_scrolls([name for _, name in self.removed], self.added)
+
+
+class RulesCommand(DataCommand):
+    # 只保存改动的文本片段
+
+    def __init__(self, history, before, after):
+        super().__init__(history, "修改规则")
+        self.start, self.old, self.new = text_diff(before, after)
+        self.time = time.monotonic()
+        # 仅在压栈合并时使用，之后清空
+        self.before = before
+
+    def id(self):
+        return RULES_COMMAND_ID
+
+    def mergeWith(self, other):
+        if other.time - self.time > RULES_MERGE_SECONDS or other.before is None:
+            return False
+        # other 之前的文本就是本条修改之后的文本，还原出本条之前的文本后重新求差异
+        before = apply_text_diff(other.before, self.start, self.new, self.old)
+        after = apply_text_diff(other.before, other.start, other.old, other.new)
+        if before is None or after is None:
+            return False
+        self.start, self.old, self.new = text_diff(before, after)
+        self.time = other.time
+        return True
+
+    def apply_undo(self, ninja_data):
+        rules = apply_text_diff(ninja_data.load_rules(), self.start, self.new, self.old)
+        if rules is not None:
+            ninja_data.save_rules(rules)
+
+    def apply_redo(self, ninja_data):
+        rules = apply_text_diff(ninja_data.load_rules(), self.start, self.old, self.new)
+        if rules is not None:
+            ninja_data.save_rules(rules)
+
+
+class UndoHistory:
+
+    def __init__(self, ninja_data, parent=None):
+        self.ninja_data = ninja_data
+        self.stack = QUndoStack(parent)
+        self.stack.setUndoLimit(UNDO_LIMIT)
+        self._replaying = False
+        self._rules = ninja_data.load_rules()
+        ninja_data.add_listener(self.on_data_changed)
+
+    @contextmanager
+    def replaying(self):
+        self._replaying = True
+        try:
+            yield
+        finally:
+            self._replaying = False
+
+    def push(self, command):
+        self.stack.push(command)
+        if isinstance(command, RulesCommand):
+            command.before = None
+
+    def on_data_changed(self, event, payload):
+        if event == "profile":
+            # 撤销记录只对当前方案有效
+            self.stack.clear()
+            self._rules = self.ninja_data.load_rules()
+            return
+
+        record = not self._replaying and not self.ninja_data.external_change
+        if event == "rules":
+            if record and payload != self._rules:
+                self.push(RulesCommand(self, self._rules, payload))
+            self._rules = payload
+        elif not record:
+            return
+        elif event == "add":
+            self.push(AddCommand(self, list(payload)))
+        elif event == "delete":
+            self.push(DeleteCommand(self, list(payload)))
+        elif event == "move":
+            self.push(MoveCommand(self, [(ninja["name"], old_rank, ninja["rank"])
+                                         for ninja, old_rank in payload]))
+        elif event == "scrolls":
+            self.push(ScrollCommand(self, payload))
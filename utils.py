@@ -1,97 +1,642 @@
 import json
 import os
+import shutil
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.parse import quote
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+from ninja_catalog import canonical_name, get_catalog
+from ninja_record import NinjaRecord, json_default
+
+
+# 默认方案使用 data 目录下原有的三个文件，其他方案各占 data/profiles 下的一个子目录
+DEFAULT_PROFILE = "默认"
+# 等级的名称、顺序和颜色，可在 data/tiers.json 中修改
+DEFAULT_TIERS = [
+    {"name": "S", "color": "#F44336"},
+    {"name": "A", "color": "#FF9800"},
+    {"name": "B", "color": "#2196F3"},
+    {"name": "C", "color": "#4CAF50"},
+]
+
+
+def normalize_name(name):
+    # 忍者名称比较统一忽略首尾空白和大小写
+    return name.strip().lower()
+
+
+def ban_key(name):
+    # 判断是否已禁用时使用的键：旧名单里可能存的是别名（如“卡卡西”），
+    # 两边都换成目录里的正式名称再比较
+    return normalize_name(canonical_name(name))
+
+
+def load_settings(settings_file="data/settings.json"):
+    try:
+        with open(settings_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def save_settings(settings, settings_file="data/settings.json"):
+    os.makedirs(os.path.dirname(settings_file), exist_ok=True)
+    with open(settings_file, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+
+def load_tiers(tiers_file="data/tiers.json"):
+    # 文件不存在时写入默认配置，方便直接修改
+    if not os.path.exists(tiers_file):
+        os.makedirs(os.path.dirname(tiers_file), exist_ok=True)
+        with open(tiers_file, 'w', encoding='utf-8') as f:
+            json.dump({"tiers": DEFAULT_TIERS}, f, ensure_ascii=False, indent=2)
+    try:
+        with open(tiers_file, 'r', encoding='utf-8') as f:
+            tiers = [{"name": str(tier["name"]), "color": tier.get("color", "#1976D2")}
+                     for tier in json.load(f)["tiers"] if tier.get("name")]
+        if tiers:
+            return tiers
+    except:
+        pass
+    return [dict(tier) for tier in DEFAULT_TIERS]
+
+
+def write_atomic(path, text):
+    # 先写临时文件再替换，其他实例不会读到写了一半的文件
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        # 断电时也不会留下只写了一半的文件
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def file_stamp(path):
+    # 文件的修改时间和大小，用来判断是否被其他实例改过
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def file_lock(lock_path):
+    # 跨进程的建议锁，多台电脑共用一个 data 目录时串行化写入
+    with open(lock_path, 'a+') as f:
+        if os.name == 'nt':
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 重试约 10 秒后放弃，继续等待
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def is_valid_profile_name(name):
+    return bool(name) and name not in (".", "..") and not any(c in name for c in '\\/:*?"<>|')
+
+
+def roster_diff(old, new):
+    # 两份名单之间的差异，转换成与本地修改相同的事件
+    old_by_name = {n["name"]: n for n in old}
+    new_by_name = {n["name"]: n for n in new}
+    deleted = [n for n in old if n["name"] not in new_by_name]
+    moved = [(n, old_by_name[n["name"]]["rank"]) for n in new
+             if n["name"] in old_by_name and old_by_name[n["name"]]["rank"] != n["rank"]]
+    added = [n for n in new if n["name"] not in old_by_name]
+    events = []
+    if deleted:
+        events.append(("delete", deleted))
+    if moved:
+        events.append(("move", moved))
+    if added:
+        events.append(("add", added))
+    return events
+
+
+def scrolls_diff(old, new):
+    # 两份秘卷列表之间的差异，格式与 scrolls 事件相同：
+    # {"removed": [(旧位置, 名称)], "added": [(新位置, 名称)]}，位置从小到大；
+    # 从后往前删掉 removed、再依次插入 added 就从 old 得到 new。留下的秘卷顺序变了时，从第一个对不上的位置起当作删掉再加回
+    old_names, new_names = set(old), set(new)
+    kept_old = [name for name in old if name in new_names]
+    kept_new = [name for name in new if name in old_names]
+    moved = set()
+    for i, (before, after) in enumerate(zip(kept_old, kept_new)):
+        if before != after:
+            moved = set(kept_old[i:])
+            break
+    return {
+        "removed": [(i, name) for i, name in enumerate(old) if name not in new_names or name in moved],
+        "added": [(i, name) for i, name in enumerate(new) if name not in old_names or name in moved],
+    }
+
+
+def apply_scrolls_diff(scrolls, diff):
+    # 按 scrolls 事件的差异原地修改列表
+    for index, name in reversed(diff["removed"]):
+        del scrolls[index]
+    for index, name in diff["added"]:
+        scrolls.insert(index, name)
 
 
 class NinjaData:
     def __init__(self, data_file="data/ninjas.json", rules_file="data/rules.txt",
-                 scrolls_file="data/scrolls.json"):
-        self.data_file = data_file
-        self.rules_file = rules_file
-        self.scrolls_file = scrolls_file
+                 scrolls_file="data/scrolls.json", catalog_file="data/catalog.json",
+                 profiles_dir="data/profiles", profile=DEFAULT_PROFILE, tiers_file="data/tiers.json"):
+        self.catalog_file = catalog_file
+        self.profiles_dir = profiles_dir
+        self.tiers = load_tiers(tiers_file)
+        self._default_files = (data_file, rules_file, scrolls_file)
+        # 记录名称 -> ban_key，查目录索引只在第一次遇到某个名称时进行
+        self._ban_keys = {}
+        # 方案名 -> {"shards": {rank: [...]}, "rules": str, "scrolls": {名称: None}}，
+        # 读过一次后留在内存里，切换方案不需要重新读文件
+        self._cache = {}
+        # 数据变更监听：callback(event, payload)
+        self._listeners = []
+        self.version = 0
+        # 正在通知其他实例写入的修改时为 True，监听者可据此区分本地和外部修改
+        self.external_change = False
+        self._lock_depth = 0
+        # 自动快照（SnapshotRing.attach 时设置），文件损坏时用来恢复
+        self.snapshots = None
+        # 本次运行中修复过的损坏文件：[(文件, 损坏文件备份, 是否从快照恢复)]
+        self.recovered = []
+        self._use_profile(profile if profile in self.list_profiles() else DEFAULT_PROFILE)
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, event, payload):
+        self.version += 1
+        for callback in list(self._listeners):
+            callback(event, payload)
+
+    def ranks(self):
+        return [tier["name"] for tier in self.tiers]
+
+    def tier_color(self, rank):
+        for tier in self.tiers:
+            if tier["name"] == rank:
+                return tier["color"]
+        return "#1976D2"
+
+    def profile_files(self, profile):
+        if profile == DEFAULT_PROFILE:
+            return self._default_files
+        profile_dir = os.path.join(self.profiles_dir, profile)
+        return (os.path.join(profile_dir, "ninjas.json"), os.path.join(profile_dir, "rules.txt"),
+                os.path.join(profile_dir, "scrolls.json"))
+
+    def list_profiles(self):
+        profiles = [DEFAULT_PROFILE]
+        if os.path.isdir(self.profiles_dir):
+            profiles.extend(sorted(name for name in os.listdir(self.profiles_dir)
+                                   if os.path.isdir(os.path.join(self.profiles_dir, name))))
+        return profiles
+
+    def _use_profile(self, profile):
+        self.profile = profile
+        self.data_file, self.rules_file, self.scrolls_file = self.profile_files(profile)
+        # 每个等级的记录单独存放在 ninjas/<等级>.json
+        self.shard_dir = os.path.splitext(self.data_file)[0]
+        self.lock_file = os.path.join(os.path.dirname(self.data_file), ".lock")
         self.ensure_data_file()
         self.ensure_rules_file()
         self.ensure_scrolls_file()
 
+    def switch_profile(self, profile):
+        # 切换后发出 profile 事件，监听者据此整体刷新
+        if profile == self.profile:
+            return
+        self._use_profile(profile)
+        # 内存里的旧数据如果已被其他实例改过就丢掉，反正监听者会整体刷新
+        cache = self._profile_cache()
+        for rank in self._stale_shards():
+            del cache["shards"][rank]
+        stamps = cache.get("stamps", {})
+        for key, path in (("rules", self.rules_file), ("scrolls", self.scrolls_file)):
+            if key in cache and file_stamp(path) != stamps.get(path):
+                del cache[key]
+        self.notify("profile", profile)
+
+    def watched_paths(self):
+        # 需要监视变化的文件和目录
+        return ([self.shard_dir, os.path.dirname(self.data_file), self.rules_file, self.scrolls_file] +
+                [self.shard_file(rank) for rank in self.ranks()])
+
+    def _stale_shards(self):
+        cache = self._profile_cache()
+        stamps = cache.get("stamps", {})
+        return [rank for rank in cache.get("shards", {})
+                if file_stamp(self.shard_file(rank)) != stamps.get(self.shard_file(rank))]
+
+    @contextmanager
+    def locked(self):
+        # 加锁的读改写：先合并其他实例已写入的修改，再在最新数据上执行本次操作
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        with file_lock(self.lock_file):
+            self._lock_depth = 1
+            try:
+                self.reload()
+                yield
+            finally:
+                self._lock_depth = 0
+
+    def reload(self):
+        # 检查文件是否被其他实例改过，改过的部分按差异发出 add/delete/move/rules/scrolls 事件。
+        # 返回是否有变化
+        cache = self._profile_cache()
+        stamps = cache.get("stamps", {})
+        events = []
+
+        # 只重读变化了的等级分片
+        stale = self._stale_shards()
+        if stale:
+            old = [ninja for rank in stale for ninja in cache["shards"].pop(rank)]
+            new = [ninja for rank in stale for ninja in self._shard(rank)]
+            events.extend(roster_diff(old, new))
+        if "rules" in cache and file_stamp(self.rules_file) != stamps.get(self.rules_file):
+            old = cache.pop("rules")
+            if self.load_rules() != old:
+                events.append(("rules", self.load_rules()))
+        if "scrolls" in cache and file_stamp(self.scrolls_file) != stamps.get(self.scrolls_file):
+            old = list(cache.pop("scrolls"))
+            if self.load_scrolls() != old:
+                events.append(("scrolls", scrolls_diff(old, self.load_scrolls())))
+
+        self.external_change = True
+        try:
+            for event, payload in events:
+                self.notify(event, payload)
+        finally:
+            self.external_change = False
+        return bool(events)
+
+    def create_profile(self, profile, copy_current=False):
+        profile_dir = os.path.join(self.profiles_dir, profile)
+        os.makedirs(profile_dir)
+        if copy_current:
+            data_file, rules_file, scrolls_file = self.profile_files(profile)
+            shutil.copytree(self.shard_dir, os.path.splitext(data_file)[0])
+            shutil.copyfile(self.rules_file, rules_file)
+            shutil.copyfile(self.scrolls_file, scrolls_file)
+
+    def delete_profile(self, profile):
+        if profile in (DEFAULT_PROFILE, self.profile):
+            return False
+        shutil.rmtree(os.path.join(self.profiles_dir, profile), ignore_errors=True)
+        self._cache.pop(profile, None)
+        return True
+
+    def _profile_cache(self):
+        return self._cache.setdefault(self.profile, {})
+
+    def _read_file(self, path, parse):
+        # 读取前记下文件状态，之后据此判断内存中的数据是否过期
+        stamp = file_stamp(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            value = parse(f)
+        self._profile_cache().setdefault("stamps", {})[path] = stamp
+        return value
+
+    def _write_file(self, path, text):
+        write_atomic(path, text)
+        self._profile_cache().setdefault("stamps", {})[path] = file_stamp(path)
+
+    def load_catalog(self):
+        # 全部忍者目录，格式：{"S": ["名称", ...], "A": [...], ...}
+        # data/catalog.json 存在时优先使用，否则使用随程序发布的目录
+        if not os.path.exists(self.catalog_file):
+            return get_catalog().names_by_rank()
+        try:
+            with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+
     def ensure_scrolls_file(self):
         os.makedirs(os.path.dirname(self.scrolls_file), exist_ok=True)
         if not os.path.exists(self.scrolls_file):
             self.save_scrolls([])
 
+    def _scrolls(self):
+        # 秘卷在内存里是按添加顺序排列的集合（只用键的 dict），查找、添加、删除都是 O(1)；
+        # 返回的是缓存本身，不要直接修改
+        cache = self._profile_cache()
+        if "scrolls" not in cache:
+            try:
+                cache["scrolls"] = dict.fromkeys(self._read_file(self.scrolls_file, json.load))
+            except FileNotFoundError:
+                cache["scrolls"] = {}
+            except Exception:
+                state = self._recover_file(self.scrolls_file)
+                self.save_scrolls(state["scrolls"] if state else [])
+        return cache["scrolls"]
+
     def load_scrolls(self):
-        try:
-            with open(self.scrolls_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
+        return list(self._scrolls())
+
+    def has_scroll(self, name):
+        return name in self._scrolls()
 
     def save_scrolls(self, scrolls):
-        with open(self.scrolls_file, 'w', encoding='utf-8') as f:
-            json.dump(scrolls, f, ensure_ascii=False, indent=2)
+        scrolls = dict.fromkeys(scrolls)
+        self._write_file(self.scrolls_file, json.dumps(list(scrolls), ensure_ascii=False, indent=2))
+        self._profile_cache()["scrolls"] = scrolls
 
     def add_scroll(self, name):
-        scrolls = self.load_scrolls()
-        if name not in scrolls:
-            scrolls.append(name)
-            self.save_scrolls(scrolls)
+        self.add_scrolls([name])
+
+    def add_scrolls(self, names):
+        # 批量添加（例如粘贴的一段文字），追加到末尾，跳过已有和重复的名称
+        return [name for _, name in self.update_scrolls(added=[(None, name) for name in names])["added"]]
 
     def remove_scroll(self, name):
-        scrolls = self.load_scrolls()
-        if name in scrolls:
-            scrolls.remove(name)
-            self.save_scrolls(scrolls)
+        self.remove_scrolls([name])
+
+    def remove_scrolls(self, names):
+        return [name for _, name in self.update_scrolls(removed=names)["removed"]]
+
+    def update_scrolls(self, removed=(), added=()):
+        # 先删除 removed 中的名称，再插入 added = [(位置, 名称)]，位置为 None 时追加到末尾
+        # （撤销删除时按原来的位置放回）。只写一次文件、发一次只含差异的 scrolls 事件，返回该差异
+        with self.locked():
+            old = self._scrolls()
+            gone = {name for name in removed if name in old}
+            diff = {"removed": [(i, name) for i, name in enumerate(old) if name in gone], "added": []}
+            scrolls = [name for name in old if name not in gone]
+            existing = set(scrolls)
+            pending = []
+            for index, name in added:
+                if name and name not in existing:
+                    existing.add(name)
+                    pending.append((index, name))
+            # 按位置从小到大插入，已插入的不会被后面的挤动
+            last = -1
+            for index, name in sorted((item for item in pending if item[0] is not None), key=lambda item: item[0]):
+                last = min(max(index, last + 1), len(scrolls))
+                scrolls.insert(last, name)
+                diff["added"].append((last, name))
+            for index, name in pending:
+                if index is None:
+                    diff["added"].append((len(scrolls), name))
+                    scrolls.append(name)
+            changed = bool(diff["removed"] or diff["added"])
+            if changed:
+                self.save_scrolls(scrolls)
+        if changed:
+            self.notify("scrolls", diff)
+        return diff
 
     def ensure_data_file(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        if not os.path.exists(self.data_file):
-            self.save_data([])
+        os.makedirs(self.shard_dir, exist_ok=True)
+        if os.path.exists(self.data_file):
+            # 旧版本所有等级都存在一个 ninjas.json 里，按等级拆分后保留原文件备份
+            try:
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception:
+                # 和分片损坏一样改名保留并记入 recovered；没有快照时不动已有的分片
+                state = self._recover_file(self.data_file)
+                if state:
+                    self.save_data([ninja for ninjas in state["ninjas"].values() for ninja in ninjas])
+                return
+            self.save_data(data)
+            os.replace(self.data_file, self.data_file + ".bak")
 
     def ensure_rules_file(self):
         os.makedirs(os.path.dirname(self.rules_file), exist_ok=True)
         if not os.path.exists(self.rules_file):
             self.save_rules("在此输入规则说明...")
 
+    def shard_file(self, rank):
+        return os.path.join(self.shard_dir, quote(rank, safe='') + ".json")
+
+    def _shard(self, rank):
+        # 某个等级的记录，只读取这一个分片；返回的是缓存本身，不要直接修改
+        shards = self._profile_cache().setdefault("shards", {})
+        if rank not in shards:
+            # 读取时直接构造成 NinjaRecord，名称驻留，多个方案里的同名忍者共用同一个字符串
+            try:
+                data = self._read_file(self.shard_file(rank),
+                                       lambda f: json.load(f, object_hook=NinjaRecord.from_dict))
+            except FileNotFoundError:
+                data = []
+            except Exception:
+                state = self._recover_file(self.shard_file(rank))
+                data = [NinjaRecord.from_dict(n) for n in state["ninjas"].get(rank, [])] if state else []
+                self._save_shard(rank, data)
+            shards[rank] = data
+        return shards[rank]
+
+    def _recover_file(self, path):
+        # 文件损坏时不能当作空名单处理，否则下次保存会把数据清空：
+        # 损坏的文件改名保留，返回最近一份快照的数据（没有快照时为 None）用来恢复
+        backup = f"{path}.corrupt-{datetime.now():%Y%m%d%H%M%S}"
+        os.replace(path, backup)
+        state = self.snapshots.latest(self.profile) if self.snapshots is not None else None
+        self.recovered.append((path, backup, state is not None))
+        return state
+
+    def snapshot_state(self):
+        # 供快照使用：只复制各分片的列表，记录本身在后台线程里再转换
+        return {
+            "shards": {rank: list(self._shard(rank)) for rank in self.ranks()},
+            "rules": self.load_rules(),
+            "scrolls": self.load_scrolls(),
+        }
+
+    def restore_state(self, state):
+        # 用快照数据整体替换当前方案，差异按普通修改发出事件
+        with self.locked():
+            old = self.load_data()
+            for rank in self.ranks():
+                records = [NinjaRecord.from_dict(n) for n in state["ninjas"].get(rank, [])]
+                if records != self._shard(rank):
+                    self._save_shard(rank, records)
+            events = roster_diff(old, self.load_data())
+            if state["rules"] != self.load_rules():
+                self._write_file(self.rules_file, state["rules"])
+                self._profile_cache()["rules"] = state["rules"]
+                events.append(("rules", state["rules"]))
+            if state["scrolls"] != self.load_scrolls():
+                old = self.load_scrolls()
+                self.save_scrolls(state["scrolls"])
+                events.append(("scrolls", scrolls_diff(old, self.load_scrolls())))
+        for event, payload in events:
+            self.notify(event, payload)
+
+    def _save_shard(self, rank, data):
+        self._write_file(self.shard_file(rank), json.dumps(data, ensure_ascii=False, indent=2,
+                                                           default=json_default))
+        self._profile_cache().setdefault("shards", {})[rank] = list(data)
+
     def load_data(self):
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
+        # 按等级顺序拼接所有分片，返回新列表
+        return [ninja for rank in self.ranks() for ninja in self._shard(rank)]
 
     def save_data(self, data):
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # 按等级分组，只重写内容有变化的分片
+        grouped = {}
+        for ninja in data:
+            ninja = NinjaRecord.from_dict(ninja)
+            grouped.setdefault(ninja.rank, []).append(ninja)
+        for rank in set(grouped) | set(self.ranks()):
+            records = grouped.get(rank, [])
+            if records != self._shard(rank):
+                self._save_shard(rank, records)
 
     def load_rules(self):
-        try:
-            with open(self.rules_file, 'r', encoding='utf-8') as f:
-                return f.read()
-        except:
-            return "在此输入规则说明..."
+        cache = self._profile_cache()
+        if "rules" not in cache:
+            try:
+                cache["rules"] = self._read_file(self.rules_file, lambda f: f.read())
+            except:
+                cache["rules"] = "在此输入规则说明..."
+        return cache["rules"]
 
     def save_rules(self, rules):
-        with open(self.rules_file, 'w', encoding='utf-8') as f:
-            f.write(rules)
+        # 规则是整段文本，后写入的覆盖先写入的
+        with self.locked():
+            self._write_file(self.rules_file, rules)
+            self._profile_cache()["rules"] = rules
+        self.notify("rules", rules)
 
-    def add_ninja(self, name, rank):
-        data = self.load_data()
+    def new_ninja(self, name, rank):
+        return NinjaRecord(name, rank, datetime.now().isoformat())
 
-        ninja = {
-            "name": name,
-            "rank": rank,
-            "created_at": datetime.now().isoformat()
-        }
+    def add_ninja(self, name, rank):
+        self.add_ninjas([self.new_ninja(name, rank)])
 
-        data.append(ninja)
-        self.save_data(data)
+    def add_ninjas(self, ninjas):
+        # 批量添加，每个涉及的等级分片只写一次
+        if not ninjas:
+            return
+        # 导入等处传入的 dict 统一换成 NinjaRecord
+        ninjas = [NinjaRecord.from_dict(ninja) for ninja in ninjas]
+        grouped = {}
+        for ninja in ninjas:
+            grouped.setdefault(ninja["rank"], []).append(ninja)
+        with self.locked():
+            for rank, records in grouped.items():
+                self._save_shard(rank, self._shard(rank) + records)
+        self.notify("add", list(ninjas))
 
     def delete_ninja(self, name):
-        data = self.load_data()
-        data = [n for n in data if n["name"] != name]
-        self.save_data(data)
+        self.delete_ninjas([name])
+
+    def delete_ninjas(self, names):
+        # 批量删除，只重写确实删除了记录的等级分片
+        names = set(names)
+        removed = []
+        with self.locked():
+            for rank in self.ranks():
+                shard = self._shard(rank)
+                removed_here = [n for n in shard if n["name"] in names]
+                if removed_here:
+                    self._save_shard(rank, [n for n in shard if n["name"] not in names])
+                    removed.extend(removed_here)
+        if removed:
+            self.notify("delete", removed)
+        return removed
+
+    def clear_rank(self, rank):
+        with self.locked():
+            removed = list(self._shard(rank))
+            if removed:
+                self._save_shard(rank, [])
+        if removed:
+            self.notify("delete", removed)
+        return removed
+
+    def move_ninjas(self, names, new_rank):
+        # 原地修改等级，保留 created_at，只重写来源和目标等级的分片
+        names = set(names)
+        moved = []
+        with self.locked():
+            for rank in self.ranks():
+                if rank == new_rank:
+                    continue
+                shard = self._shard(rank)
+                moving = [n for n in shard if n["name"] in names]
+                if moving:
+                    self._save_shard(rank, [n for n in shard if n["name"] not in names])
+                    moved.extend((ninja, rank) for ninja in moving)
+            if moved:
+                for ninja, _ in moved:
+                    ninja["rank"] = new_rank
+                self._save_shard(new_rank, self._shard(new_rank) + [ninja for ninja, _ in moved])
+        if moved:
+            self.notify("move", moved)
+        return [ninja for ninja, _ in moved]
+
+    def _ban_index(self, rank):
+        # 某个等级的 {ban_key: [记录]}。分片被重新读取（文件的修改时间或大小变了）或写入时，
+        # 缓存里的列表都会换成新对象，据此判断索引是否过期
+        shard = self._shard(rank)
+        indexes = self._profile_cache().setdefault("ban_index", {})
+        cached = indexes.get(rank)
+        if cached is None or cached[0] is not shard:
+            keys = self._ban_keys
+            index = {}
+            for ninja in shard:
+                name = ninja["name"]
+                key = keys.get(name)
+                if key is None:
+                    key = keys[name] = ban_key(name)
+                index.setdefault(key, []).append(ninja)
+            cached = indexes[rank] = (shard, index)
+        return cached[1]
+
+    def banned_keys(self):
+        # 返回新集合，调用方可以直接往里添加
+        indexes = [self._ban_index(rank) for rank in self.ranks()]
+        cache = self._profile_cache()
+        cached = cache.get("banned_keys")
+        if cached is None or len(cached[0]) != len(indexes) or any(a is not b for a, b in zip(cached[0], indexes)):
+            cached = cache["banned_keys"] = (indexes, frozenset().union(*indexes))
+        return set(cached[1])
+
+    def find_banned(self, names):
+        # 名称或别名 -> 名单里实际存的记录
+        keys = list(dict.fromkeys(ban_key(name) for name in names))
+        return [ninja for rank in self.ranks() for key in keys for ninja in self._ban_index(rank).get(key, ())]
 
     def get_ninjas(self, rank=None):
-        data = self.load_data()
         if rank:
-            return [n for n in data if n["rank"] == rank]
-        return data
\ No newline at end of file
+            return list(self._shard(rank))
+        return self.load_data()
\ No newline at end of file
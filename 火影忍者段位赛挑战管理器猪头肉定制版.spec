@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('data', 'data'), ('checkmark.svg', '.')],
+    datas=[('data', 'data'), ('checkmark.svg', '.'), ('catalog', 'catalog')],
     hiddenimports=['PySide6.QtXml'],
     hookspath=[],
     hooksconfig={},